@@ -3,22 +3,41 @@ Simple ReAct Agent for Math & Physics Word Problems
 Using LangGraph + MCP + Wolfram Alpha
 """
 
+import argparse
 import asyncio
+import json
+import statistics
+import time
+from typing import Any, Dict, List, Optional
 from langchain_core.messages import HumanMessage
 from math_agent import create_react_graph, AgentState
+from math_agent.utils.llm import aclose_llm_clients, get_response_cache
+from math_agent.utils.mcp_client import aclose_mcp_clients
 
+# Compiled once and shared by every problem (the graph itself is stateless)
+_graph = None
+
+
+def get_graph():
+    """Get the shared compiled ReAct graph."""
+    global _graph
+    if _graph is None:
+        _graph = create_react_graph()
+    return _graph
 
-async def solve_problem(problem: str) -> str:
-    """Solve a math or physics word problem."""
 
-    # Create the ReAct graph
-    graph = create_react_graph()
+async def close_clients() -> None:
+    """Close the pooled connections of the shared clients before the event loop ends."""
+    await aclose_llm_clients()
+    await aclose_mcp_clients()
 
-    # Initial state
-    initial_state = AgentState(
+
+def create_initial_state(problem: str, max_iterations: int = 5) -> AgentState:
+    """Initial graph state for a problem."""
+    return AgentState(
         messages=[HumanMessage(content=problem)],
         iteration=0,
-        max_iterations=5,
+        max_iterations=max_iterations,
         problem=problem,
         solution="",
         reasoning="",
@@ -28,55 +47,171 @@ async def solve_problem(problem: str) -> str:
         parse_result=""
     )
 
-    print(f"🤔 Problem: {problem}")
-    print("🔄 ReAct reasoning...\n")
+
+def extract_answer(final_state: Optional[Dict[str, Any]]) -> str:
+    """Extract the final answer from the last graph state."""
+    if final_state and final_state.get("messages"):
+        for message in reversed(final_state["messages"]):
+            content = getattr(message, "content", "")
+            if "FINAL_ANSWER:" in content.upper():
+                return content.split("FINAL_ANSWER:")[-1].strip()
+
+        # If no final answer, return last message
+        last_message = final_state["messages"][-1]
+        return getattr(last_message, "content", "No solution found")
+
+    return "No solution generated"
+
+
+def print_token(chunk: Dict[str, Any], streamed_steps: set) -> None:
+    """Print a streamed reasoning token as it arrives."""
+    iteration = chunk["iteration"]
+    if iteration not in streamed_steps:
+        streamed_steps.add(iteration)
+        print(f"🧠 Reasoning (step {iteration}): ", end="")
+    print(chunk["reasoning_token"], end="", flush=True)
+
+
+def print_event(node_name: str, node_output: Dict[str, Any], streamed: bool = False) -> None:
+    """Print the progress of one graph node (streamed reasoning was already printed)."""
+    if node_name == "reasoning":
+        if streamed:
+            print()
+        else:
+            iteration = node_output.get("iteration", 0)
+            reasoning = node_output.get("reasoning", "")
+            print(f"🧠 Reasoning (step {iteration}): {reasoning[:80]}...")
+
+    elif node_name == "parsing":
+        tool_name = node_output.get("tool_name", "none")
+        tool_query = node_output.get("tool_query", "none")
+        if tool_name != "none":
+            print(f"🔍 Parsing: Found tool '{tool_name}' with query '{tool_query[:50]}...'")
+
+    elif node_name == "action":
+        tool_name = node_output.get("tool_name", "unknown")
+        tool_query = node_output.get("tool_query", "unknown")
+        print(f"🔧 Calling tool {tool_name}: {tool_query[:50]}...")
+
+        tool_result = node_output.get("tool_result", "")
+        print(f"📥 Result: {tool_result[:80]}...")
+
+
+async def solve_problem(problem: str, graph=None, verbose: bool = True, max_iterations: int = 5) -> str:
+    """Solve a math or physics word problem."""
+
+    # Reuse the compiled ReAct graph
+    graph = graph or get_graph()
+    initial_state = create_initial_state(problem, max_iterations)
+
+    if verbose:
+        print(f"🤔 Problem: {problem}")
+        print("🔄 ReAct reasoning...\n")
 
     try:
-        # Run the graph
+        # Run the graph, reasoning tokens arrive as "custom" events
         final_state = None
-        async for event in graph.astream(initial_state):
+        streamed_steps = set()
+        async for mode, event in graph.astream(initial_state, stream_mode=["updates", "custom"]):
+            if mode == "custom":
+                if verbose and "reasoning_token" in event:
+                    print_token(event, streamed_steps)
+                continue
+
             for node_name, node_output in event.items():
+                if verbose:
+                    streamed = node_output.get("iteration") in streamed_steps
+                    print_event(node_name, node_output, streamed)
+                final_state = node_output
 
-                if node_name == "reasoning":
-                    iteration = node_output.get("iteration", 0)
-                    reasoning = node_output.get("reasoning", "")
-                    print(f"🧠 Reasoning (step {iteration}): {reasoning[:80]}...")
+        # Extract final answer
+        return extract_answer(final_state)
 
-                elif node_name == "parsing":
-                    tool_name = node_output.get("tool_name", "none")
-                    tool_query = node_output.get("tool_query", "none")
-                    if tool_name != "none":
-                        print(f"🔍 Parsing: Found tool '{tool_name}' with query '{tool_query[:50]}...'")
+    except Exception as e:
+        return f"Error: {str(e)}"
 
-                elif node_name == "action":
-                    tool_name = node_output.get("tool_name", "unknown")
-                    tool_query = node_output.get("tool_query", "unknown")
-                    print(f"🔧 Calling tool {tool_name}: {tool_query[:50]}...")
 
-                    tool_result = node_output.get("tool_result", "")
-                    print(f"📥 Result: {tool_result[:80]}...")
+def load_problems(path: str) -> List[Dict[str, Any]]:
+    """Read problems from a JSONL file ({"problem": ..., "id": ...} per line)."""
+    problems = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"problem": record}
+            record.setdefault("id", line_number)
+            problems.append(record)
+    return problems
 
-                final_state = node_output
 
-        # Extract final answer
-        if final_state and final_state.get("messages"):
-            for message in reversed(final_state["messages"]):
-                content = getattr(message, "content", "")
-                if "FINAL_ANSWER:" in content.upper():
-                    return content.split("FINAL_ANSWER:")[-1].strip()
+async def solve_batch(
+    input_path: str,
+    output_path: str,
+    concurrency: int = 8,
+    max_iterations: int = 5,
+) -> List[Dict[str, Any]]:
+    """Solve all problems of a JSONL file concurrently.
 
-            # If no final answer, return last message
-            last_message = final_state["messages"][-1]
-            return getattr(last_message, "content", "No solution found")
+    At most `concurrency` problems run at once, all through one compiled
+    graph. Each answer is appended to the output JSONL file as soon as it
+    is ready (in completion order), with its latency in seconds.
+    """
+    problems = load_problems(input_path)
+    graph = get_graph()
+    semaphore = asyncio.Semaphore(concurrency)
 
-        return "No solution generated"
+    async def solve_one(record: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            start = time.perf_counter()
+            answer = await solve_problem(
+                record["problem"], graph=graph, verbose=False, max_iterations=max_iterations
+            )
+            return {**record, "answer": answer, "latency": round(time.perf_counter() - start, 3)}
 
-    except Exception as e:
-        return f"Error: {str(e)}"
+    print(f"📚 Solving {len(problems)} problems from {input_path} ({concurrency} at a time)")
+    start = time.perf_counter()
+    results = []
+
+    try:
+        with open(output_path, "w", encoding="utf-8") as out:
+            for task in asyncio.as_completed([solve_one(record) for record in problems]):
+                result = await task
+                results.append(result)
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+                print(f"✅ [{len(results)}/{len(problems)}] #{result['id']} in {result['latency']:.1f}s: {result['answer'][:60]}")
+    finally:
+        await close_clients()
+
+    elapsed = time.perf_counter() - start
+    if results:
+        latencies = sorted(result["latency"] for result in results)
+        p95 = latencies[min(int(0.95 * len(latencies)), len(latencies) - 1)]
+        print("=" * 50)
+        print(f"Solved {len(results)} problems in {elapsed:.1f}s -> {output_path}")
+        print(f"Latency: mean {statistics.mean(latencies):.1f}s, p50 {statistics.median(latencies):.1f}s, p95 {p95:.1f}s")
+
+    cache = get_response_cache()
+    if cache:
+        stats = cache.stats()
+        print(f"LLM cache: {stats['hits']} hits ({stats['disk_hits']} from disk), {stats['misses']} misses, hit rate {stats['hit_rate']:.0%}")
+
+    return results
 
 
 async def main():
     """Main interactive loop."""
+    try:
+        await interactive_loop()
+    finally:
+        await close_clients()
+
+
+async def interactive_loop():
+    """Ask for problems and solve them until the user quits."""
     print("🧮 Math & Physics ReAct Agent")
     print("=" * 40)
     print("💡 Tip: Start the MCP server first:")
@@ -125,4 +260,14 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Math & Physics ReAct Agent")
+    parser.add_argument("--batch", metavar="PROBLEMS.jsonl", help="Solve all problems of a JSONL file")
+    parser.add_argument("--output", default="answers.jsonl", help="Output JSONL file for --batch")
+    parser.add_argument("--concurrency", type=int, default=8, help="Problems solved at once in --batch mode")
+    parser.add_argument("--max-iterations", type=int, default=5, help="ReAct iterations per problem")
+    args = parser.parse_args()
+
+    if args.batch:
+        asyncio.run(solve_batch(args.batch, args.output, args.concurrency, args.max_iterations))
+    else:
+        asyncio.run(main())
@@ -25,7 +25,9 @@ def should_continue_after_reasoning(state: AgentState) -> Literal["parsing", "en
         if "FINAL_ANSWER:" in content.upper():
             return "end"
 
-    # Check if reasoning contains a tool call
+    # Check if reasoning contains a tool call (already found, or mentioned)
+    if state.get("tool_name") not in ("", "none", None):
+        return "parsing"
     reasoning = state.get("reasoning", "")
     if any(tool in reasoning.lower() for tool in ["wolfram", "calculator", "python"]):
         return "parsing"
@@ -4,6 +4,7 @@ from typing import Dict, Any
 from langchain_core.messages import ToolMessage
 from ..utils.mcp_client import call_mcp_tool
 from ..state import AgentState
+from ..tool_schemas import TOOL_ARGUMENTS
 
 
 async def action_node(state: AgentState) -> Dict[str, Any]:
@@ -27,12 +28,8 @@ async def action_node(state: AgentState) -> Dict[str, Any]:
 
     # Call the MCP tool
     try:
-        if tool_name == "wolfram_alpha":
-            result = await call_mcp_tool("wolfram_alpha", {"query": query})
-        elif tool_name == "calculator":
-            result = await call_mcp_tool("calculator", {"expression": query})
-        elif tool_name == "python_repl":
-            result = await call_mcp_tool("python_repl", {"code": query})
+        if tool_name in TOOL_ARGUMENTS:
+            result = await call_mcp_tool(tool_name, {TOOL_ARGUMENTS[tool_name]: query})
         else:
             result = f"Unknown tool: {tool_name}"
 
@@ -1,20 +1,130 @@
-"""Parsing node for ReAct pattern - uses LLM to extract tool calls from reasoning."""
+"""Parsing node for ReAct pattern - extracts tool calls from reasoning (LLM as fallback)."""
 
-from typing import Dict, Any
+import re
+import json
+from typing import Dict, Any, Optional, Tuple
 from langchain_core.messages import AIMessage
 from ..utils.llm import get_llm
 from ..state import AgentState
+from ..tool_schemas import TOOL_ARGUMENTS
 
+# One-line tool calls that are complete once their line ends. python_repl
+# code can span several lines, see PYTHON_CALL_PATTERN.
+TOOL_CALL_PATTERNS = [
+    re.compile(r"TOOL:\s*(wolfram_alpha|calculator)\s*\n\s*QUERY:[ \t]*(\S[^\n]*)\n"),
+    re.compile(r"\buse\s+[`'\"*]*(wolfram_alpha|calculator)[`'\"*]*\s+with\s+query:[ \t]*(\S[^\n]*)\n", re.IGNORECASE),
+]
 
-def parsing_node(state: AgentState) -> Dict[str, Any]:
+
+def find_tool_call(text: str, finished: bool = False) -> Optional[Tuple[str, str]]:
+    """Find a complete (tool_name, query) call in reasoning text, or None.
+
+    While the text is still streaming a call only counts once its query line
+    has ended; with finished=True the last line counts as well.
+    """
+    if "FINAL_ANSWER:" in text.upper():
+        return None
+    if finished:
+        text += "\n"
+
+    for pattern in TOOL_CALL_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            query = match.group(2).strip().rstrip(".").strip("`'\"[] ")
+            if query:
+                return match.group(1).lower(), query
+    return None
+
+
+# Start of a python_repl call, the code follows (one line or a fenced block)
+PYTHON_CALL_PATTERN = re.compile(
+    r"TOOL:\s*python_repl\s*\n\s*QUERY:|\buse\s+[`'\"*]*python_repl[`'\"*]*\s+with\s+query:", re.IGNORECASE
+)
+CODE_BLOCK_PATTERN = re.compile(r"\s*```(?:python|py)?[ \t]*\n(.*?)```", re.DOTALL)
+
+
+def parse_json_step(text: str) -> Optional[Dict[str, Any]]:
+    """The JSON object in a (possibly fenced) response, or None."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`").removeprefix("json").strip()
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        return None
+    try:
+        step = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    return step if isinstance(step, dict) else None
+
+
+def parse_tool_call(reasoning: str) -> Optional[Tuple[str, str]]:
+    """Deterministic parse of a well-formed reasoning text, None if unsure.
+
+    Understands a JSON step ({"tool": ..., "query": ...} or a tool call
+    written as {"name": ..., "arguments": {...}}), "TOOL:/QUERY:"
+    and "use <tool> with query: ..." (python_repl code on the same line or
+    in a fenced block right after it).
+    """
+    if "FINAL_ANSWER:" in reasoning.upper():
+        return None
+
+    step = parse_json_step(reasoning)
+    tool = (step.get("tool") or step.get("name")) if step else None
+    if tool in TOOL_ARGUMENTS:
+        arguments = step.get("arguments") if isinstance(step.get("arguments"), dict) else step
+        query = step.get("query") or arguments.get(TOOL_ARGUMENTS[tool])
+        return (tool, str(query)) if query else None
+
+    tool_call = find_tool_call(reasoning, finished=True)
+    if tool_call:
+        return tool_call
+
+    match = PYTHON_CALL_PATTERN.search(reasoning)
+    if match:
+        rest = reasoning[match.end():]
+        block = CODE_BLOCK_PATTERN.match(rest)
+        if block:
+            code = block.group(1).strip()
+        else:
+            # Unfenced code is only unambiguous on a single line
+            lines = [line for line in rest.strip().splitlines() if line.strip()]
+            code = lines[0].strip().strip("`") if len(lines) == 1 else ""
+        if code:
+            return "python_repl", code
+    return None
+
+
+async def parsing_node(state: AgentState) -> Dict[str, Any]:
     """
-    Parsing node - uses LLM to intelligently extract tool calls from reasoning text.
+    Parsing node - extracts the tool call from reasoning text.
     This bridges reasoning and action by understanding what the LLM wants to do.
+
+    A call found by the reasoning node (streaming, native tool call, JSON)
+    or by the deterministic parser is used directly; only reasoning that
+    neither understands costs an extra LLM call.
     """
-    llm = get_llm()
     messages = state.get("messages", [])
     reasoning = state.get("reasoning", "")
 
+    if state.get("tool_name") not in ("", "none", None):
+        tool_call = (state["tool_name"], state.get("tool_query", "none"))
+    else:
+        tool_call = parse_tool_call(reasoning)
+
+    if tool_call:
+        tool_name, query = tool_call
+        parsing_message = AIMessage(content=f"Parsed tool call: {tool_name} with query: {query}")
+        return {
+            **state,  # Preserve existing state
+            "messages": messages + [parsing_message],
+            "tool_name": tool_name,
+            "tool_query": query,
+            "parse_result": f"TOOL: {tool_name}\nQUERY: {query}"
+        }
+
+    llm = get_llm()
+
     # Create parsing prompt
     system_prompt = """You are a tool call parser. Your job is to analyze reasoning text and extract exactly what tool should be called with what parameters.
 
@@ -38,7 +148,7 @@ QUERY: none"""
     user_prompt = f"Reasoning text to parse:\n{reasoning}"
 
     try:
-        response = llm.invoke(user_prompt, system_prompt)
+        response = await llm.ainvoke(user_prompt, system_prompt)
         parse_result = response.content
 
         # Extract tool and query from LLM response
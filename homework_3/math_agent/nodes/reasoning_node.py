@@ -1,15 +1,41 @@
 """Reasoning node for ReAct pattern."""
 
-from typing import Dict, Any
+import os
+from contextlib import aclosing
+from typing import Dict, Any, Optional, Tuple
 from langchain_core.messages import HumanMessage, AIMessage
-from ..utils.llm import get_llm
+from langgraph.types import StreamWriter
+from ..utils.llm import LLMClient, get_llm
 from ..state import AgentState
+from ..tool_schemas import TOOL_ARGUMENTS, TOOL_SCHEMAS, REASONING_RESPONSE_FORMAT
+from .parsing_node import find_tool_call, parse_json_step
 
+TOOLS_INSTRUCTIONS = """
 
-def reasoning_node(state: AgentState) -> Dict[str, Any]:
+To use a tool, call it (one tool call per step).
+When you are ready to answer, reply with "FINAL_ANSWER:" followed by your complete solution."""
+
+JSON_INSTRUCTIONS = """
+
+Respond only with a JSON object:
+{"thought": your reasoning, "tool": "wolfram_alpha", "calculator", "python_repl" or null,
+ "query": the tool query or null, "final_answer": your complete solution or null}"""
+
+
+async def reasoning_node(state: AgentState, writer: StreamWriter) -> Dict[str, Any]:
     """
     Reasoning node - analyzes the problem and decides what to do.
     This is the 'Re' part of ReAct (Reasoning).
+
+    REASONING_MODE selects how the model is asked:
+    - "text" (default): prose, streamed. Every piece is emitted as a custom
+      stream event ({"reasoning_token": ..., "iteration": ...}, see
+      graph.astream with stream_mode="custom"). Once a one-line tool call is
+      complete the rest of the completion is skipped.
+    - "tools": native function calling.
+    - "json": output constrained to REASONING_SCHEMA.
+    A tool call found here is handed to the parsing node, which then needs
+    no LLM call of its own.
     """
     llm = get_llm()
     problem = state.get("problem", "")
@@ -45,8 +71,14 @@ If you're ready to answer, say "FINAL_ANSWER:" followed by your complete solutio
 
     # Get LLM reasoning
     try:
-        response = llm.invoke(user_prompt, system_prompt)
-        reasoning = response.content
+        mode = os.getenv("REASONING_MODE", "text")
+        if mode == "tools":
+            reasoning, tool_call = await _reason_with_tools(llm, user_prompt, system_prompt + TOOLS_INSTRUCTIONS)
+        elif mode == "json":
+            reasoning, tool_call = await _reason_with_json(llm, user_prompt, system_prompt + JSON_INSTRUCTIONS)
+        else:
+            reasoning, tool_call = await _reason_streaming(llm, user_prompt, system_prompt, writer, iteration + 1)
+        tool_name, tool_query = tool_call or ("", "")
 
         # Add to messages
         new_messages = messages + [AIMessage(content=reasoning)]
@@ -55,7 +87,9 @@ If you're ready to answer, say "FINAL_ANSWER:" followed by your complete solutio
             **state,  # Preserve existing state
             "messages": new_messages,
             "iteration": iteration + 1,
-            "reasoning": reasoning
+            "reasoning": reasoning,
+            "tool_name": tool_name,
+            "tool_query": tool_query
         }
 
     except Exception as e:
@@ -65,5 +99,60 @@ If you're ready to answer, say "FINAL_ANSWER:" followed by your complete solutio
             **state,  # Preserve existing state
             "messages": new_messages,
             "iteration": iteration + 1,
-            "reasoning": error_msg
+            "reasoning": error_msg,
+            "tool_name": "",
+            "tool_query": ""
         }
+
+
+async def _reason_streaming(
+    llm: LLMClient, user_prompt: str, system_prompt: str, writer: StreamWriter, step: int
+) -> Tuple[str, Optional[Tuple[str, str]]]:
+    """Stream prose reasoning, stop as soon as a one-line tool call is complete."""
+    reasoning = ""
+    async with aclosing(llm.astream(user_prompt, system_prompt)) as tokens:
+        async for token in tokens:
+            reasoning += token
+            writer({"reasoning_token": token, "iteration": step})
+            # A call can only become complete when a line ends
+            if "\n" in token:
+                tool_call = find_tool_call(reasoning)
+                if tool_call:
+                    return reasoning, tool_call
+    return reasoning, None
+
+
+async def _reason_with_tools(
+    llm: LLMClient, user_prompt: str, system_prompt: str
+) -> Tuple[str, Optional[Tuple[str, str]]]:
+    """Reasoning call with native function calling."""
+    response = await llm.ainvoke(user_prompt, system_prompt, tools=TOOL_SCHEMAS)
+    reasoning = response.content
+
+    for call in response.tool_calls:
+        argument = TOOL_ARGUMENTS.get(call["name"])
+        query = call["arguments"].get(argument) if argument else None
+        if query:
+            # Keep the call in the text, later iterations see it in the context
+            reasoning = f"{reasoning}\nI will use {call['name']} with query: {query}".strip()
+            return reasoning, (call["name"], str(query))
+    return reasoning, None
+
+
+async def _reason_with_json(
+    llm: LLMClient, user_prompt: str, system_prompt: str
+) -> Tuple[str, Optional[Tuple[str, str]]]:
+    """Reasoning call with JSON-schema constrained output."""
+    response = await llm.ainvoke(user_prompt, system_prompt, response_format=REASONING_RESPONSE_FORMAT)
+    step = parse_json_step(response.content)
+    if step is None:
+        # Not valid JSON after all, the parsing node falls back to the LLM
+        return response.content, None
+
+    thought = step.get("thought") or ""
+    if step.get("final_answer"):
+        return f"{thought}\nFINAL_ANSWER: {step['final_answer']}".strip(), None
+    if step.get("tool") in TOOL_ARGUMENTS and step.get("query"):
+        reasoning = f"{thought}\nI will use {step['tool']} with query: {step['query']}".strip()
+        return reasoning, (step["tool"], str(step["query"]))
+    return thought, None
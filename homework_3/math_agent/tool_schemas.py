@@ -0,0 +1,65 @@
+"""Tool and response schemas for structured reasoning calls."""
+
+# Argument name each MCP tool expects for its query
+TOOL_ARGUMENTS = {
+    "wolfram_alpha": "query",
+    "calculator": "expression",
+    "python_repl": "code",
+}
+
+# Native function calling (OpenAI format, translated by LiteLLM)
+TOOL_SCHEMAS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "wolfram_alpha",
+            "description": "Complex math, physics formulas, scientific calculations",
+            "parameters": {
+                "type": "object",
+                "properties": {"query": {"type": "string", "description": "Wolfram Alpha query"}},
+                "required": ["query"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "calculator",
+            "description": "Simple arithmetic with Python math expressions",
+            "parameters": {
+                "type": "object",
+                "properties": {"expression": {"type": "string", "description": "Expression to evaluate"}},
+                "required": ["expression"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "python_repl",
+            "description": "Custom calculations in Python (print the result)",
+            "parameters": {
+                "type": "object",
+                "properties": {"code": {"type": "string", "description": "Python code to run"}},
+                "required": ["code"],
+            },
+        },
+    },
+]
+
+# JSON-schema constrained output: one ReAct step
+REASONING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "thought": {"type": "string"},
+        "tool": {"type": ["string", "null"], "enum": [*TOOL_ARGUMENTS, None]},
+        "query": {"type": ["string", "null"]},
+        "final_answer": {"type": ["string", "null"]},
+    },
+    "required": ["thought", "tool", "query", "final_answer"],
+}
+
+REASONING_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "react_step", "schema": REASONING_SCHEMA},
+}
@@ -1,67 +1,508 @@
 """LLM utilities using LiteLLM - reused from bcp version."""
 
 import os
+import json
+import time
 import asyncio
-from typing import Optional
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import httpx
 import litellm
+from litellm.llms.custom_httpx.http_handler import AsyncHTTPHandler, HTTPHandler
 from dotenv import load_dotenv
 
 load_dotenv()
 
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_CACHE_TTL = 7 * 24 * 3600.0
+
+# HTTP responses opened by the running astream() request, see _record_response()
+_stream_responses: ContextVar[Optional[List[httpx.Response]]] = ContextVar("stream_responses", default=None)
+
 
 class LLMClient:
-    """LLM client using LiteLLM library for multiple provider support."""
+    """LLM client using LiteLLM library for multiple provider support.
+
+    Meant to be created once per provider/model and shared (see get_llm()).
+    Ollama requests go through HTTP clients owned by this object, so
+    keep-alive connections are reused between calls; other providers use
+    LiteLLM's own cached SDK clients. At most max_concurrency requests are
+    in flight at once (LLM_MAX_CONCURRENCY, default 8), and every provider's
+    requests time out after timeout seconds (LLM_TIMEOUT, default 120).
 
-    def __init__(self):
+    With a ResponseCache (LLM_CACHE=1, see get_response_cache()) identical
+    requests are answered from the cache instead of the model.
+    """
+
+    def __init__(
+        self,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        api_base: Optional[str] = None,
+        temperature: float = 0.1,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        cache: Optional["ResponseCache"] = None,
+    ):
         """Initialize LiteLLM client."""
-        self.provider = os.getenv("LLM_PROVIDER", "ollama")
+        self.provider = provider or os.getenv("LLM_PROVIDER", "ollama")
+        self.api_base = api_base
 
         if self.provider == "ollama":
-            self.model = f"ollama/{os.getenv('OLLAMA_MODEL', 'mistral:latest')}"
-            ollama_base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-            if ollama_base_url:
-                litellm.api_base = ollama_base_url
+            self.model = model or f"ollama/{os.getenv('OLLAMA_MODEL', 'mistral:latest')}"
+            # Passed per request instead of setting the global litellm.api_base
+            self.api_base = api_base or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 
         elif self.provider == "gemini":
-            self.model = "gemini/gemini-pro"
+            self.model = model or "gemini/gemini-pro"
 
         else:
-            self.model = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+            self.model = model or os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
 
-        self.temperature = 0.1
+        self.temperature = temperature
+        self.max_concurrency = max_concurrency or int(
+            os.getenv("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)
+        )
+        self.timeout = timeout or float(os.getenv("LLM_TIMEOUT", DEFAULT_TIMEOUT))
+        self.cache = cache if cache is not None else get_response_cache()
 
-    def invoke(self, message: str, system_prompt: Optional[str] = None) -> "LLMResponse":
-        """Sync invoke method."""
+        # Sync path: one pooled client and a thread-safe limit
+        self._sync_limit = threading.BoundedSemaphore(self.max_concurrency)
+        self._http_client = HTTPHandler(timeout=self.timeout) if self._owns_http_clients else None
+
+        # Async path: pooled client and semaphore are bound to an event loop,
+        # created lazily for the running one
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_limit: Optional[asyncio.Semaphore] = None
+        self._async_http_client: Optional[AsyncHTTPHandler] = None
+
+    @property
+    def _owns_http_clients(self) -> bool:
+        # Providers going through LiteLLM's generic HTTP handler accept our clients
+        return self.provider == "ollama"
+
+    async def _async_resources(self) -> Tuple[asyncio.Semaphore, Optional[AsyncHTTPHandler]]:
+        """Semaphore and pooled HTTP client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            previous = self._async_http_client
+            self._async_loop = loop
+            self._async_limit = asyncio.Semaphore(self.max_concurrency)
+            self._async_http_client = None
+            if self._owns_http_clients:
+                self._async_http_client = PooledAsyncHTTPHandler(
+                    timeout=httpx.Timeout(self.timeout, connect=5.0),
+                    concurrent_limit=self.max_concurrency,
+                )
+            # The client of a previous loop can't be reused, release its connections
+            if previous is not None:
+                await _close_quietly(previous)
+        return self._async_limit, self._async_http_client
+
+    async def aclose(self) -> None:
+        """Close the pooled async connections (call before the event loop ends)."""
+        client, self._async_http_client = self._async_http_client, None
+        self._async_loop = None
+        if client is not None:
+            await _close_quietly(client)
+
+    def _build_messages(self, message: str, system_prompt: Optional[str] = None) -> list:
+        """Build the chat messages for a prompt."""
         messages = []
 
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": message})
+        return messages
+
+    def _completion_kwargs(self, messages: list) -> Dict[str, Any]:
+        """Arguments shared by the sync and async completion calls."""
+        kwargs = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "timeout": self.timeout,
+        }
+        if self.api_base:
+            kwargs["api_base"] = self.api_base
+        return kwargs
+
+    def _cache_key(self, messages: list, **extra: Any) -> Optional[str]:
+        """Cache key of a request, None without a cache."""
+        if self.cache is None:
+            return None
+        return self.cache.key(self.model, messages, self.temperature, **extra)
+
+    def _cached(self, key: Optional[str]) -> Optional["LLMResponse"]:
+        cached = self.cache.get(key) if key else None
+        return LLMResponse(**cached) if cached else None
+
+    def _store(self, key: Optional[str], response: "LLMResponse") -> "LLMResponse":
+        if key:
+            self.cache.put(key, {"content": response.content, "tool_calls": response.tool_calls})
+        return response
+
+    def invoke(self, message: str, system_prompt: Optional[str] = None) -> "LLMResponse":
+        """Sync invoke method."""
+        messages = self._build_messages(message, system_prompt)
+        key = self._cache_key(messages)
+        cached = self._cached(key)
+        if cached:
+            return cached
 
         try:
-            response = litellm.completion(
-                model=self.model,
-                messages=messages,
-                temperature=self.temperature
-            )
+            with self._sync_limit:
+                response = litellm.completion(
+                    **self._completion_kwargs(messages),
+                    **({"client": self._http_client} if self._http_client else {})
+                )
             content = response.choices[0].message.content
-            return LLMResponse(content=content)
+            return self._store(key, LLMResponse(content=content))
 
         except Exception as e:
             fallback_content = f"LLM error: {str(e)}"
             return LLMResponse(content=fallback_content)
 
+    async def ainvoke(
+        self,
+        message: str,
+        system_prompt: Optional[str] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+    ) -> "LLMResponse":
+        """Async invoke method (does not block the event loop while waiting for the model).
+
+        tools enables native function calling (the calls end up in
+        LLMResponse.tool_calls), response_format constrains the output,
+        e.g. to a JSON schema.
+        """
+        messages = self._build_messages(message, system_prompt)
+        extra_kwargs = {}
+        if tools:
+            extra_kwargs["tools"] = tools
+        if response_format:
+            extra_kwargs["response_format"] = response_format
+        key = self._cache_key(messages, **extra_kwargs)
+        cached = self._cached(key)
+        if cached:
+            return cached
+
+        try:
+            limit, http_client = await self._async_resources()
+            async with limit:
+                response = await litellm.acompletion(
+                    **self._completion_kwargs(messages),
+                    **extra_kwargs,
+                    **({"client": http_client} if http_client else {})
+                )
+            reply = response.choices[0].message
+            return self._store(key, LLMResponse(content=reply.content or "", tool_calls=_tool_calls(reply)))
+
+        except Exception as e:
+            fallback_content = f"LLM error: {str(e)}"
+            return LLMResponse(content=fallback_content)
+
+    async def astream(self, message: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        """Async streaming: yields the completion text piece by piece as it arrives.
+
+        Closing the generator early (e.g. with contextlib.aclosing) stops
+        reading and closes the upstream response. What the caller read is
+        cached, the whole completion or the prefix up to where it stopped
+        (the reasoning node stops after a tool call), and is yielded as a
+        single piece for the same prompt later. Errors are not cached.
+        """
+        messages = self._build_messages(message, system_prompt)
+        key = self._cache_key(messages)
+        cached = self._cached(key)
+        if cached:
+            yield cached.content
+            return
+        stream = None
+        pieces = []
+        responses: List[httpx.Response] = []
+
+        try:
+            limit, http_client = await self._async_resources()
+            async with limit:
+                recording = _stream_responses.set(responses)
+                try:
+                    stream = await litellm.acompletion(
+                        **self._completion_kwargs(messages),
+                        stream=True,
+                        **({"client": http_client} if http_client else {})
+                    )
+                finally:
+                    _stream_responses.reset(recording)
+                async for chunk in stream:
+                    content = chunk.choices[0].delta.content if chunk.choices else None
+                    if content:
+                        pieces.append(content)
+                        yield content
+            self._store(key, LLMResponse(content="".join(pieces)))
+
+        except GeneratorExit:
+            # The caller stopped reading, the same prompt replays what it read
+            if pieces:
+                self._store(key, LLMResponse(content="".join(pieces)))
+            raise
+
+        except Exception as e:
+            yield f"LLM error: {str(e)}"
+
+        finally:
+            # Stop the generation if the caller didn't read the whole stream
+            await _close_stream(stream, responses)
+
+
+class PooledAsyncHTTPHandler(AsyncHTTPHandler):
+    """LiteLLM's async HTTP handler on a plain httpx connection pool.
+
+    LiteLLM's default aiohttp transport hands out responses whose aclose()
+    never reaches the aiohttp response, so a stream closed early would keep
+    its connection, and the generation, running. The client also records
+    the responses it opens for astream() (_record_response).
+    """
+
+    def create_client(self, timeout, concurrent_limit, event_hooks, ssl_verify=None, shared_session=None) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrent_limit, max_keepalive_connections=concurrent_limit),
+            verify=ssl_verify if ssl_verify is not None else True,
+            event_hooks={"response": [_record_response]},
+        )
+
+
+async def _record_response(response: httpx.Response) -> None:
+    """httpx response hook: hand the response to the astream() call that sent the request."""
+    responses = _stream_responses.get()
+    if responses is not None:
+        responses.append(response)
+
+
+async def _close_stream(stream: Any, responses: List[httpx.Response]) -> None:
+    """Close the HTTP responses under a LiteLLM stream.
+
+    Our pooled client records its responses, SDK streams (e.g. OpenAI's)
+    expose theirs as completion_stream.response.
+    """
+    sdk_response = getattr(getattr(stream, "completion_stream", None), "response", None)
+    if isinstance(sdk_response, httpx.Response):
+        responses = responses + [sdk_response]
+    for response in responses:
+        await response.aclose()
+
+
+async def _close_quietly(client: AsyncHTTPHandler) -> None:
+    """Close a pooled client; one bound to a finished event loop may fail to close cleanly."""
+    try:
+        await client.close()
+    except Exception:
+        pass
+
+
+def _tool_calls(message: Any) -> List[Dict[str, Any]]:
+    """Native tool calls of a completion message as {"name", "arguments"} dicts."""
+    calls = []
+    for call in getattr(message, "tool_calls", None) or []:
+        arguments = call.function.arguments
+        if isinstance(arguments, str):
+            try:
+                arguments = json.loads(arguments or "{}")
+            except json.JSONDecodeError:
+                arguments = {}
+        calls.append({"name": call.function.name, "arguments": arguments})
+    return calls
+
 
 class LLMResponse:
     """LLM response wrapper."""
 
-    def __init__(self, content: str):
+    def __init__(self, content: str, tool_calls: Optional[List[Dict[str, Any]]] = None):
         self.content = content
+        self.tool_calls = tool_calls or []
 
     def __str__(self):
         return self.content
 
 
-def get_llm() -> LLMClient:
-    """Get configured LLM client."""
-    return LLMClient()
+class ResponseCache:
+    """Content-addressed cache of LLM responses.
+
+    Keys are hashes of model, messages and temperature (plus tools or
+    response_format when given). Entries live in an in-memory LRU of
+    max_entries; with a path they are also written to a SQLite file, so
+    later runs can reuse them. Entries older than ttl seconds are ignored.
+    Only successful responses are stored.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_CACHE_SIZE,
+        path: Optional[str] = None,
+        ttl: Optional[float] = DEFAULT_CACHE_TTL,
+    ):
+        self.max_entries = max_entries
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0  # memory and disk hits
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def key(model: str, messages: list, temperature: float, **extra: Any) -> str:
+        """Hash of everything that determines the response."""
+        request = {"model": model, "messages": messages, "temperature": temperature, **extra}
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached response for a key, or None (counted as a miss)."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and not self._expired(entry[0]):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row and not self._expired(row[1]):
+                    response = json.loads(row[0])
+                    self._remember(key, row[1], response)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return response
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        """Store a response in memory (and on disk)."""
+        if str(response.get("content", "")).startswith("LLM error:"):
+            return
+        created = time.time()
+        with self._lock:
+            self._remember(key, created, response)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created) VALUES (?, ?, ?)",
+                    (key, json.dumps(response), created),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, created: float, response: Dict[str, Any]) -> None:
+        self._memory[key] = (created, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._memory),
+        }
+
+    def clear(self) -> None:
+        """Drop every entry (memory and disk)."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+# Shared cache configured from the environment (None when disabled)
+_response_cache: Optional[ResponseCache] = None
+_response_cache_loaded = False
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Shared response cache if LLM_CACHE is set.
+
+    LLM_CACHE_SIZE (memory entries, default 1024), LLM_CACHE_PATH (SQLite
+    file, optional) and LLM_CACHE_TTL (seconds, default one week) configure it.
+    """
+    global _response_cache, _response_cache_loaded
+    with _response_cache_lock:
+        if not _response_cache_loaded:
+            _response_cache_loaded = True
+            if os.getenv("LLM_CACHE", "").lower() in ("1", "true", "yes", "on"):
+                _response_cache = ResponseCache(
+                    max_entries=int(os.getenv("LLM_CACHE_SIZE", DEFAULT_CACHE_SIZE)),
+                    path=os.getenv("LLM_CACHE_PATH") or None,
+                    ttl=float(os.getenv("LLM_CACHE_TTL", DEFAULT_CACHE_TTL)),
+                )
+        return _response_cache
+
+
+# Process-wide registry: one configured client per (provider, model)
+_clients: Dict[Tuple[Optional[str], Optional[str]], LLMClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm(provider: Optional[str] = None, model: Optional[str] = None) -> LLMClient:
+    """Get the shared LLM client for a provider/model (defaults from the environment).
+
+    The client is created on first use; later calls return the same object,
+    so nodes don't re-read settings or reconnect on every call.
+    """
+    key = (provider, model)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = LLMClient(provider=provider, model=model)
+    return client
+
+
+async def aclose_llm_clients() -> None:
+    """Close the pooled connections of all shared clients."""
+    with _clients_lock:
+        clients = list(_clients.values())
+    for client in clients:
+        await client.aclose()
+
+
+def reset_llm_clients() -> None:
+    """Forget all shared clients and the cache (e.g. after changing the LLM environment variables)."""
+    global _response_cache, _response_cache_loaded
+    with _clients_lock:
+        _clients.clear()
+    with _response_cache_lock:
+        if _response_cache is not None:
+            _response_cache.close()
+        _response_cache = None
+        _response_cache_loaded = False
@@ -1,15 +1,75 @@
 """MCP client for calling remote tools."""
 
+import os
+import asyncio
+import itertools
+import threading
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
+DEFAULT_SERVER_URL = "http://localhost:8002/mcp/"
 
-async def call_mcp_tool(tool_name: str, arguments: Dict[str, Any], server_url: str = "http://localhost:8002/mcp/") -> str:
-    """Call a tool on the MCP server."""
-    try:
-        request_data = {
+HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json, text/event-stream"
+}
+
+
+class MCPClient:
+    """Long-lived JSON-RPC client for the MCP tools server.
+
+    Requests share one pooled keep-alive httpx connection (created per event
+    loop) and get unique ids. call_tools() sends several calls as one
+    JSON-RPC batch; servers that reject batches (the MCP spec dropped them
+    in 2025-06-18) get the calls as concurrent single requests instead.
+    """
+
+    def __init__(
+        self,
+        server_url: Optional[str] = None,
+        timeout: float = 30.0,
+        max_connections: int = 10,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.server_url = server_url or os.getenv("MCP_SERVER_URL", DEFAULT_SERVER_URL)
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.transport = transport  # custom httpx transport (tests)
+        self.batch_supported: Optional[bool] = None  # unknown until the first batch
+
+        self._ids = itertools.count(1)
+        self._ids_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _next_id(self) -> int:
+        with self._ids_lock:
+            return next(self._ids)
+
+    async def _http_client(self) -> httpx.AsyncClient:
+        """Pooled HTTP client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            previous = self._client
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                headers=HEADERS,
+                transport=self.transport,
+            )
+            # The client of a previous loop can't be reused, release its connections
+            if previous is not None:
+                await _close_quietly(previous)
+        return self._client
+
+    def _tool_request(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return {
             "jsonrpc": "2.0",
-            "id": 1,
+            "id": self._next_id(),
             "method": "tools/call",
             "params": {
                 "name": tool_name,
@@ -17,21 +77,104 @@ async def call_mcp_tool(tool_name: str, arguments: Dict[str, Any], server_url: s
             }
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                server_url,
-                json=request_data,
-                headers={
-                    "Content-Type": "application/json",
-                    "Accept": "application/json, text/event-stream"
-                }
+    @staticmethod
+    def _tool_text(response: Dict[str, Any]) -> str:
+        """Text of a tools/call response (or its error message)."""
+        if "error" in response:
+            return f"Tool call failed: {response['error'].get('message', response['error'])}"
+        return response["result"]["content"][0]["text"]
+
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> str:
+        """Call a tool on the MCP server."""
+        try:
+            response = await (await self._http_client()).post(
+                self.server_url, json=self._tool_request(tool_name, arguments)
             )
 
             if response.status_code == 200:
-                result = response.json()
-                return result["result"]["content"][0]["text"]
+                return self._tool_text(response.json())
             else:
                 return f"HTTP Error: {response.status_code}"
 
-    except Exception as e:
-        return f"Tool call failed: {str(e)}"
+        except Exception as e:
+            return f"Tool call failed: {str(e)}"
+
+    async def call_tools(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Call several tools at once, results in the order of the calls."""
+        if self.batch_supported is not False and len(calls) > 1:
+            results = await self._call_batch(calls)
+            if results is not None:
+                return results
+
+        return list(await asyncio.gather(*[self.call_tool(name, arguments) for name, arguments in calls]))
+
+    async def _call_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> Optional[List[str]]:
+        """Send one JSON-RPC batch, None if the server doesn't support batches.
+
+        Only a definite rejection (4xx or a JSON-RPC error) counts as "not
+        supported". Other failures are reported per call and not retried,
+        since the server may already have run the tools.
+        """
+        requests = [self._tool_request(name, arguments) for name, arguments in calls]
+        try:
+            response = await (await self._http_client()).post(self.server_url, json=requests)
+            responses = response.json() if response.status_code == 200 else None
+        except Exception as e:
+            return [f"Tool call failed: {str(e)}"] * len(calls)
+
+        rejected = 400 <= response.status_code < 500 or (isinstance(responses, dict) and "error" in responses)
+        if rejected:
+            self.batch_supported = False
+            return None
+        if response.status_code != 200:
+            return [f"HTTP Error: {response.status_code}"] * len(calls)
+        if not isinstance(responses, list):
+            return ["Tool call failed: unexpected batch response"] * len(calls)
+
+        self.batch_supported = True
+        by_id = {item.get("id"): item for item in responses}
+        return [
+            self._tool_text(by_id[request["id"]]) if request["id"] in by_id else "Tool call failed: no response"
+            for request in requests
+        ]
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        client, self._client = self._client, None
+        self._loop = None
+        if client is not None:
+            await _close_quietly(client)
+
+
+async def _close_quietly(client: httpx.AsyncClient) -> None:
+    """Close a client; one bound to a finished event loop may fail to close cleanly."""
+    try:
+        await client.aclose()
+    except Exception:
+        pass
+
+
+# Process-wide clients, one per server URL
+_clients: Dict[Optional[str], MCPClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_mcp_client(server_url: Optional[str] = None) -> MCPClient:
+    """Get the shared MCP client for a server (MCP_SERVER_URL by default)."""
+    with _clients_lock:
+        if server_url not in _clients:
+            _clients[server_url] = MCPClient(server_url)
+        return _clients[server_url]
+
+
+async def aclose_mcp_clients() -> None:
+    """Close the pooled connections of all shared clients."""
+    with _clients_lock:
+        clients = list(_clients.values())
+    for client in clients:
+        await client.aclose()
+
+
+async def call_mcp_tool(tool_name: str, arguments: Dict[str, Any], server_url: Optional[str] = None) -> str:
+    """Call a tool on the MCP server (through the shared client)."""
+    return await get_mcp_client(server_url).call_tool(tool_name, arguments)
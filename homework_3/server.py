@@ -1,10 +1,16 @@
+import argparse
 import asyncio
 import logging
 import os
+import signal
+import sys
 from typing import Any, Callable, Dict, List, Optional
+import time
 import contextlib
 from collections.abc import AsyncIterator
+from types import FrameType
 import uvicorn
+from uvicorn.supervisors import Multiprocess
 
 # MCP
 from mcp.server.lowlevel import Server
@@ -13,13 +19,17 @@ from mcp.server.lowlevel.helper_types import ReadResourceContents
 
 from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
 from starlette.applications import Starlette
-from starlette.routing import Mount
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
 from starlette.types import Receive, Scope, Send
 
 # Import tool implementations
-from tools.calculator import calculate
-from tools.python_repl import execute_python
-from tools.wolfram import wolfram_query
+from tools.cache import ToolResultCache, default_policies
+from tools.calculator import compile_expression, evaluate
+from tools.executor import ToolExecutor
+from tools.python_repl import close_worker_pool, execute_python, get_worker_pool
+from tools.wolfram import aclose_wolfram_client, get_wolfram_client, wolfram_query
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -28,6 +38,24 @@ logger = logging.getLogger(__name__)
 # Create MCP server instance
 server = Server("mcp-tools-server")
 
+# Results of deterministic tools, shared by all sessions
+tool_cache = ToolResultCache(
+    policies=default_policies(wolfram_ttl=float(os.getenv("WOLFRAM_CACHE_TTL", 3600))),
+    max_entries=int(os.getenv("TOOL_CACHE_SIZE", 10_000)),
+)
+
+# Per-tool concurrency limits; blocking tools (calculator) run in a pool so
+# a slow call never stalls the event loop
+tool_executor = ToolExecutor(
+    limits={
+        "calculator": int(os.getenv("CALCULATOR_CONCURRENCY", 8)),
+        "python_repl": int(os.getenv("PYTHON_WORKERS", 2)),
+        "wolfram_alpha": int(os.getenv("WOLFRAM_CONCURRENCY", 4)),
+    },
+    max_workers=int(os.getenv("TOOL_EXECUTOR_WORKERS", 4)),
+    kind=os.getenv("TOOL_EXECUTOR", "thread"),
+)
+
 
 @server.list_tools()
 async def handle_list_tools() -> list[types.Tool]:
@@ -41,8 +69,15 @@ async def handle_list_tools() -> list[types.Tool]:
                 "properties": {
                     "expression": {
                         "type": "string",
-                        "description": "Mathematical expression to evaluate (e.g., '2 + 2', 'sqrt(16)')",
-                    }
+                        "description": "Mathematical expression to evaluate (e.g., '2 + 2', 'sqrt(16)', 'x**2 + 1')",
+                    },
+                    "variables": {
+                        "type": "object",
+                        "description": "Values of variables in the expression; a list of numbers evaluates it for each value",
+                        "additionalProperties": {
+                            "anyOf": [{"type": "number"}, {"type": "array", "items": {"type": "number"}}]
+                        },
+                    },
                 },
                 "required": ["expression"],
             },
@@ -56,7 +91,11 @@ async def handle_list_tools() -> list[types.Tool]:
                     "code": {
                         "type": "string",
                         "description": "Python code to execute",
-                    }
+                    },
+                    "pure": {
+                        "type": "boolean",
+                        "description": "The code is deterministic and side-effect free, so its output may be cached",
+                    },
                 },
                 "required": ["code"],
             },
@@ -82,25 +121,16 @@ async def handle_list_tools() -> list[types.Tool]:
 async def handle_call_tool(
     name: str, arguments: Optional[Dict[str, Any]] = None
 ) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle tool execution requests."""
+    """Handle tool execution requests (answered from tool_cache when possible)."""
     if arguments is None:
         arguments = {}
 
     try:
-        if name == "calculator":
-            result = await calculate(arguments.get("expression", ""))
-            return [types.TextContent(type="text", text=str(result))]
-
-        elif name == "python_repl":
-            output = await execute_python(arguments.get("code", ""))
-            return [types.TextContent(type="text", text=output)]
-
-        elif name == "wolfram_alpha":
-            result = await wolfram_query(arguments.get("query", ""))
-            return [types.TextContent(type="text", text=result)]
-
-        else:
-            raise ValueError(f"Unknown tool: {name}")
+        result = tool_cache.get(name, arguments)
+        if result is None:
+            result = await run_tool(name, arguments)
+            tool_cache.put(name, arguments, result)
+        return [types.TextContent(type="text", text=result)]
 
     except Exception as e:
         error_msg = f"Tool execution error: {str(e)}"
@@ -108,6 +138,34 @@ async def handle_call_tool(
         return [types.TextContent(type="text", text=error_msg)]
 
 
+async def run_tool(name: str, arguments: Dict[str, Any]) -> str:
+    """Run a tool implementation through tool_executor."""
+    if name == "calculator":
+        return await tool_executor.run(
+            name, evaluate, arguments.get("expression", ""), arguments.get("variables"), blocking=True
+        )
+
+    elif name == "python_repl":
+        return await tool_executor.run(name, execute_python, arguments.get("code", ""))
+
+    elif name == "wolfram_alpha":
+        return await tool_executor.run(name, wolfram_query, arguments.get("query", ""))
+
+    else:
+        raise ValueError(f"Unknown tool: {name}")
+
+
+async def handle_metrics(request: Request) -> JSONResponse:
+    """Tool cache, executor queues, python_repl worker pool and Wolfram client metrics."""
+    return JSONResponse({
+        "tool_cache": tool_cache.stats(),
+        "executor": tool_executor.stats(),
+        "calculator_compiled": compile_expression.cache_info()._asdict(),
+        "python_workers": get_worker_pool().stats(),
+        "wolfram": get_wolfram_client().stats(),
+    })
+
+
 # ---------------------------------
 # SSE Server Transport
 # ---------------------------------
@@ -126,30 +184,187 @@ async def handle_streamable_http(scope: Scope, receive: Receive, send: Send) ->
     await session_manager.handle_request(scope, receive, send)
 
 
+# Seconds in-flight tool calls get to finish on shutdown
+DRAIN_TIMEOUT = float(os.getenv("MCP_DRAIN_TIMEOUT", 30))
+
+# Seconds /ready reports "draining" before connections stop being accepted
+READY_GRACE = float(os.getenv("MCP_READY_GRACE", 0))
+
+# Readiness of this worker process: ready after startup, draining from the
+# exit signal on; deadline is when the whole shutdown must be done
+server_state = {"ready": False, "draining": False, "deadline": None}
+
+
+def start_draining(timeout: float) -> None:
+    """Report not ready from now on and fix the shutdown deadline (first call wins)."""
+    if not server_state["draining"]:
+        server_state.update(ready=False, draining=True, deadline=time.monotonic() + timeout)
+
+
+def drain_time_left() -> float:
+    """Seconds left until the shutdown deadline (DRAIN_TIMEOUT if none was set)."""
+    if server_state["deadline"] is None:
+        return DRAIN_TIMEOUT
+    return max(0.0, server_state["deadline"] - time.monotonic())
+
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn server that turns /ready to 503 as soon as SIGTERM/SIGINT arrives.
+
+    The listening socket stays open for `ready_grace` seconds so load
+    balancers can notice, then uvicorn's usual graceful shutdown runs. The
+    grace, uvicorn's wait for open requests and the tool drain share one
+    deadline of `drain_timeout` seconds after the signal. A second Ctrl+C
+    skips the grace (a third forces the exit, as in uvicorn).
+    """
+
+    def __init__(self, config: uvicorn.Config, drain_timeout: float = DRAIN_TIMEOUT, ready_grace: float = READY_GRACE):
+        super().__init__(config)
+        self.drain_timeout = drain_timeout
+        self.ready_grace = ready_grace
+        self._exit_at: Optional[float] = None
+
+    def handle_exit(self, sig: int, frame: Optional[FrameType]) -> None:
+        if self._exit_at is None:
+            # Re-raised by uvicorn after shutdown, like the signals it handles itself
+            self._captured_signals.append(sig)
+            start_draining(self.drain_timeout)
+            self._exit_at = time.monotonic() + min(self.ready_grace, self.drain_timeout)
+        elif sig == signal.SIGINT:
+            # Ctrl+C again; repeated SIGTERMs (the supervisor's) change nothing
+            super().handle_exit(sig, frame)
+
+    async def on_tick(self, counter: int) -> bool:
+        should_exit = await super().on_tick(counter)
+        if not should_exit and self._exit_at is not None and time.monotonic() >= self._exit_at:
+            should_exit = self.should_exit = True
+        if should_exit:
+            # uvicorn waits for open requests with what is left of the deadline
+            self.config.timeout_graceful_shutdown = drain_time_left()
+        return should_exit
+
+
+class DrainingMultiprocess(Multiprocess):
+    """uvicorn's worker supervisor, passing SIGTERM/SIGINT on to the workers right away.
+
+    The stock supervisor only looks at its signals every 0.5 s; workers
+    should start reporting "draining" at once.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self._forward_exit)
+
+    def _forward_exit(self, sig: int, frame: Optional[FrameType]) -> None:
+        self.signal_queue.append(sig)
+        for worker in self.processes:
+            if worker.process.pid is not None and worker.process.exitcode is None:
+                os.kill(worker.process.pid, signal.SIGTERM)
+
+
+async def handle_health(request: Request) -> JSONResponse:
+    """Liveness: the process answers requests."""
+    return JSONResponse({"status": "ok", "pid": os.getpid()})
+
+
+async def handle_ready(request: Request) -> JSONResponse:
+    """Readiness: started and not shutting down (503 otherwise)."""
+    if server_state["draining"]:
+        return JSONResponse({"status": "draining", "in_flight": tool_executor.in_flight()}, status_code=503)
+    if not server_state["ready"]:
+        return JSONResponse({"status": "starting"}, status_code=503)
+    return JSONResponse({"status": "ready", "in_flight": tool_executor.in_flight()})
+
+
 @contextlib.asynccontextmanager
 async def lifespan(app: Starlette) -> AsyncIterator[None]:
     """Context manager for managing session manager lifecycle."""
     async with session_manager.run():
-        print("Application started with StreamableHTTP session manager!")
+        # Warm python_repl interpreters before the first request
+        await get_worker_pool().start()
+        server_state.update(ready=True, draining=False, deadline=None)
+        print(f"Application started with StreamableHTTP session manager! (pid {os.getpid()})")
         try:
             yield
         finally:
             print("Application shutting down...")
+            start_draining(DRAIN_TIMEOUT)
+            # Let running tool calls finish before their pools go away
+            if not await tool_executor.drain(drain_time_left()):
+                logger.warning(f"{tool_executor.in_flight()} tool calls still running at the shutdown deadline")
+            await close_worker_pool()
+            await aclose_wolfram_client()
+            tool_executor.shutdown()
 
 
 starlette_app = Starlette(
-    debug=True,
+    debug=os.getenv("MCP_DEBUG") == "1",
     routes=[
         Mount("/mcp", app=handle_streamable_http),
+        Route("/metrics", handle_metrics),
+        Route("/health", handle_health),
+        Route("/ready", handle_ready),
     ],
     lifespan=lifespan,
 )
 
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP tools server")
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "0.0.0.0"), help="Address to bind")
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_PORT", 8002)), help="Port to bind")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("MCP_WORKERS", 1)),
+        help="Worker processes; each has its own tool pools and caches",
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=float,
+        default=DRAIN_TIMEOUT,
+        help="Seconds from SIGTERM/Ctrl+C until shutdown must be done (open requests and tool calls finish)",
+    )
+    parser.add_argument(
+        "--ready-grace",
+        type=float,
+        default=READY_GRACE,
+        help="Seconds /ready reports draining before new connections are refused (time for a load balancer)",
+    )
+    parser.add_argument("--debug", action="store_true", help="Starlette debug mode (tracebacks in responses)")
+    args = parser.parse_args()
+
+    if args.debug:
+        # Worker processes import the app again and read it from the environment
+        os.environ["MCP_DEBUG"] = "1"
+        starlette_app.debug = True
+
+    print(f"Starting MCP tools server on {args.host}:{args.port} with {args.workers} worker(s)...")
+    # Like uvicorn.run(), with DrainingServer in every worker process
+    config = uvicorn.Config(
+        # Multiple processes need an import string
+        "server:starlette_app" if args.workers > 1 else starlette_app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+    uvicorn_server = DrainingServer(config, drain_timeout=args.graceful_timeout, ready_grace=args.ready_grace)
+    if args.workers > 1:
+        DrainingMultiprocess(config, target=uvicorn_server.run, sockets=[config.bind_socket()]).run()
+    else:
+        uvicorn_server.run()
+
+
 if __name__ == "__main__":
+    # Run main() of the importable `server` module, so the app, its
+    # server_state and DrainingServer are the same objects in every process
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from server import main as server_main
+
     try:
-        print("Starting MCP tools server...")
-        # Run the server
-        uvicorn.run(starlette_app, host="0.0.0.0", port=8002)
+        server_main()
     except KeyboardInterrupt:
         print("Server stopped by user.")
     except Exception as e:
@@ -0,0 +1,59 @@
+import pytest
+
+from tools.calculator import compile_expression, evaluate
+
+
+def test_arithmetic_and_functions():
+    assert evaluate("2 + 2") == "Result: 4"
+    assert evaluate("sqrt(16)") == "Result: 4.0"
+    assert evaluate("2 ** 10 // 3 % 7") == "Result: 5"
+    assert evaluate("-max(1, 5) + sum([1, 2, 3])") == "Result: 1"
+    assert evaluate("log(8, 2)") == "Result: 3.0"
+    assert evaluate("round(pi * 2, 3)") == "Result: 6.283"
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os').system('echo hi')",
+    "().__class__.__bases__",
+    "(lambda: 1)()",
+    "[1, 2] * 10",
+    "'a' * 10",
+    "x[0]",
+    "open('/etc/passwd')",
+    "sqrt",
+    "sin(x=1)",
+])
+def test_anything_outside_the_whitelist_is_rejected(expression):
+    assert evaluate(expression, {"x": 1}).startswith("Calculation error:")
+
+
+def test_huge_integer_powers_are_refused():
+    assert "too large" in evaluate("9 ** 9 ** 9")
+    assert "too large" in evaluate("pow(10, 10 ** 7)")
+    assert evaluate("pow(3, 10 ** 9, 7)") == f"Result: {pow(3, 10 ** 9, 7)}"
+
+
+def test_compiled_expressions_are_cached_by_text():
+    compile_expression.cache_clear()
+    evaluate("x * 3 + 1", {"x": 1})
+    evaluate("x * 3 + 1", {"x": 2})
+
+    info = compile_expression.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+    assert compile_expression("x * 3 + 1")(x=5) == 16
+
+
+def test_variables():
+    assert evaluate("a * b", {"a": 3, "b": 4.5}) == "Result: 13.5"
+    assert evaluate("y + 1") == "Calculation error: name 'y' is not defined"
+    assert evaluate("x * 3", {"x": "aa"}).startswith("Calculation error: Variable 'x'")
+
+
+def test_vectorized_evaluation_over_lists():
+    assert evaluate("x ** 2 + 1", {"x": [1, 2, 3]}) == "Result: [2.0, 5.0, 10.0]"
+    assert evaluate("max(x, 2) + abs(-x)", {"x": [1, 3]}) == "Result: [3.0, 6.0]"
+    assert evaluate("log(x, 2)", {"x": [8, 16]}) == "Result: [3.0, 4.0]"
+
+    sweep = evaluate("sin(x) ** 2 + cos(x) ** 2", {"x": list(range(10_000))})
+    assert "10000 values" in sweep
+    assert "min 1, max 1, mean 1" in sweep
@@ -0,0 +1,341 @@
+import asyncio
+import json
+import threading
+import time
+from contextlib import aclosing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import litellm
+import pytest
+
+from math_agent.utils.llm import LLMClient, ResponseCache, get_llm, get_response_cache, reset_llm_clients
+
+
+def completion_response(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "ollama")
+    monkeypatch.setenv("OLLAMA_BASE_URL", "http://ollama.test:11434")
+    monkeypatch.delenv("LLM_CACHE", raising=False)
+    reset_llm_clients()
+    yield
+    reset_llm_clients()
+
+
+def test_get_llm_returns_shared_client():
+    client = get_llm()
+
+    assert get_llm() is client
+    assert get_llm(model="ollama/other") is not client
+    assert get_llm(model="ollama/other") is get_llm(model="ollama/other")
+
+
+def test_api_base_is_passed_per_request(monkeypatch):
+    monkeypatch.setattr(litellm, "api_base", None)
+    calls = []
+
+    def completion(**kwargs):
+        calls.append(kwargs)
+        return completion_response("hi")
+
+    monkeypatch.setattr(litellm, "completion", completion)
+
+    assert get_llm().invoke("hello", "system").content == "hi"
+    assert litellm.api_base is None
+    assert calls[0]["api_base"] == "http://ollama.test:11434"
+    assert calls[0]["client"] is get_llm()._http_client
+    assert [m["role"] for m in calls[0]["messages"]] == ["system", "user"]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit(monkeypatch):
+    in_flight = 0
+    peak = 0
+    clients = set()
+
+    async def acompletion(**kwargs):
+        nonlocal in_flight, peak
+        clients.add(id(kwargs["client"]))
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return completion_response("ok")
+
+    monkeypatch.setattr(litellm, "acompletion", acompletion)
+    client = LLMClient(max_concurrency=3)
+
+    responses = await asyncio.gather(*[client.ainvoke("q") for _ in range(12)])
+
+    assert [r.content for r in responses] == ["ok"] * 12
+    assert peak == 3
+    assert len(clients) == 1  # one pooled HTTP client for all requests
+
+
+def test_errors_become_fallback_responses(monkeypatch):
+    def completion(**kwargs):
+        raise RuntimeError("connection refused")
+
+    monkeypatch.setattr(litellm, "completion", completion)
+
+    assert get_llm().invoke("q").content == "LLM error: connection refused"
+
+
+def test_timeout_applies_to_every_provider(monkeypatch):
+    calls = []
+
+    def completion(**kwargs):
+        calls.append(kwargs)
+        return completion_response("hi")
+
+    monkeypatch.setattr(litellm, "completion", completion)
+
+    LLMClient(provider="gemini", timeout=7).invoke("q")
+    LLMClient(provider="openai", timeout=9).invoke("q")
+
+    assert [call["timeout"] for call in calls] == [7, 9]
+    assert "client" not in calls[0]
+
+
+def test_pooled_client_of_previous_loop_is_closed(monkeypatch):
+    async def acompletion(**kwargs):
+        return completion_response("ok")
+
+    monkeypatch.setattr(litellm, "acompletion", acompletion)
+    client = LLMClient()
+
+    asyncio.run(client.ainvoke("q"))
+    first = client._async_http_client
+    asyncio.run(client.ainvoke("q"))
+
+    assert client._async_http_client is not first
+    assert first.client.is_closed
+
+    asyncio.run(client.aclose())
+    assert client._async_http_client is None
+
+
+async def chunked_stream(content, sent=None):
+    for i in range(0, len(content), 3):
+        if sent is not None:
+            sent.append(content[i : i + 3])
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i : i + 3]))])
+
+
+def chunked_acompletion(content, sent):
+    async def acompletion(**kwargs):
+        assert kwargs["stream"] is True
+        return chunked_stream(content, sent)
+
+    return acompletion
+
+
+@pytest.mark.asyncio
+async def test_astream_yields_chunks(monkeypatch):
+    sent = []
+    monkeypatch.setattr(litellm, "acompletion", chunked_acompletion("streamed reply", sent))
+
+    tokens = [token async for token in get_llm().astream("q")]
+
+    assert tokens == ["str", "eam", "ed ", "rep", "ly"]
+
+
+@pytest.mark.asyncio
+async def test_astream_stops_reading_when_closed(monkeypatch):
+    sent = []
+    monkeypatch.setattr(litellm, "acompletion", chunked_acompletion("x" * 300, sent))
+
+    stream = get_llm().astream("q")
+    async for token in stream:
+        break
+    await stream.aclose()
+
+    assert len(sent) == 1
+
+
+@pytest.mark.asyncio
+async def test_astream_errors_become_fallback_text(monkeypatch):
+    async def acompletion(**kwargs):
+        raise RuntimeError("connection refused")
+
+    monkeypatch.setattr(litellm, "acompletion", acompletion)
+
+    assert [token async for token in get_llm().astream("q")] == ["LLM error: connection refused"]
+
+
+@pytest.mark.asyncio
+async def test_ainvoke_returns_native_tool_calls(monkeypatch):
+    seen = {}
+
+    async def acompletion(**kwargs):
+        seen.update(kwargs)
+        function = SimpleNamespace(name="calculator", arguments='{"expression": "1 + 1"}')
+        message = SimpleNamespace(content=None, tool_calls=[SimpleNamespace(function=function)])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    monkeypatch.setattr(litellm, "acompletion", acompletion)
+
+    response = await get_llm().ainvoke("q", tools=[{"type": "function"}])
+
+    assert response.content == ""
+    assert response.tool_calls == [{"name": "calculator", "arguments": {"expression": "1 + 1"}}]
+    assert seen["tools"] == [{"type": "function"}]
+    assert "response_format" not in seen
+
+
+def test_response_cache_lru_and_counters():
+    cache = ResponseCache(max_entries=2)
+    keys = [ResponseCache.key("m", [{"role": "user", "content": str(i)}], 0.1) for i in range(3)]
+
+    cache.put(keys[0], {"content": "0"})
+    cache.put(keys[1], {"content": "1"})
+    assert cache.get(keys[0]) == {"content": "0"}  # keys[0] is now the most recent
+    cache.put(keys[2], {"content": "2"})
+
+    assert cache.get(keys[1]) is None  # evicted
+    assert cache.get(keys[2]) == {"content": "2"}
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+    assert ResponseCache.key("m", [], 0.1) != ResponseCache.key("m", [], 0.2)
+    assert ResponseCache.key("m", [], 0.1) != ResponseCache.key("other", [], 0.1)
+
+
+def test_response_cache_sqlite_tier_and_ttl(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache" / "llm.sqlite")
+    ResponseCache(path=path).put("key", {"content": "stored", "tool_calls": []})
+
+    # A new process only has the disk tier
+    cache = ResponseCache(path=path, ttl=60)
+    assert cache.get("key") == {"content": "stored", "tool_calls": []}
+    assert cache.stats()["disk_hits"] == 1
+
+    later = time.time() + 120
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert ResponseCache(path=path, ttl=60).get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_cached_client_skips_the_model(monkeypatch):
+    calls = []
+
+    async def acompletion(**kwargs):
+        calls.append(kwargs)
+        if kwargs.get("stream"):
+            return chunked_stream("streamed")
+        return completion_response("answer")
+
+    monkeypatch.setattr(litellm, "acompletion", acompletion)
+    client = LLMClient(cache=ResponseCache())
+
+    assert (await client.ainvoke("q", "system")).content == "answer"
+    assert (await client.ainvoke("q", "system")).content == "answer"
+    assert (await client.ainvoke("q", "other system")).content == "answer"
+    assert len(calls) == 2
+
+    assert [t async for t in client.astream("s")] == ["str", "eam", "ed"]
+    assert [t async for t in client.astream("s")] == ["streamed"]
+    assert len(calls) == 3
+    assert client.cache.stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached(monkeypatch):
+    async def failing(**kwargs):
+        raise RuntimeError("connection refused")
+
+    monkeypatch.setattr(litellm, "acompletion", failing)
+    client = LLMClient(cache=ResponseCache())
+    assert (await client.ainvoke("q")).content.startswith("LLM error")
+    assert [t async for t in client.astream("q")] == ["LLM error: connection refused"]
+
+    assert client.cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_stopped_early_caches_what_was_read(monkeypatch):
+    sent = []
+    monkeypatch.setattr(litellm, "acompletion", chunked_acompletion("abcdefghi" + "x" * 30, sent))
+    client = LLMClient(cache=ResponseCache())
+
+    stream = client.astream("q")
+    read = []
+    async for token in stream:
+        read.append(token)
+        if len(read) == 3:
+            break
+    await stream.aclose()
+
+    assert [t async for t in client.astream("q")] == ["".join(read)] == ["abcdefghi"]
+    assert len(sent) == 3
+
+
+def test_cache_is_configured_from_the_environment(monkeypatch, tmp_path):
+    assert get_llm().cache is None
+
+    monkeypatch.setenv("LLM_CACHE", "1")
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "llm.sqlite"))
+    reset_llm_clients()
+
+    cache = get_llm().cache
+    assert cache is get_response_cache() is get_llm(model="ollama/other").cache
+    assert cache.path == str(tmp_path / "llm.sqlite")
+
+
+class StubOllama(BaseHTTPRequestHandler):
+    """Streams a long /api/generate reply line by line; `sent` counts the lines written."""
+
+    protocol_version = "HTTP/1.1"
+    sent = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i in range(200):
+                line = json.dumps({"model": "stub", "response": f"t{i} ", "done": False}).encode() + b"\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+                type(self).sent += 1
+                time.sleep(0.01)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_closing_astream_closes_the_ollama_response(monkeypatch):
+    streams = []
+    acompletion = litellm.acompletion
+
+    async def keep_stream(**kwargs):
+        # Keep the stream referenced, so garbage collection can't close it for us
+        streams.append(await acompletion(**kwargs))
+        return streams[-1]
+
+    monkeypatch.setattr(litellm, "acompletion", keep_stream)
+    StubOllama.sent = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubOllama)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    client = LLMClient(provider="ollama", model="ollama/stub", api_base=f"http://127.0.0.1:{httpd.server_port}")
+    try:
+        async with aclosing(client.astream("q")) as tokens:
+            async for token in tokens:
+                assert token == "t0 "
+                break
+        await asyncio.sleep(0.5)
+
+        # The server saw the connection go away instead of sending all 200 lines
+        assert StubOllama.sent < 20
+    finally:
+        await client.aclose()
+        httpd.shutdown()
+        httpd.server_close()
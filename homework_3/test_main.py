@@ -0,0 +1,245 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import litellm
+import pytest
+
+import main
+from math_agent.utils.llm import LLMClient, reset_llm_clients
+
+
+def fake_acompletion(reply, requests, delay=0.0):
+    """litellm.acompletion stand-in: reply(prompt) is returned whole or in chunks with stream=True."""
+
+    async def acompletion(**kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        requests.append({"prompt": prompt, "stream": kwargs.get("stream", False), **kwargs})
+        await asyncio.sleep(delay)
+        content = reply(prompt)
+
+        if not kwargs.get("stream"):
+            # Replies that aren't text are complete messages (e.g. with tool_calls)
+            message = SimpleNamespace(content=content, tool_calls=None) if isinstance(content, str) else content
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+        async def chunks():
+            for i in range(0, len(content), 4):
+                requests[-1]["chunks_sent"] = i // 4 + 1
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i : i + 4]))])
+
+        return chunks()
+
+    return acompletion
+
+
+@pytest.fixture(autouse=True)
+def fresh_llm_clients(monkeypatch):
+    monkeypatch.delenv("LLM_CACHE", raising=False)
+    reset_llm_clients()
+    yield
+    reset_llm_clients()
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Answer every prompt directly, after a short simulated model latency."""
+    calls = []
+
+    def invoke(self, message, system_prompt=None):
+        raise AssertionError("nodes must not block the event loop with the sync client")
+
+    reply = lambda prompt: f"FINAL_ANSWER: solved {prompt.removeprefix('Problem: ')}"
+    monkeypatch.setattr(litellm, "acompletion", fake_acompletion(reply, calls, delay=0.2))
+    monkeypatch.setattr(LLMClient, "invoke", invoke)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_solve_problem_returns_final_answer(fake_llm):
+    answer = await main.solve_problem("Solve: 3x + 7 = 22", verbose=False)
+
+    assert answer == "solved Solve: 3x + 7 = 22"
+    assert len(fake_llm) == 1
+
+
+@pytest.mark.asyncio
+async def test_solve_batch_runs_problems_concurrently(tmp_path, fake_llm):
+    problems = tmp_path / "problems.jsonl"
+    with open(problems, "w") as f:
+        for i in range(8):
+            f.write(json.dumps({"id": f"p{i}", "problem": f"problem {i}"}) + "\n")
+        f.write(json.dumps("plain string problem") + "\n")
+    output = tmp_path / "answers.jsonl"
+
+    start = time.perf_counter()
+    results = await main.solve_batch(str(problems), str(output), concurrency=9)
+    elapsed = time.perf_counter() - start
+
+    # 9 sequential runs would take 9 * 0.2s
+    assert elapsed < 1.2
+    written = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(written) == len(results) == 9
+    answers = {r["id"]: r["answer"] for r in written}
+    assert answers["p3"] == "solved problem 3"
+    assert answers[9] == "solved plain string problem"
+    assert all(r["latency"] >= 0.2 for r in written)
+
+
+def test_load_problems_skips_blank_lines(tmp_path):
+    path = tmp_path / "problems.jsonl"
+    path.write_text('{"problem": "a"}\n\n{"problem": "b", "id": "x"}\n')
+
+    assert main.load_problems(str(path)) == [{"problem": "a", "id": 1}, {"problem": "b", "id": "x"}]
+
+
+def replies_in_order(*replies):
+    remaining = iter(replies)
+    return lambda prompt: next(remaining)
+
+
+@pytest.fixture
+def fake_tools(monkeypatch):
+    tool_calls = []
+
+    async def call_tool(tool_name, arguments):
+        tool_calls.append((tool_name, arguments))
+        return "Result: 4"
+
+    monkeypatch.setattr("math_agent.nodes.action_node.call_mcp_tool", call_tool)
+    return tool_calls
+
+
+@pytest.mark.asyncio
+async def test_tool_call_iteration(monkeypatch, fake_tools):
+    """reasoning -> parsing -> action -> reasoning with async LLM and tool calls."""
+    requests = []
+    reply = replies_in_order(
+        "I should add the numbers with a bit of Python code.",
+        "TOOL: python_repl\nQUERY: print(2 + 2)",
+        "FINAL_ANSWER: 4",
+    )
+    monkeypatch.setattr(litellm, "acompletion", fake_acompletion(reply, requests))
+
+    answer = await main.solve_problem("What is 2 + 2?", verbose=False)
+
+    assert answer == "4"
+    assert fake_tools == [("python_repl", {"code": "print(2 + 2)"})]
+    # No call the deterministic parser understands: the LLM parser is the fallback
+    assert [r["stream"] for r in requests] == [True, False, True]
+
+
+@pytest.mark.asyncio
+async def test_reasoning_tokens_are_streamed(monkeypatch, fake_tools):
+    reply = replies_in_order("Let me think.\nI will use calculator with query: 2 + 2", "FINAL_ANSWER: 4")
+    monkeypatch.setattr(litellm, "acompletion", fake_acompletion(reply, []))
+
+    tokens = []
+    async for mode, event in main.get_graph().astream(
+        main.create_initial_state("What is 2 + 2?"), stream_mode=["updates", "custom"]
+    ):
+        if mode == "custom":
+            tokens.append(event)
+
+    first_step = "".join(t["reasoning_token"] for t in tokens if t["iteration"] == 1)
+    assert first_step == "Let me think.\nI will use calculator with query: 2 + 2"
+    assert all(len(t["reasoning_token"]) <= 4 for t in tokens)
+    assert {t["iteration"] for t in tokens} == {1, 2}
+
+
+@pytest.mark.asyncio
+async def test_complete_tool_call_stops_stream_and_skips_parser_llm(monkeypatch, fake_tools):
+    requests = []
+    tool_call = "I need to add the numbers.\nI will use calculator with query: 2 + 2\n"
+    long_tail = " More reasoning that nobody needs to wait for." * 20
+    reply = replies_in_order(tool_call + long_tail, "FINAL_ANSWER: 4")
+    monkeypatch.setattr(litellm, "acompletion", fake_acompletion(reply, requests))
+
+    answer = await main.solve_problem("What is 2 + 2?", verbose=False)
+
+    assert answer == "4"
+    assert fake_tools == [("calculator", {"expression": "2 + 2"})]
+    # Only the two reasoning calls, and the first stopped right after the tool call line
+    assert len(requests) == 2
+    assert requests[0]["chunks_sent"] * 4 < len(tool_call) + 8
+
+
+@pytest.mark.asyncio
+async def test_verbose_output_prints_streamed_reasoning(monkeypatch, fake_tools, capsys):
+    reply = replies_in_order("FINAL_ANSWER: 4")
+    monkeypatch.setattr(litellm, "acompletion", fake_acompletion(reply, []))
+
+    await main.solve_problem("What is 2 + 2?")
+
+    assert "🧠 Reasoning (step 1): FINAL_ANSWER: 4\n" in capsys.readouterr().out
+
+
+def tool_call_message(name, arguments):
+    function = SimpleNamespace(name=name, arguments=json.dumps(arguments))
+    return SimpleNamespace(content="Let me compute it.", tool_calls=[SimpleNamespace(function=function)])
+
+
+@pytest.mark.asyncio
+async def test_native_tool_calling_needs_one_llm_call_per_iteration(monkeypatch, fake_tools):
+    monkeypatch.setenv("REASONING_MODE", "tools")
+    requests = []
+    reply = replies_in_order(tool_call_message("calculator", {"expression": "2 + 2"}), "FINAL_ANSWER: 4")
+    monkeypatch.setattr(litellm, "acompletion", fake_acompletion(reply, requests))
+
+    answer = await main.solve_problem("What is 2 + 2?", verbose=False)
+
+    assert answer == "4"
+    assert fake_tools == [("calculator", {"expression": "2 + 2"})]
+    assert len(requests) == 2
+    assert [tool["function"]["name"] for tool in requests[0]["tools"]] == ["wolfram_alpha", "calculator", "python_repl"]
+
+
+@pytest.mark.asyncio
+async def test_json_mode_needs_one_llm_call_per_iteration(monkeypatch, fake_tools):
+    monkeypatch.setenv("REASONING_MODE", "json")
+    requests = []
+    reply = replies_in_order(
+        json.dumps({"thought": "Add them.", "tool": "python_repl", "query": "print(2 + 2)", "final_answer": None}),
+        json.dumps({"thought": "Done.", "tool": None, "query": None, "final_answer": "4"}),
+    )
+    monkeypatch.setattr(litellm, "acompletion", fake_acompletion(reply, requests))
+
+    answer = await main.solve_problem("What is 2 + 2?", verbose=False)
+
+    assert answer == "4"
+    assert fake_tools == [("python_repl", {"code": "print(2 + 2)"})]
+    assert len(requests) == 2
+    assert requests[0]["response_format"]["type"] == "json_schema"
+
+
+@pytest.mark.asyncio
+async def test_batch_repeats_are_served_from_the_llm_cache(tmp_path, monkeypatch, fake_llm):
+    monkeypatch.setenv("LLM_CACHE", "1")
+    reset_llm_clients()
+    problems = tmp_path / "problems.jsonl"
+    problems.write_text("\n".join(json.dumps(p) for p in ["same problem", "other problem"]) + "\n")
+
+    await main.solve_batch(str(problems), str(tmp_path / "first.jsonl"))
+    results = await main.solve_batch(str(problems), str(tmp_path / "second.jsonl"))
+
+    assert len(fake_llm) == 2  # the second run never reached the model
+    assert sorted(r["answer"] for r in results) == ["solved other problem", "solved same problem"]
+
+
+@pytest.mark.asyncio
+async def test_repeated_tool_call_step_is_served_from_the_llm_cache(monkeypatch, fake_tools):
+    monkeypatch.setenv("LLM_CACHE", "1")
+    reset_llm_clients()
+    requests = []
+    tool_call = "I need to add the numbers.\nI will use calculator with query: 2 + 2\n"
+    long_tail = " More reasoning that nobody needs to wait for." * 20
+    reply = lambda prompt: "FINAL_ANSWER: 4" if "Result: 4" in prompt else tool_call + long_tail
+    monkeypatch.setattr(litellm, "acompletion", fake_acompletion(reply, requests))
+
+    assert await main.solve_problem("What is 2 + 2?", verbose=False) == "4"
+    assert await main.solve_problem("What is 2 + 2?", verbose=False) == "4"
+
+    # The stopped-early tool call step was cached like the final one
+    assert len(requests) == 2
+    assert fake_tools == [("calculator", {"expression": "2 + 2"})] * 2
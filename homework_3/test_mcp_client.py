@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import httpx
+
+from math_agent.utils.mcp_client import MCPClient, get_mcp_client
+
+
+def tool_response(request, text):
+    return {"jsonrpc": "2.0", "id": request["id"], "result": {"content": [{"type": "text", "text": text}]}}
+
+
+def echo_server(seen, batches=False):
+    """Mock MCP server answering tools/call with the tool's arguments."""
+
+    def handler(request):
+        payload = json.loads(request.content)
+        seen.append(payload)
+        if isinstance(payload, list):
+            if not batches:
+                return httpx.Response(400, json={"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}})
+            return httpx.Response(200, json=[tool_response(r, json.dumps(r["params"]["arguments"])) for r in reversed(payload)])
+        return httpx.Response(200, json=tool_response(payload, json.dumps(payload["params"]["arguments"])))
+
+    return httpx.MockTransport(handler)
+
+
+def test_request_ids_are_unique():
+    seen = []
+    client = MCPClient("http://mcp.test/mcp/", transport=echo_server(seen))
+
+    async def run():
+        return await asyncio.gather(*[client.call_tool("calculator", {"expression": str(i)}) for i in range(5)])
+
+    results = asyncio.run(run())
+
+    assert results == [json.dumps({"expression": str(i)}) for i in range(5)]
+    assert len({payload["id"] for payload in seen}) == 5
+
+
+def test_http_client_is_reused():
+    client = MCPClient("http://mcp.test/mcp/", transport=echo_server([]))
+
+    async def run():
+        await client.call_tool("calculator", {"expression": "1"})
+        first = client._client
+        await client.call_tool("calculator", {"expression": "2"})
+        return first, client._client
+
+    first, second = asyncio.run(run())
+    assert first is second
+
+
+def test_batch_results_follow_call_order():
+    seen = []
+    client = MCPClient("http://mcp.test/mcp/", transport=echo_server(seen, batches=True))
+    calls = [("calculator", {"expression": "1+1"}), ("python_repl", {"code": "print(2)"})]
+
+    results = asyncio.run(client.call_tools(calls))
+
+    assert results == [json.dumps(arguments) for _, arguments in calls]
+    assert len(seen) == 1 and client.batch_supported
+
+
+def test_batch_falls_back_to_single_requests():
+    seen = []
+    client = MCPClient("http://mcp.test/mcp/", transport=echo_server(seen))
+    calls = [("calculator", {"expression": "1+1"}), ("calculator", {"expression": "2+2"})]
+
+    assert asyncio.run(client.call_tools(calls)) == [json.dumps(arguments) for _, arguments in calls]
+    assert client.batch_supported is False
+
+    # The server rejected batches once, later calls go straight to single requests
+    seen.clear()
+    asyncio.run(client.call_tools(calls))
+    assert all(isinstance(payload, dict) for payload in seen)
+
+
+def test_batch_transport_errors_are_not_retried():
+    seen = []
+
+    def handler(request):
+        seen.append(json.loads(request.content))
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    client = MCPClient("http://mcp.test/mcp/", transport=httpx.MockTransport(handler))
+    calls = [("python_repl", {"code": "print(1)"}), ("calculator", {"expression": "1+1"})]
+
+    results = asyncio.run(client.call_tools(calls))
+
+    assert results == ["Tool call failed: timed out"] * 2
+    assert len(seen) == 1  # the tools may have run, no second attempt
+    assert client.batch_supported is None
+
+
+def test_client_of_previous_loop_is_closed():
+    client = MCPClient("http://mcp.test/mcp/", transport=echo_server([]))
+
+    asyncio.run(client.call_tool("calculator", {"expression": "1"}))
+    first = client._client
+    asyncio.run(client.call_tool("calculator", {"expression": "2"}))
+
+    assert client._client is not first
+    assert first.is_closed
+    asyncio.run(client.aclose())
+    assert client._client is None
+
+
+def test_get_mcp_client_is_shared():
+    assert get_mcp_client() is get_mcp_client()
@@ -0,0 +1,55 @@
+from math_agent.nodes.parsing_node import find_tool_call, parse_json_step, parse_tool_call
+
+
+def test_one_line_calls_are_found_once_their_line_ends():
+    text = "I will use calculator with query: 2 + 2"
+
+    assert find_tool_call(text) is None  # the query may still be growing
+    assert find_tool_call(text + "\n") == ("calculator", "2 + 2")
+    assert find_tool_call(text, finished=True) == ("calculator", "2 + 2")
+
+
+def test_call_formats():
+    assert find_tool_call("TOOL: wolfram_alpha\nQUERY: integrate x^2\n") == ("wolfram_alpha", "integrate x^2")
+    assert find_tool_call("I will use `calculator` with query: \"120 / 2\".\n") == ("calculator", "120 / 2")
+    assert find_tool_call("I will use Wolfram_Alpha with query: [speed of light]\n") == (
+        "wolfram_alpha",
+        "speed of light",
+    )
+
+
+def test_calls_left_to_the_llm_parser():
+    # python_repl code can span lines, a final answer ends the run
+    assert find_tool_call("I will use python_repl with query: import math\nprint(math.pi)\n") is None
+    assert find_tool_call("I will use calculator with query: 2 + 2\nFINAL_ANSWER: 4\n") is None
+    assert find_tool_call("I will use calculator with query:\n", finished=True) is None
+
+
+def test_fast_path_parses_well_formed_reasoning():
+    assert parse_tool_call("I will use calculator with query: 60 * 2") == ("calculator", "60 * 2")
+    assert parse_tool_call('{"tool": "wolfram_alpha", "query": "range of a projectile"}') == (
+        "wolfram_alpha",
+        "range of a projectile",
+    )
+    assert parse_tool_call('{"name": "calculator", "arguments": {"expression": "1+1"}}') == ("calculator", "1+1")
+    assert parse_tool_call("I will use python_repl with query: print(3 ** 2)") == ("python_repl", "print(3 ** 2)")
+    assert parse_tool_call(
+        "I will use python_repl with query:\n```python\nimport math\nprint(math.pi)\n```\nThat gives pi."
+    ) == ("python_repl", "import math\nprint(math.pi)")
+
+
+def test_fast_path_leaves_unclear_reasoning_to_the_llm():
+    assert parse_tool_call("I should compute this with Python.") is None
+    assert parse_tool_call("I will use python_repl with query: import math\nprint(math.pi)") is None
+    assert parse_tool_call("FINAL_ANSWER: 4") is None
+    assert parse_tool_call('{"tool": null, "final_answer": "4"}') is None
+
+
+def test_parse_json_step():
+    assert parse_json_step('```json\n{"tool": "calculator", "query": "1+1"}\n```') == {
+        "tool": "calculator",
+        "query": "1+1",
+    }
+    assert parse_json_step("no json here") is None
+    assert parse_tool_call("{}") is None
+    assert parse_json_step("{broken") is None
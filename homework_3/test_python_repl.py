@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from tools.python_repl import PythonWorkerPool, close_worker_pool, execute_python
+
+
+@pytest_asyncio.fixture
+async def pool():
+    pool = PythonWorkerPool(size=2, max_runs=3, timeout=2)
+    await pool.start()
+    yield pool
+    await pool.close()
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def shared_pool():
+    yield
+    await close_worker_pool()
+
+
+@pytest.mark.asyncio
+async def test_execute_python_output_and_errors():
+    assert await execute_python("print(6 * 7)") == "42\n"
+    assert await execute_python("x = 1") == "Code executed successfully (no output)"
+    assert await execute_python("import sys; sys.exit(3)") == "Process exited with code 3"
+
+    error = await execute_python("print('before'); 1 / 0")
+    assert error.startswith("before\n\nSTDERR:\nTraceback")
+    assert "ZeroDivisionError" in error
+
+
+@pytest.mark.asyncio
+async def test_snippets_get_a_fresh_namespace_and_cannot_break_the_protocol():
+    await execute_python("secret = 1")
+    assert "NameError" in await execute_python("print(secret)")
+    assert "EOFError" in await execute_python("input()")
+    assert await execute_python("import os; os.write(1, b'noise\\n'); print('ok')") == "ok\n"
+
+
+@pytest.mark.asyncio
+async def test_workers_are_reused_and_recycled_after_max_runs(pool):
+    pids = [(await pool.run("import os; print(os.getpid())"))["stdout"] for _ in range(3)]
+    assert len(set(pids)) == 1
+    assert pool.recycled == 1
+
+    await asyncio.sleep(0.01)
+    while pool._starting:
+        await asyncio.sleep(0.05)
+    assert (await pool.run("import os; print(os.getpid())"))["stdout"] != pids[0]
+
+
+@pytest.mark.asyncio
+async def test_timeout_kills_the_worker(pool):
+    pool.timeout = 0.5
+    with pytest.raises(asyncio.TimeoutError):
+        await pool.run("while True: pass")
+    assert pool.stats()["timeouts"] == 1
+
+    pool.timeout = 5
+    assert (await pool.run("print('still works')"))["stdout"] == "still works\n"
+
+
+@pytest.mark.asyncio
+async def test_pool_runs_snippets_in_parallel(pool):
+    started = asyncio.get_running_loop().time()
+    results = await asyncio.gather(*(pool.run("import time; time.sleep(0.5); print('done')") for _ in range(2)))
+
+    assert [r["stdout"] for r in results] == ["done\n", "done\n"]
+    assert asyncio.get_running_loop().time() - started < 0.9
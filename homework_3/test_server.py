@@ -0,0 +1,227 @@
+import asyncio
+import os
+import signal
+import time
+
+import httpx
+import pytest
+import uvicorn
+from starlette.testclient import TestClient
+
+import server
+from tools.cache import CachePolicy, ToolResultCache, default_policies
+from tools.executor import ToolExecutor
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    cache = ToolResultCache()
+    monkeypatch.setattr(server, "tool_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def counted_tools(monkeypatch):
+    calls = []
+
+    async def run_tool(name, arguments):
+        calls.append(name)
+        return f"{name} result {len(calls)}"
+
+    monkeypatch.setattr(server, "run_tool", run_tool)
+    return calls
+
+
+async def call(name, arguments):
+    return (await server.handle_call_tool(name, arguments))[0].text
+
+
+@pytest.mark.asyncio
+async def test_calculator_results_are_cached(fresh_cache, counted_tools):
+    first = await call("calculator", {"expression": "2 + 2"})
+
+    assert await call("calculator", {"expression": "2 + 2"}) == first
+    assert await call("calculator", {"expression": "2 + 3"}) != first
+    assert counted_tools == ["calculator", "calculator"]
+    assert fresh_cache.stats()["tools"]["calculator"] == {"hits": 1, "misses": 2, "evictions": 0, "expirations": 0}
+
+
+@pytest.mark.asyncio
+async def test_python_repl_is_only_cached_when_pure(fresh_cache, counted_tools):
+    await call("python_repl", {"code": "print(1)"})
+    await call("python_repl", {"code": "print(1)"})
+    assert len(counted_tools) == 2
+
+    await call("python_repl", {"code": "print(1)", "pure": True})
+    await call("python_repl", {"code": "print(1)", "pure": True})
+    assert len(counted_tools) == 3
+
+
+def test_wolfram_results_expire_and_errors_are_not_cached(monkeypatch):
+    cache = ToolResultCache(policies=default_policies(wolfram_ttl=10))
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+
+    cache.put("wolfram_alpha", {"query": "q"}, "Wolfram Alpha result for 'q': 42")
+    cache.put("wolfram_alpha", {"query": "down"}, "Error: Wolfram Alpha query timed out")
+    assert cache.get("wolfram_alpha", {"query": "q"}).endswith("42")
+    assert cache.get("wolfram_alpha", {"query": "down"}) is None
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert cache.get("wolfram_alpha", {"query": "q"}) is None
+    assert cache.stats()["tools"]["wolfram_alpha"]["expirations"] == 1
+
+
+def test_lru_eviction_by_entries_and_size():
+    cache = ToolResultCache(policies={"tool": CachePolicy()}, max_entries=2, max_chars=10)
+
+    cache.put("tool", {"x": 1}, "aaa")
+    cache.put("tool", {"x": 2}, "bbb")
+    cache.get("tool", {"x": 1})
+    cache.put("tool", {"x": 3}, "ccc")  # evicts x=2, the least recently used
+    assert cache.get("tool", {"x": 2}) is None
+    assert cache.get("tool", {"x": 1}) == "aaa"
+
+    cache.put("tool", {"x": 4}, "dddddddd")  # 8 chars: only room for this one
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["chars"] == 8
+    assert cache.stats()["tools"]["tool"]["evictions"] == 3
+
+    cache.put("tool", {"x": 5}, "e" * 11)  # larger than the whole cache
+    assert cache.get("tool", {"x": 5}) is None
+
+
+def test_metrics_endpoint(fresh_cache):
+    fresh_cache.put("calculator", {"expression": "1"}, "Result: 1")
+    response = TestClient(server.starlette_app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.json()["tool_cache"]["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_executor_limits_concurrency_and_counts_queue_depth():
+    executor = ToolExecutor(limits={"slow": 2}, max_workers=4)
+    running = []
+
+    def slow(i):
+        running.append(i)
+        time.sleep(0.2)
+        return i
+
+    try:
+        results = await asyncio.gather(*(executor.run("slow", slow, i, blocking=True) for i in range(5)))
+    finally:
+        executor.shutdown()
+
+    assert results == [0, 1, 2, 3, 4]
+    stats = executor.stats()["tools"]["slow"]
+    assert stats["limit"] == 2
+    assert stats["max_queued"] == 3  # two start right away
+    assert stats["queued"] == 0 and stats["running"] == 0
+    assert stats["completed"] == 5
+    assert stats["max_wait_seconds"] >= 0.35  # the last two waited for two rounds
+
+
+@pytest.mark.asyncio
+async def test_blocking_tools_do_not_stall_the_event_loop():
+    executor = ToolExecutor(limits={}, max_workers=2)
+    started = time.perf_counter()
+    slow = asyncio.create_task(executor.run("slow", time.sleep, 0.5, blocking=True))
+    await asyncio.sleep(0.05)
+
+    # An async tool finishes while the blocking one is still running
+    assert await executor.run("fast", asyncio.sleep, 0, "fast") == "fast"
+    assert time.perf_counter() - started < 0.3
+    await slow
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_failed_and_cancelled_calls_leave_consistent_counters():
+    executor = ToolExecutor(limits={"tool": 1})
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await executor.run("tool", fail)
+
+    first = asyncio.create_task(executor.run("tool", asyncio.sleep, 0.2))
+    queued = asyncio.create_task(executor.run("tool", asyncio.sleep, 0.2))
+    await asyncio.sleep(0.05)
+    queued.cancel()
+    await first
+
+    stats = executor.stats()["tools"]["tool"]
+    assert stats["failed"] == 1
+    assert stats["queued"] == 0 and stats["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_calculator_runs_in_a_process_pool(fresh_cache, monkeypatch):
+    executor = ToolExecutor(limits={}, kind="process", max_workers=1)
+    monkeypatch.setattr(server, "tool_executor", executor)
+    try:
+        assert await call("calculator", {"expression": "sqrt(16) + 1"}) == "Result: 5.0"
+    finally:
+        executor.shutdown()
+    assert executor.stats()["tools"]["calculator"]["completed"] == 1
+
+
+def test_health_and_readiness_follow_the_lifespan(monkeypatch):
+    monkeypatch.setattr(server, "server_state", {"ready": False, "draining": False, "deadline": None})
+    client = TestClient(server.starlette_app)
+    assert client.get("/health").json()["status"] == "ok"
+    assert client.get("/ready").status_code == 503
+
+    with TestClient(server.starlette_app) as running:
+        response = running.get("/ready")
+        assert response.status_code == 200
+        assert response.json() == {"status": "ready", "in_flight": 0}
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "draining"
+
+
+@pytest.mark.asyncio
+async def test_executor_drain_waits_for_running_calls():
+    executor = ToolExecutor(limits={})
+    call = asyncio.create_task(executor.run("tool", asyncio.sleep, 0.3))
+    await asyncio.sleep(0.01)
+
+    assert executor.in_flight() == 1
+    assert not await executor.drain(timeout=0.05)
+    assert await executor.drain(timeout=2)
+    assert call.done()
+
+
+@pytest.mark.asyncio
+async def test_ready_turns_503_as_soon_as_the_exit_signal_arrives(monkeypatch):
+    monkeypatch.setattr(server, "server_state", {"ready": True, "draining": False, "deadline": None})
+    config = uvicorn.Config(server.starlette_app, port=0, lifespan="off", ws="none", log_level="warning")
+    uvicorn_server = server.DrainingServer(config, drain_timeout=5, ready_grace=0.5)
+    serving = asyncio.create_task(uvicorn_server.serve())
+    while not uvicorn_server.started:
+        await asyncio.sleep(0.01)
+    port = uvicorn_server.servers[0].sockets[0].getsockname()[1]
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+        assert (await client.get("/ready")).status_code == 200
+
+        os.kill(os.getpid(), signal.SIGTERM)  # handled by DrainingServer.handle_exit
+        await asyncio.sleep(0.05)
+        # uvicorn re-raises captured signals after shutdown; not in the test process
+        uvicorn_server._captured_signals.clear()
+
+        # Still accepting connections during the grace period, but not ready
+        response = await client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "draining"
+        assert not uvicorn_server.should_exit
+
+    await asyncio.wait_for(serving, timeout=5)
+    # The grace came out of the same deadline uvicorn and the tool drain use
+    assert config.timeout_graceful_shutdown <= 4.6
+    assert server.drain_time_left() <= 4.6
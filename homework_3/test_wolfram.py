@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from tools.wolfram import TokenBucket, WolframClient
+
+
+class StubWolfram(BaseHTTPRequestHandler):
+    """Local stand-in for the LLM API; `replies` is a list of (status, body) used in order, then 200s."""
+
+    replies = []
+    queries = []
+    delay = 0.0
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        type(self).queries.append(params["input"][0])
+        time.sleep(self.delay)
+        status, body = self.replies.pop(0) if self.replies else (200, f"Result: {params['input'][0]} = 42")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    StubWolfram.replies = []
+    StubWolfram.queries = []
+    StubWolfram.delay = 0.0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubWolfram)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/api/v1/llm-api"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_client(url, **kwargs):
+    return WolframClient(app_id="test-app", api_url=url, backoff=0.01, timeout=2, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_query_result_and_client_errors(stub):
+    client = make_client(stub)
+    StubWolfram.replies = [(403, "forbidden"), (501, "Did you mean x?")]
+    try:
+        assert await client.query("2+2") == "Error: Invalid Wolfram Alpha API key or access denied"
+        assert await client.query("x") == "Wolfram Alpha couldn't understand the query: 'x'. Did you mean x?"
+        assert await client.query("2+2") == "Wolfram Alpha result for '2+2':\n\nResult: 2+2 = 42"
+    finally:
+        await client.aclose()
+    assert client.retries == 0
+
+
+@pytest.mark.asyncio
+async def test_server_errors_are_retried_with_backoff(stub):
+    client = make_client(stub, max_retries=3)
+    StubWolfram.replies = [(503, "busy"), (500, "oops")]
+    try:
+        assert (await client.query("q")).endswith("Result: q = 42")
+    finally:
+        await client.aclose()
+    assert StubWolfram.queries == ["q", "q", "q"]
+    assert client.retries == 2
+
+
+@pytest.mark.asyncio
+async def test_retries_give_up_with_the_last_error(stub):
+    client = make_client(stub, max_retries=1)
+    StubWolfram.replies = [(502, "bad gateway")] * 3
+    try:
+        assert await client.query("q") == "Error: Wolfram Alpha API returned status code 502"
+    finally:
+        await client.aclose()
+    assert len(StubWolfram.queries) == 2
+
+
+@pytest.mark.asyncio
+async def test_timeouts_are_retried(stub):
+    client = WolframClient(app_id="test-app", api_url=stub, backoff=0.01, timeout=0.2, max_retries=1)
+    StubWolfram.delay = 0.5
+    try:
+        assert await client.query("slow") == "Error: Wolfram Alpha query timed out"
+    finally:
+        await client.aclose()
+    assert client.retries == 1
+
+
+@pytest.mark.asyncio
+async def test_identical_queries_in_flight_share_one_call(stub):
+    client = make_client(stub)
+    StubWolfram.delay = 0.2
+    try:
+        results = await asyncio.gather(*(client.query("same") for _ in range(5)), client.query("other"))
+    finally:
+        await client.aclose()
+
+    assert len(set(results[:5])) == 1
+    assert sorted(StubWolfram.queries) == ["other", "same"]
+    assert client.coalesced == 4
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_spaces_out_requests(stub):
+    client = make_client(stub, rate=20, burst=2)
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(client.query(f"q{i}") for i in range(6)))
+    finally:
+        await client.aclose()
+    # 2 right away, the other 4 one every 50 ms
+    assert time.perf_counter() - started >= 0.19
+
+
+def test_token_bucket_reservations():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_missing_app_id():
+    assert await WolframClient(app_id=None).query("q") == "Error: WOLFRAM_APP_ID environment variable not set"
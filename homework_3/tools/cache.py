@@ -0,0 +1,137 @@
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachePolicy:
+    """How results of one tool are cached.
+
+    ttl: seconds a result stays valid (None = forever)
+    when: decides per call whether caching is allowed, from the arguments
+    cacheable: decides whether a result is worth keeping (e.g. not errors)
+    """
+    ttl: Optional[float] = None
+    when: Callable[[Dict[str, Any]], bool] = lambda arguments: True
+    cacheable: Callable[[str], bool] = lambda result: True
+
+
+def default_policies(wolfram_ttl: float = 3600.0) -> Dict[str, CachePolicy]:
+    """calculator: always; wolfram_alpha: with a TTL; python_repl: only code marked pure."""
+    return {
+        "calculator": CachePolicy(),
+        "wolfram_alpha": CachePolicy(
+            ttl=wolfram_ttl,
+            cacheable=lambda result: not result.startswith(("Error", "Wolfram Alpha error")),
+        ),
+        "python_repl": CachePolicy(
+            when=lambda arguments: arguments.get("pure") is True,
+            cacheable=lambda result: not result.startswith(("Python execution timeout", "Python execution error")),
+        ),
+    }
+
+
+class ToolResultCache:
+    """LRU cache of tool results keyed on tool name and arguments.
+
+    Only tools with a policy are cached. The cache holds at most max_entries
+    results and max_chars characters of results; the least recently used
+    ones are evicted first. Per-tool hits, misses, evictions and expirations
+    are counted for stats().
+    """
+
+    def __init__(
+        self,
+        policies: Optional[Dict[str, CachePolicy]] = None,
+        max_entries: int = 10_000,
+        max_chars: int = 50_000_000,
+    ):
+        self.policies = default_policies() if policies is None else policies
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (tool, expires, result)
+        self._chars = 0
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def key(name: str, arguments: Dict[str, Any]) -> str:
+        return json.dumps([name, arguments], sort_keys=True, default=str)
+
+    def _count(self, name: str, counter: str) -> None:
+        counters = self._counters.setdefault(name, {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0})
+        counters[counter] += 1
+
+    def applies(self, name: str, arguments: Dict[str, Any]) -> bool:
+        """Whether this call may be answered from / stored in the cache."""
+        policy = self.policies.get(name)
+        return policy is not None and policy.when(arguments)
+
+    def get(self, name: str, arguments: Dict[str, Any]) -> Optional[str]:
+        """Cached result of a call, or None."""
+        if not self.applies(name, arguments):
+            return None
+
+        key = self.key(name, arguments)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] < time.monotonic():
+                self._remove(key)
+                self._count(name, "expirations")
+                entry = None
+
+            if entry is None:
+                self._count(name, "misses")
+                return None
+
+            self._entries.move_to_end(key)
+            self._count(name, "hits")
+            return entry[2]
+
+    def put(self, name: str, arguments: Dict[str, Any], result: str) -> None:
+        """Store a result if the tool's policy allows it."""
+        if not self.applies(name, arguments):
+            return
+        policy = self.policies[name]
+        if not policy.cacheable(result) or len(result) > self.max_chars:
+            return
+
+        key = self.key(name, arguments)
+        expires = time.monotonic() + policy.ttl if policy.ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (name, expires, result)
+            self._chars += len(result)
+
+            while len(self._entries) > self.max_entries or self._chars > self.max_chars:
+                oldest = next(iter(self._entries))
+                self._count(self._entries[oldest][0], "evictions")
+                self._remove(oldest)
+
+    def _remove(self, key: str) -> None:
+        _, _, result = self._entries.pop(key)
+        self._chars -= len(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache size and per-tool counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "chars": self._chars,
+                "max_entries": self.max_entries,
+                "max_chars": self.max_chars,
+                "tools": {name: dict(counters) for name, counters in self._counters.items()},
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._chars = 0
@@ -1,45 +1,225 @@
+import ast
 import math
 import logging
+import operator
+import functools
+from typing import Any, Callable, Dict, Optional, Union
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Compiled expressions kept in the LRU cache
+COMPILED_CACHE_SIZE = 1024
+
+# Largest integer power result (in bits) before refusing to compute it
+MAX_POWER_BITS = 1_000_000
+
+# Longest array result written out in full
+MAX_LISTED_VALUES = 1000
+
+CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau, "inf": math.inf}
+
+
+def _vector(*args) -> bool:
+    return any(isinstance(a, np.ndarray) for a in args)
+
+
+def _elementwise(scalar: Callable, vector: Callable) -> Callable:
+    """A function using `vector` (NumPy) when any argument is an array."""
+    return lambda *args: vector(*args) if _vector(*args) else scalar(*args)
+
+
+def _pow(base, exponent, *mod):
+    if mod or _vector(base, exponent):
+        return pow(base, exponent, *mod) if mod else np.power(base, exponent)
+    if isinstance(base, int) and isinstance(exponent, int) and abs(base) > 1 \
+            and base.bit_length() * abs(exponent) > MAX_POWER_BITS:
+        raise ValueError(f"Result of {base}**{exponent} is too large")
+    return base ** exponent
+
+
+def _reduce(scalar: Callable, vector: Callable) -> Callable:
+    """min/max: builtin on scalars, element-wise over several array arguments."""
+    def reduce(*args):
+        if len(args) > 1 and _vector(*args):
+            return functools.reduce(vector, args)
+        if len(args) == 1 and isinstance(args[0], np.ndarray):
+            return scalar(args[0].tolist())
+        return scalar(*args)
+    return reduce
 
-async def calculate(expression: str) -> str:
+
+FUNCTIONS = {
+    "abs": _elementwise(abs, np.abs),
+    "round": _elementwise(round, np.round),
+    "min": _reduce(min, np.minimum),
+    "max": _reduce(max, np.maximum),
+    "sum": sum,
+    "pow": _pow,
+    "sqrt": _elementwise(math.sqrt, np.sqrt),
+    "sin": _elementwise(math.sin, np.sin),
+    "cos": _elementwise(math.cos, np.cos),
+    "tan": _elementwise(math.tan, np.tan),
+    "asin": _elementwise(math.asin, np.arcsin),
+    "acos": _elementwise(math.acos, np.arccos),
+    "atan": _elementwise(math.atan, np.arctan),
+    "atan2": _elementwise(math.atan2, np.arctan2),
+    "sinh": _elementwise(math.sinh, np.sinh),
+    "cosh": _elementwise(math.cosh, np.cosh),
+    "tanh": _elementwise(math.tanh, np.tanh),
+    "log": _elementwise(math.log, lambda x, *base: np.log(x) / np.log(base[0]) if base else np.log(x)),
+    "log10": _elementwise(math.log10, np.log10),
+    "log2": _elementwise(math.log2, np.log2),
+    "exp": _elementwise(math.exp, np.exp),
+    "floor": _elementwise(math.floor, np.floor),
+    "ceil": _elementwise(math.ceil, np.ceil),
+    "hypot": _elementwise(math.hypot, np.hypot),
+    "degrees": _elementwise(math.degrees, np.degrees),
+    "radians": _elementwise(math.radians, np.radians),
+}
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _pow,
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+Value = Union[int, float, complex, np.ndarray]
+
+
+class CompiledExpression:
+    """An arithmetic expression compiled to nested closures.
+
+    Call it with values for its free variables (numbers or NumPy arrays, the
+    latter evaluate the expression element-wise).
     """
-    Safely evaluate mathematical expressions.
-    
+
+    def __init__(self, text: str, function: Callable[[Dict[str, Value]], Value], variables: frozenset):
+        self.text = text
+        self.variables = variables
+        self._function = function
+
+    def __call__(self, **variables: Value) -> Value:
+        missing = self.variables - variables.keys()
+        if missing:
+            raise NameError(f"name '{sorted(missing)[0]}' is not defined")
+        return self._function(variables)
+
+
+def _compile_node(node: ast.AST, variables: set) -> Callable[[Dict[str, Value]], Value]:
+    """Closure computing one whitelisted AST node; anything else is rejected."""
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float, complex):
+        value = node.value
+        return lambda env: value
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name in CONSTANTS:
+            value = CONSTANTS[name]
+            return lambda env: value
+        if name in FUNCTIONS:
+            raise ValueError(f"Function '{name}' must be called")
+        variables.add(name)
+        return lambda env: env[name]
+
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        op = BINARY_OPERATORS[type(node.op)]
+        left, right = _compile_node(node.left, variables), _compile_node(node.right, variables)
+        return lambda env: op(left(env), right(env))
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        op = UNARY_OPERATORS[type(node.op)]
+        operand = _compile_node(node.operand, variables)
+        return lambda env: op(operand(env))
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+            name = node.func.id if isinstance(node.func, ast.Name) else ast.unparse(node.func)
+            raise ValueError(f"Function '{name}' is not allowed")
+        if node.keywords:
+            raise ValueError("Keyword arguments are not allowed")
+        function = FUNCTIONS[node.func.id]
+        args = [_compile_argument(arg, variables) for arg in node.args]
+        return lambda env: function(*(arg(env) for arg in args))
+
+    raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+
+
+def _compile_argument(node: ast.AST, variables: set) -> Callable[[Dict[str, Value]], Value]:
+    """Function arguments may also be lists, e.g. sum([1, 2, 3])."""
+    if isinstance(node, (ast.List, ast.Tuple)):
+        items = [_compile_node(item, variables) for item in node.elts]
+        return lambda env: [item(env) for item in items]
+    return _compile_node(node, variables)
+
+
+@functools.lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def compile_expression(expression: str) -> CompiledExpression:
+    """Parse and compile an expression once (LRU cached by its text).
+
+    Raises SyntaxError for invalid syntax and ValueError for anything outside
+    the arithmetic whitelist (attributes, subscripts, lambdas, ...).
+    """
+    tree = ast.parse(expression.strip(), mode="eval")
+    variables: set = set()
+    function = _compile_node(tree.body, variables)
+    return CompiledExpression(expression, function, frozenset(variables))
+
+
+def format_result(result: Value) -> str:
+    if isinstance(result, np.ndarray):
+        if result.size <= MAX_LISTED_VALUES:
+            return f"Result: {result.tolist()}"
+        return (
+            f"Result: {np.array2string(result, threshold=20)} "
+            f"({result.size} values, min {result.min():g}, max {result.max():g}, mean {result.mean():g})"
+        )
+    return f"Result: {result}"
+
+
+def _variable_value(name: str, value: Any) -> Value:
+    """A number, or a float array for a list of numbers."""
+    if isinstance(value, (list, tuple)):
+        return np.asarray(value, dtype=float)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    raise ValueError(f"Variable '{name}' must be a number or a list of numbers")
+
+
+async def calculate(expression: str, variables: Optional[Dict[str, Any]] = None) -> str:
+    """Async wrapper of evaluate() (the server runs evaluate in its executor)."""
+    return evaluate(expression, variables)
+
+
+def evaluate(expression: str, variables: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Safely evaluate mathematical expressions (blocking).
+
     Args:
-        expression: Mathematical expression to evaluate
-        
+        expression: Mathematical expression to evaluate, e.g. "sqrt(x) + 1"
+        variables: Values of the expression's variables; a list of numbers
+            evaluates the expression for each of them (vectorized)
+
     Returns:
         Result of the calculation as a string
     """
     try:
-        # Define safe built-ins for evaluation
-        safe_dict = {
-            'abs': abs,
-            'round': round,
-            'min': min,
-            'max': max,
-            'sum': sum,
-            'pow': pow,
-            'sqrt': math.sqrt,
-            'sin': math.sin,
-            'cos': math.cos,
-            'tan': math.tan,
-            'pi': math.pi,
-            'e': math.e,
-            'log': math.log,
-            'log10': math.log10,
-            'exp': math.exp,
-        }
-        
-        # Evaluate the expression with restricted built-ins
-        result = eval(expression, {"__builtins__": {}}, safe_dict)
-        
-        logger.info(f"Calculated: {expression} = {result}")
-        return f"Result: {result}"
-        
+        compiled = compile_expression(expression)
+        result = compiled(**{name: _variable_value(name, value) for name, value in (variables or {}).items()})
+
+        logger.info(f"Calculated: {expression}")
+        return format_result(result)
+
     except Exception as e:
         error_msg = f"Calculation error: {str(e)}"
         logger.error(error_msg)
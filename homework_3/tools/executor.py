@@ -0,0 +1,118 @@
+import time
+import asyncio
+import logging
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ToolExecutor:
+    """Runs tool calls with a concurrency limit per tool.
+
+    Blocking (synchronous) tool functions are sent to a bounded thread or
+    process pool so they never run on the event loop; async tools run on the
+    loop. Calls over a tool's limit wait in its queue. Per-tool running and
+    queued calls, the deepest queue seen and waiting times are counted for
+    stats().
+    """
+
+    def __init__(self, limits: Dict[str, int], max_workers: int = 4, kind: str = "thread", default_limit: int = 4):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.limits = limits
+        self.default_limit = default_limit
+        self.max_workers = max_workers
+        self.kind = kind
+
+        self._pool: Optional[Executor] = None
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._counters: Dict[str, Dict[str, float]] = {}
+
+    def _executor(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool")
+        return self._pool
+
+    def _semaphore(self, name: str) -> asyncio.Semaphore:
+        # Semaphores belong to one event loop
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots = {}
+            self._slots_loop = loop
+        if name not in self._slots:
+            self._slots[name] = asyncio.Semaphore(self.limits.get(name, self.default_limit))
+        return self._slots[name]
+
+    def _count(self, name: str) -> Dict[str, float]:
+        return self._counters.setdefault(name, {
+            "running": 0, "queued": 0, "max_queued": 0, "completed": 0, "failed": 0,
+            "wait_seconds": 0.0, "max_wait_seconds": 0.0,
+        })
+
+    async def run(self, name: str, func: Callable[..., Any], *args: Any, blocking: bool = False) -> Any:
+        """Run func(*args) for tool `name`: in the pool if blocking, else await it."""
+        counters = self._count(name)
+        counters["queued"] += 1
+        counters["max_queued"] = max(counters["max_queued"], counters["queued"])
+        queued_at = time.perf_counter()
+        waiting = True
+
+        try:
+            async with self._semaphore(name):
+                waiting = False
+                counters["queued"] -= 1
+                waited = time.perf_counter() - queued_at
+                counters["wait_seconds"] += waited
+                counters["max_wait_seconds"] = max(counters["max_wait_seconds"], waited)
+
+                counters["running"] += 1
+                try:
+                    if blocking:
+                        loop = asyncio.get_running_loop()
+                        return await loop.run_in_executor(self._executor(), functools.partial(func, *args))
+                    return await func(*args)
+                except Exception:
+                    counters["failed"] += 1
+                    raise
+                finally:
+                    counters["running"] -= 1
+                    counters["completed"] += 1
+        finally:
+            # Cancelled while still queued
+            if waiting:
+                counters["queued"] -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool settings and per-tool counters."""
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "tools": {
+                name: {**counters, "limit": self.limits.get(name, self.default_limit)}
+                for name, counters in self._counters.items()
+            },
+        }
+
+    def in_flight(self) -> int:
+        """Running and queued calls of all tools."""
+        return sum(int(c["running"] + c["queued"]) for c in self._counters.values())
+
+    async def drain(self, timeout: float) -> bool:
+        """Wait until no call is running or queued; False if `timeout` ran out first."""
+        deadline = time.monotonic() + timeout
+        while self.in_flight():
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -1,65 +1,225 @@
+import os
 import sys
-import io
+import json
+import asyncio
 import logging
-import subprocess
-import tempfile
-import os
+from typing import List, Optional, Set
 
 logger = logging.getLogger(__name__)
 
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "repl_worker.py")
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_RUNS = 100
+DEFAULT_TIMEOUT = 30.0
+
+# Largest request/response line (snippet output) read from a worker
+MAX_LINE = 64 * 1024 * 1024
+
+
+class PythonWorker:
+    """One warm interpreter (tools/repl_worker.py) talking JSON lines over pipes."""
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.runs = 0
+
+    @classmethod
+    async def start(cls) -> "PythonWorker":
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, WORKER_SCRIPT,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=MAX_LINE,
+            # Keep Ctrl+C / group signals away, the pool decides when a worker stops
+            start_new_session=True,
+        )
+        worker = cls(process)
+        # Wait until the preloaded imports are done
+        if await process.stdout.readline() != b"ready\n":
+            worker.kill()
+            raise RuntimeError("Python worker failed to start")
+        return worker
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    async def run(self, code: str) -> dict:
+        self.runs += 1
+        self.process.stdin.write(json.dumps({"code": code}).encode() + b"\n")
+        await self.process.stdin.drain()
+        line = await self.process.stdout.readline()
+        if not line:
+            raise RuntimeError("Python worker exited unexpectedly")
+        return json.loads(line)
+
+    def kill(self) -> None:
+        if self.alive:
+            self.process.kill()
+
+
+class PythonWorkerPool:
+    """Pre-started python_repl workers.
+
+    At most `size` snippets run at once, each in an idle worker. A worker is
+    replaced after `max_runs` snippets, after a timeout (it is killed) or if
+    it died; replacements start in the background so the next call finds a
+    warm worker.
+    """
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, max_runs: int = DEFAULT_MAX_RUNS, timeout: float = DEFAULT_TIMEOUT):
+        self.size = size
+        self.max_runs = max_runs
+        self.timeout = timeout
+
+        self._idle: List[PythonWorker] = []
+        self._busy: Set[PythonWorker] = set()
+        self._starting: Set[asyncio.Task] = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.recycled = 0
+        self.timeouts = 0
+
+    async def start(self) -> None:
+        """Start the workers up front instead of on the first calls."""
+        missing = self.size - len(self._idle) - len(self._busy) - len(self._starting)
+        workers = await asyncio.gather(*(PythonWorker.start() for _ in range(missing)))
+        self._idle.extend(workers)
+
+    def _replace(self, worker: PythonWorker) -> None:
+        worker.kill()
+        self.recycled += 1
+        task = asyncio.create_task(self._start_idle())
+        self._starting.add(task)
+        task.add_done_callback(self._starting.discard)
+
+    def _release(self, worker: PythonWorker) -> None:
+        # Workers started on demand while replacements were starting can
+        # make the pool overfull
+        if len(self._idle) + len(self._busy) >= self.size:
+            worker.kill()
+        else:
+            self._idle.append(worker)
+
+    async def _start_idle(self) -> None:
+        try:
+            self._release(await PythonWorker.start())
+        except Exception as e:
+            # The next call starts its own worker
+            logger.error(f"Could not start Python worker: {e}")
+
+    async def run(self, code: str) -> dict:
+        """Run a snippet, {"stdout", "stderr", "returncode"}; raises asyncio.TimeoutError."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+
+        async with self._slots:
+            worker = self._idle.pop() if self._idle else await PythonWorker.start()
+            self._busy.add(worker)
+            try:
+                result = await asyncio.wait_for(worker.run(code), self.timeout)
+            except BaseException as e:
+                # Timed out, cancelled or broken: the worker's state is unknown
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timeouts += 1
+                self._busy.discard(worker)
+                self._replace(worker)
+                raise
+            self._busy.discard(worker)
+
+            if worker.runs >= self.max_runs or not worker.alive:
+                self._replace(worker)
+            else:
+                self._release(worker)
+            return result
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "busy": len(self._busy),
+            "recycled": self.recycled,
+            "timeouts": self.timeouts,
+        }
+
+    async def close(self) -> None:
+        """Kill all workers."""
+        for task in list(self._starting):
+            task.cancel()
+        await asyncio.gather(*self._starting, return_exceptions=True)
+        for worker in self._idle + list(self._busy):
+            worker.kill()
+            await worker.process.wait()
+        self._idle.clear()
+        self._busy.clear()
+
+
+# Shared pool, bound to the event loop that created it (subprocess pipes are)
+_pool: Optional[PythonWorkerPool] = None
+_pool_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_worker_pool() -> PythonWorkerPool:
+    """The shared worker pool, configured by PYTHON_WORKERS, PYTHON_WORKER_MAX_RUNS and PYTHON_TIMEOUT."""
+    global _pool, _pool_loop
+    loop = asyncio.get_running_loop()
+    if _pool is None or _pool_loop is not loop:
+        if _pool is not None:
+            # Left over from a closed loop: the processes can only be killed
+            for worker in _pool._idle + list(_pool._busy):
+                worker.kill()
+        _pool = PythonWorkerPool(
+            size=int(os.getenv("PYTHON_WORKERS", DEFAULT_POOL_SIZE)),
+            max_runs=int(os.getenv("PYTHON_WORKER_MAX_RUNS", DEFAULT_MAX_RUNS)),
+            timeout=float(os.getenv("PYTHON_TIMEOUT", DEFAULT_TIMEOUT)),
+        )
+        _pool_loop = loop
+    return _pool
+
+
+async def close_worker_pool() -> None:
+    """Kill the shared pool's workers."""
+    global _pool, _pool_loop
+    if _pool is not None:
+        await _pool.close()
+    _pool = None
+    _pool_loop = None
+
 
 async def execute_python(code: str) -> str:
     """
-    Execute Python code in a subprocess for better isolation and reliability.
-    
+    Execute Python code in a warm sandbox worker process.
+
     Args:
         code: Python code to execute
-        
+
     Returns:
         Output from code execution or error message
     """
+    pool = get_worker_pool()
     try:
-        # Create a temporary file to store the code
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-            f.write(code)
-            temp_file = f.name
-        
-        try:
-            # Execute the code in a subprocess
-            result = subprocess.run(
-                [sys.executable, temp_file],
-                capture_output=True,
-                text=True,
-                timeout=30  # 30 second timeout
-            )
-            
-            # Combine stdout and stderr
-            output = ""
-            if result.stdout:
-                output += result.stdout
-            if result.stderr:
-                if output:
-                    output += "\n"
-                output += f"STDERR:\n{result.stderr}"
-            
-            if not output and result.returncode == 0:
-                output = "Code executed successfully (no output)"
-            elif not output:
-                output = f"Process exited with code {result.returncode}"
-            
-            logger.info(f"Executed Python code ({len(code)} chars)")
-            return output
-            
-        finally:
-            # Clean up the temporary file
-            try:
-                os.unlink(temp_file)
-            except:
-                pass
-                
-    except subprocess.TimeoutExpired:
-        return "Python execution timeout (30 seconds)"
+        result = await pool.run(code)
+    except asyncio.TimeoutError:
+        return f"Python execution timeout ({pool.timeout:g} seconds)"
     except Exception as e:
         error_msg = f"Python execution error: {type(e).__name__}: {str(e)}"
         logger.error(error_msg)
         return error_msg
+
+    # Combine stdout and stderr
+    output = ""
+    if result["stdout"]:
+        output += result["stdout"]
+    if result["stderr"]:
+        if output:
+            output += "\n"
+        output += f"STDERR:\n{result['stderr']}"
+
+    if not output and result["returncode"] == 0:
+        output = "Code executed successfully (no output)"
+    elif not output:
+        output = f"Process exited with code {result['returncode']}"
+
+    logger.info(f"Executed Python code ({len(code)} chars)")
+    return output
@@ -0,0 +1,71 @@
+"""
+Sandbox worker process for python_repl (started by tools.python_repl).
+
+Imports the usual math libraries once, then runs snippets sent over stdin,
+one JSON request per line ({"code": ...}), and answers each with one JSON
+line {"stdout", "stderr", "returncode"}. Every snippet gets a fresh
+namespace; the pool recycles workers so leftover module state doesn't live
+for long.
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import traceback
+
+# Don't let snippets import modules from the tools/ directory
+sys.path.pop(0)
+
+PRELOAD = ("math", "cmath", "fractions", "decimal", "statistics", "itertools", "numpy", "sympy", "scipy")
+
+
+def preload():
+    for name in PRELOAD:
+        try:
+            __import__(name)
+        except ImportError:
+            pass
+
+
+def run(code):
+    stdout, stderr = io.StringIO(), io.StringIO()
+    returncode = 0
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            exec(compile(code, "<code>", "exec"), {"__name__": "__main__"})
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                returncode = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                returncode = 1
+        except BaseException as e:
+            # Leave this function's frame out of the traceback
+            traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+            returncode = 1
+    return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "returncode": returncode}
+
+
+def main():
+    # The protocol gets its own copies of stdin/stdout; snippets reading fd 0
+    # or writing to fd 1 (input(), os.write, child processes) see /dev/null
+    requests = os.fdopen(os.dup(0), "r")
+    protocol = os.fdopen(os.dup(1), "w")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    sys.stdin = open(os.devnull)
+
+    preload()
+    protocol.write("ready\n")
+    protocol.flush()
+
+    for line in requests:
+        result = run(json.loads(line)["code"])
+        protocol.write(json.dumps(result) + "\n")
+        protocol.flush()
+
+
+if __name__ == "__main__":
+    main()
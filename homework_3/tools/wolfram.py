@@ -1,84 +1,260 @@
 import os
+import time
+import random
+import asyncio
 import logging
+from typing import Dict, Optional
+
 import httpx
 from dotenv import load_dotenv
-from urllib.parse import quote
 
 logger = logging.getLogger(__name__)
 load_dotenv()
 
+DEFAULT_API_URL = "https://www.wolframalpha.com/api/v1/llm-api"
 
-async def wolfram_query(query: str) -> str:
+try:
+    import h2  # noqa: F401  (httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: `rate` requests per second, bursts of `capacity`.
+
+    Callers reserve a token right away (the count may go negative) and sleep
+    until it would have been refilled, so waiting callers are served in order.
     """
-    Query Wolfram Alpha using the LLM API for AI-optimized responses.
 
-    Args:
-        query: Query string for Wolfram Alpha
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
 
-    Returns:
-        Formatted response from Wolfram Alpha LLM API
+    def reserve(self) -> float:
+        """Take a token; seconds to wait before using it."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self) -> None:
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class RetryableError(Exception):
+    """A 5xx response or timeout worth retrying, `message` is what the tool returns if retries run out."""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+class WolframClient:
+    """Wolfram Alpha LLM API client for the MCP server.
+
+    One keep-alive httpx client (HTTP/2 when h2 is installed) per event loop
+    serves all queries. Requests are rate limited by a token bucket, 5xx
+    responses and timeouts are retried with jittered exponential backoff, and
+    identical queries in flight at the same time share one upstream call.
     """
-    try:
-        # Get API key from environment
-        app_id = os.getenv("WOLFRAM_APP_ID")
-        if not app_id:
+
+    def __init__(
+        self,
+        app_id: Optional[str],
+        api_url: str = DEFAULT_API_URL,
+        rate: float = 5.0,
+        burst: int = 5,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        timeout: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.app_id = app_id
+        self.api_url = api_url
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.transport = transport  # custom httpx transport (tests)
+        self.bucket = TokenBucket(rate, burst)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.upstream_calls = 0
+        self.retries = 0
+        self.coalesced = 0
+
+    async def _http_client(self) -> httpx.AsyncClient:
+        """Pooled HTTP client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            previous = self._client
+            self._loop = loop
+            self._inflight = {}
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=10, keepalive_expiry=60),
+                follow_redirects=True,
+                transport=self.transport,
+            )
+            # The client of a previous loop can't be reused, release its connections
+            if previous is not None:
+                await _close_quietly(previous)
+        return self._client
+
+    async def query(self, query: str) -> str:
+        """Query Wolfram Alpha, sharing the upstream call with identical queries in flight."""
+        if not self.app_id:
             error_msg = "Error: WOLFRAM_APP_ID environment variable not set"
             logger.error(error_msg)
             return error_msg
 
+        client = await self._http_client()
+        task = self._inflight.get(query)
+        if task is None:
+            task = asyncio.create_task(self._query_with_retries(client, query))
+            self._inflight[query] = task
+            task.add_done_callback(lambda _: self._inflight.pop(query, None))
+        else:
+            self.coalesced += 1
+        # A cancelled caller must not cancel the call the others wait for
+        return await asyncio.shield(task)
+
+    async def _query_with_retries(self, client: httpx.AsyncClient, query: str) -> str:
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            try:
+                return await self._fetch(client, query)
+            except RetryableError as e:
+                if attempt == self.max_retries:
+                    return e.message
+                # Full jitter: uniform in [0, backoff * 2^attempt]
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                logger.info(f"Wolfram Alpha {e.message!r}, retrying in {delay:.2f}s")
+                self.retries += 1
+                await asyncio.sleep(delay)
+            except Exception as e:
+                error_msg = f"Wolfram Alpha error: {type(e).__name__}: {str(e)}"
+                logger.error(error_msg, exc_info=True)
+                return error_msg
+
+    async def _fetch(self, client: httpx.AsyncClient, query: str) -> str:
         logger.info(f"Wolfram Alpha LLM API query starting for: {query}")
+        self.upstream_calls += 1
 
-        # LLM API endpoint
-        url = "https://www.wolframalpha.com/api/v1/llm-api"
-        
         # Parameters for the API call
         params = {
-            "appid": app_id,
+            "appid": self.app_id,
             "input": query,
             "maxchars": 8000  # Increase from default 6800 for more complete responses
         }
-        
-        # Make the API request
-        async with httpx.AsyncClient(follow_redirects=True) as client:
-            response = await client.get(url, params=params, timeout=30.0)
-            
-            # Check for errors
-            if response.status_code == 403:
-                return "Error: Invalid Wolfram Alpha API key or access denied"
-            elif response.status_code == 400:
-                return "Error: Invalid query format"
-            elif response.status_code == 501:
-                # 501 means Wolfram Alpha didn't understand the query
-                # The response text contains suggestions
-                logger.info(f"Wolfram Alpha couldn't understand the query")
-                return f"Wolfram Alpha couldn't understand the query: '{query}'. {response.text.strip()}"
-            elif response.status_code != 200:
-                logger.error(f"API returned status code: {response.status_code}")
-                logger.error(f"Response: {response.text}")
-                return f"Error: Wolfram Alpha API returned status code {response.status_code}"
-            
-            # The LLM API returns plain text, not XML
-            result_text = response.text.strip()
-            
-            if not result_text:
-                return "No results found for your query"
-            
-            # Check for common error messages in the response
-            if "Wolfram|Alpha did not understand your input" in result_text:
-                return f"Wolfram Alpha could not understand the query: {query}"
-            
-            if "No short answer available" in result_text and len(result_text) < 100:
-                return "No detailed answer available for this query"
-            
-            logger.info(f"Successfully received response from Wolfram Alpha LLM API")
-            
-            # The LLM API already returns well-formatted text, so we can return it directly
-            # Just add a header for clarity
-            return f"Wolfram Alpha result for '{query}':\n\n{result_text}"
-
-    except httpx.TimeoutException:
-        return "Error: Wolfram Alpha query timed out"
-    except Exception as e:
-        error_msg = f"Wolfram Alpha error: {type(e).__name__}: {str(e)}"
-        logger.error(error_msg, exc_info=True)
-        return error_msg
+
+        try:
+            response = await client.get(self.api_url, params=params)
+        except httpx.TimeoutException:
+            raise RetryableError("Error: Wolfram Alpha query timed out")
+
+        # Check for errors
+        if response.status_code == 403:
+            return "Error: Invalid Wolfram Alpha API key or access denied"
+        elif response.status_code == 400:
+            return "Error: Invalid query format"
+        elif response.status_code == 501:
+            # 501 means Wolfram Alpha didn't understand the query
+            # The response text contains suggestions
+            logger.info(f"Wolfram Alpha couldn't understand the query")
+            return f"Wolfram Alpha couldn't understand the query: '{query}'. {response.text.strip()}"
+        elif response.status_code >= 500:
+            raise RetryableError(f"Error: Wolfram Alpha API returned status code {response.status_code}")
+        elif response.status_code != 200:
+            logger.error(f"API returned status code: {response.status_code}")
+            logger.error(f"Response: {response.text}")
+            return f"Error: Wolfram Alpha API returned status code {response.status_code}"
+
+        # The LLM API returns plain text, not XML
+        result_text = response.text.strip()
+
+        if not result_text:
+            return "No results found for your query"
+
+        # Check for common error messages in the response
+        if "Wolfram|Alpha did not understand your input" in result_text:
+            return f"Wolfram Alpha could not understand the query: {query}"
+
+        if "No short answer available" in result_text and len(result_text) < 100:
+            return "No detailed answer available for this query"
+
+        logger.info(f"Successfully received response from Wolfram Alpha LLM API")
+
+        # The LLM API already returns well-formatted text, so we can return it directly
+        # Just add a header for clarity
+        return f"Wolfram Alpha result for '{query}':\n\n{result_text}"
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "upstream_calls": self.upstream_calls,
+            "retries": self.retries,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        client, self._client = self._client, None
+        self._loop = None
+        if client is not None:
+            await _close_quietly(client)
+
+
+async def _close_quietly(client: httpx.AsyncClient) -> None:
+    """Close a client; one bound to a finished event loop may fail to close cleanly."""
+    try:
+        await client.aclose()
+    except Exception:
+        pass
+
+
+# Module-lifetime client, configured from the environment once
+_client: Optional[WolframClient] = None
+
+
+def get_wolfram_client() -> WolframClient:
+    """The shared client (WOLFRAM_APP_ID, WOLFRAM_API_URL, WOLFRAM_RATE, WOLFRAM_BURST, WOLFRAM_MAX_RETRIES)."""
+    global _client
+    if _client is None:
+        _client = WolframClient(
+            app_id=os.getenv("WOLFRAM_APP_ID"),
+            api_url=os.getenv("WOLFRAM_API_URL", DEFAULT_API_URL),
+            rate=float(os.getenv("WOLFRAM_RATE", 5)),
+            burst=int(os.getenv("WOLFRAM_BURST", 5)),
+            max_retries=int(os.getenv("WOLFRAM_MAX_RETRIES", 3)),
+        )
+    return _client
+
+
+async def aclose_wolfram_client() -> None:
+    """Close the shared client's connections."""
+    if _client is not None:
+        await _client.aclose()
+
+
+async def wolfram_query(query: str) -> str:
+    """
+    Query Wolfram Alpha using the LLM API for AI-optimized responses.
+
+    Args:
+        query: Query string for Wolfram Alpha
+
+    Returns:
+        Formatted response from Wolfram Alpha LLM API
+    """
+    return await get_wolfram_client().query(query)
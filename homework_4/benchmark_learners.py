@@ -0,0 +1,112 @@
+"""
+Benchmark update throughput of the tabular learners
+
+Compares the per-transition Python update (the original QLearningAgent.update
+loop) with the batched NumPy and Numba kernels, in updates/sec.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+from mountain_car import AGENTS
+from mountain_car.kernels import HAS_NUMBA
+
+
+def random_transitions(n, seed=0):
+    """Uniform random MountainCar transitions (s, a, r, s', done, a')"""
+    rng = np.random.default_rng(seed)
+    low = np.array([-1.2, -0.07])
+    high = np.array([0.6, 0.07])
+    states = rng.uniform(low, high, size=(n, 2))
+    next_states = rng.uniform(low, high, size=(n, 2))
+    actions = rng.integers(3, size=n)
+    next_actions = rng.integers(3, size=n)
+    rewards = -np.ones(n)
+    dones = rng.random(n) < 0.01
+    return states, actions, rewards, next_states, dones, next_actions
+
+
+def time_python(algorithm, transitions, n):
+    """Updates/sec calling agent.update() once per transition"""
+    agent = AGENTS[algorithm]()
+    states, actions, rewards, next_states, dones, next_actions = transitions
+
+    start = time.perf_counter()
+    for i in range(n):
+        agent.update(states[i], actions[i], rewards[i], next_states[i], dones[i], next_actions[i])
+    return n / (time.perf_counter() - start)
+
+
+def time_batched(algorithm, kernel, transitions, batch_size, repeats=3):
+    """Best-of-repeats updates/sec calling agent.update_batch() on fixed-size batches"""
+    agent = AGENTS[algorithm](kernel=kernel)
+    n = len(transitions[0])
+    batches = [
+        tuple(x[i : i + batch_size] for x in transitions) for i in range(0, n - batch_size + 1, batch_size)
+    ]
+
+    # Warm-up (triggers Numba compilation)
+    states, actions, rewards, next_states, dones, next_actions = batches[0]
+    agent.update_batch(states, actions, rewards, next_states, dones, next_actions)
+
+    best = 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for states, actions, rewards, next_states, dones, next_actions in batches:
+            agent.update_batch(states, actions, rewards, next_states, dones, next_actions)
+        best = max(best, len(batches) * batch_size / (time.perf_counter() - start))
+    return best
+
+
+def benchmark(n_transitions=200_000, n_python=20_000, batch_sizes=(64, 1024), algorithms=None):
+    """Run all combinations, returns a list of result rows"""
+    transitions = random_transitions(n_transitions)
+    kernels = ["numpy"] + (["numba"] if HAS_NUMBA else [])
+    results = []
+
+    for algorithm in algorithms or AGENTS:
+        baseline = time_python(algorithm, transitions, n_python)
+        results.append(
+            {"algorithm": algorithm, "kernel": "python", "batch_size": 1, "updates_per_sec": baseline}
+        )
+        for kernel in kernels:
+            for batch_size in batch_sizes:
+                rate = time_batched(algorithm, kernel, transitions, batch_size)
+                results.append(
+                    {
+                        "algorithm": algorithm,
+                        "kernel": kernel,
+                        "batch_size": batch_size,
+                        "updates_per_sec": rate,
+                    }
+                )
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark tabular learner update throughput")
+    parser.add_argument("--transitions", type=int, default=200_000)
+    parser.add_argument("--json", metavar="PATH", help="Also write results as JSON")
+    args = parser.parse_args()
+
+    if not HAS_NUMBA:
+        print("numba is not installed: benchmarking the NumPy kernel only")
+
+    results = benchmark(n_transitions=args.transitions)
+
+    print(f"{'algorithm':<16} {'kernel':<8} {'batch':>6} {'updates/sec':>14} {'speedup':>8}")
+    baseline = {}
+    for r in results:
+        if r["kernel"] == "python":
+            baseline[r["algorithm"]] = r["updates_per_sec"]
+        speedup = r["updates_per_sec"] / baseline[r["algorithm"]]
+        print(
+            f"{r['algorithm']:<16} {r['kernel']:<8} {r['batch_size']:>6} "
+            f"{r['updates_per_sec']:>14,.0f} {speedup:>7.1f}x"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,278 @@
+"""
+Benchmark the stages of the training loop
+
+Times each stage of train() - environment step, state discretization,
+action selection, Q-update and metric bookkeeping - in seconds per million
+steps, for the serial (one transition at a time) and the batched code paths,
+plus end-to-end training throughput. Results can be written as JSON and
+compared against a saved baseline to catch steps/sec regressions.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import gymnasium
+import numpy as np
+from mountain_car import MetricsRecorder, MountainCarEnv, make_agent, make_vector_env
+from mountain_car.kernels import HAS_NUMBA
+
+BATCH_ENVS = 64
+BATCH_SIZE = 1024
+
+
+def random_states(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.uniform(-1.2, 0.6, n), rng.uniform(-0.07, 0.07, n)]).astype(np.float32)
+
+
+def bench_env_single(n, backend):
+    env = MountainCarEnv(render_mode=None, backend=backend)
+    env.reset(seed=0)
+    actions = np.random.default_rng(0).integers(3, size=n)
+
+    start = time.perf_counter()
+    for action in actions:
+        _, _, terminated, truncated, _ = env.step(action)
+        if terminated or truncated:
+            env.reset()
+    elapsed = time.perf_counter() - start
+    env.close()
+    return elapsed
+
+
+def bench_env_vector(n, backend, n_envs=BATCH_ENVS):
+    env = make_vector_env(n_envs=n_envs, seed=0, backend=backend)
+    env.reset()
+    actions = np.random.default_rng(0).integers(3, size=(n // n_envs, n_envs))
+
+    start = time.perf_counter()
+    for batch in actions:
+        env.step(batch)
+    elapsed = time.perf_counter() - start
+    env.close()
+    return elapsed
+
+
+def bench_discretize_single(n):
+    agent = make_agent()
+    states = random_states(n)
+
+    start = time.perf_counter()
+    for state in states:
+        agent.discretize_state(state)
+    return time.perf_counter() - start
+
+
+def bench_discretize_batch(n):
+    agent = make_agent()
+    states = random_states(n)
+
+    start = time.perf_counter()
+    for i in range(0, n, BATCH_SIZE):
+        agent.discretize_states(states[i : i + BATCH_SIZE])
+    return time.perf_counter() - start
+
+
+def bench_action_single(n):
+    agent = make_agent(epsilon=0.1)
+    states = random_states(n)
+
+    start = time.perf_counter()
+    for state in states:
+        agent.get_action(state)
+    return time.perf_counter() - start
+
+
+def bench_action_batch(n):
+    agent = make_agent(epsilon=0.1)
+    states = random_states(n)
+
+    start = time.perf_counter()
+    for i in range(0, n, BATCH_SIZE):
+        agent.get_actions(states[i : i + BATCH_SIZE])
+    return time.perf_counter() - start
+
+
+def transitions(n):
+    rng = np.random.default_rng(0)
+    return random_states(n, 0), rng.integers(3, size=n), -np.ones(n), random_states(n, 1), rng.random(n) < 0.005
+
+
+def bench_update_single(n):
+    agent = make_agent()
+    batch = transitions(n)
+
+    start = time.perf_counter()
+    for state, action, reward, next_state, done in zip(*batch):
+        agent.update(state, action, reward, next_state, done)
+    return time.perf_counter() - start
+
+
+def bench_update_batch(n, kernel):
+    agent = make_agent(kernel=kernel)
+    batch = transitions(n)
+    agent.update_batch(*(x[:BATCH_SIZE] for x in batch))  # Numba compilation
+
+    start = time.perf_counter()
+    for i in range(0, n, BATCH_SIZE):
+        agent.update_batch(*(x[i : i + BATCH_SIZE] for x in batch))
+    return time.perf_counter() - start
+
+
+def bench_metrics(n, episode_steps=200):
+    """Per-step totals/max position as in train() plus one record() per episode"""
+    positions = random_states(n)[:, 0]
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics = MetricsRecorder(os.path.join(tmp, "metrics.csv"))
+
+        start = time.perf_counter()
+        total_reward, steps, max_position = 0, 0, -1.2
+        for position in positions:
+            total_reward += -1.0
+            steps += 1
+            max_position = max(max_position, position)
+            if steps == episode_steps:
+                metrics.record(total_reward, steps, max_position, False, 0.1)
+                total_reward, steps, max_position = 0, 0, -1.2
+        _ = metrics.avg_reward, metrics.success_rate
+        elapsed = time.perf_counter() - start
+        metrics.close()
+    return elapsed
+
+
+def bench_train_serial(n, backend):
+    """End-to-end train(); untrained episodes all run 200 steps"""
+    from train import train
+
+    return _run_quietly(lambda: train(n_episodes=max(n // 200, 1), save_freq=10**9, backend=backend, seed=0))
+
+
+def bench_train_vectorized(n, backend, n_envs=BATCH_ENVS):
+    from train import train_vectorized
+
+    return _run_quietly(
+        lambda: train_vectorized(
+            n_episodes=max(n // 200, n_envs), n_envs=n_envs, seed=0, backend=backend, verbose=False, save=False
+        )
+    )
+
+
+def _run_quietly(run):
+    """Time run() in a scratch directory with its output discarded"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        os.chdir(tmp)
+        try:
+            start = time.perf_counter()
+            run()
+            return time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+
+
+# (stage, variant, function(n_steps) -> seconds)
+STAGES = [
+    ("env_step", "gymnasium", lambda n: bench_env_single(n, "gymnasium")),
+    ("env_step", "numpy", lambda n: bench_env_single(n, "numpy")),
+    ("env_step", f"gymnasium_vector_{BATCH_ENVS}", lambda n: bench_env_vector(n, "gymnasium")),
+    ("env_step", f"numpy_vector_{BATCH_ENVS}", lambda n: bench_env_vector(n, "numpy")),
+    ("discretize", "single", bench_discretize_single),
+    ("discretize", f"batch_{BATCH_SIZE}", bench_discretize_batch),
+    ("get_action", "single", bench_action_single),
+    ("get_action", f"batch_{BATCH_SIZE}", bench_action_batch),
+    ("update", "single", bench_update_single),
+    ("update", f"batch_{BATCH_SIZE}_numpy", lambda n: bench_update_batch(n, "numpy")),
+    *([("update", f"batch_{BATCH_SIZE}_numba", lambda n: bench_update_batch(n, "numba"))] if HAS_NUMBA else []),
+    ("metrics", "serial", bench_metrics),
+    ("train", "serial_gymnasium", lambda n: bench_train_serial(n, "gymnasium")),
+    ("train", f"vectorized_{BATCH_ENVS}_gymnasium", lambda n: bench_train_vectorized(n, "gymnasium")),
+    ("train", f"vectorized_{BATCH_ENVS}_numpy", lambda n: bench_train_vectorized(n, "numpy")),
+]
+
+
+def run_benchmarks(n_steps=100_000, repeats=3, stages=None):
+    """Time every stage (best of repeats), returns a list of result rows"""
+    results = []
+    for stage, variant, bench in STAGES:
+        if stages and stage not in stages:
+            continue
+        # Serial end-to-end training is slow, one run is enough
+        seconds = min(bench(n_steps) for _ in range(1 if stage == "train" else repeats))
+        results.append(
+            {
+                "stage": stage,
+                "variant": variant,
+                "seconds_per_million_steps": seconds * 1e6 / n_steps,
+                "steps_per_sec": n_steps / seconds,
+            }
+        )
+    return results
+
+
+def environment_info(n_steps):
+    return {
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "gymnasium": gymnasium.__version__,
+        "numba": HAS_NUMBA,
+        "platform": platform.platform(),
+        "n_steps": n_steps,
+    }
+
+
+def find_regressions(results, baseline, tolerance=0.2):
+    """Rows whose steps/sec dropped more than tolerance below the baseline"""
+    previous = {(r["stage"], r["variant"]): r["steps_per_sec"] for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        key = (r["stage"], r["variant"])
+        if key in previous and r["steps_per_sec"] < (1 - tolerance) * previous[key]:
+            regressions.append({**r, "baseline_steps_per_sec": previous[key]})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the stages of the training loop")
+    parser.add_argument("--steps", type=int, default=100_000, help="Steps timed per stage")
+    parser.add_argument("--repeats", type=int, default=3, help="Best of this many runs per stage")
+    parser.add_argument("--stage", action="append", help="Only run this stage (repeatable)")
+    parser.add_argument("--json", metavar="PATH", help="Write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="Baseline JSON; exit 1 on regressions")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed steps/sec drop against the baseline (fraction)",
+    )
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.steps, args.repeats, args.stage)
+
+    print(f"{'stage':<12} {'variant':<26} {'s / 1M steps':>13} {'steps/sec':>13}")
+    for r in results:
+        print(
+            f"{r['stage']:<12} {r['variant']:<26} "
+            f"{r['seconds_per_million_steps']:>13.2f} {r['steps_per_sec']:>13,.0f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"environment": environment_info(args.steps), "results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for r in regressions:
+            print(
+                f"REGRESSION {r['stage']}/{r['variant']}: {r['steps_per_sec']:,.0f} steps/sec "
+                f"(baseline {r['baseline_steps_per_sec']:,.0f})"
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
@@ -13,4 +13,4 @@ if __name__ == "__main__":
     print("=" * 60)
     print()
 
-    evaluate(model_path="models/q_table_demo.pkl")
+    evaluate(model_path="models/q_table_demo.npy")
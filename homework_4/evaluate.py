@@ -1,15 +1,27 @@
 """
 Evaluate trained Q-learning agent on MountainCar
 """
+import argparse
+import glob
+import os
+import re
 import time
-from mountain_car import MountainCarEnv, QLearningAgent
+import numpy as np
+from mountain_car import MountainCarEnv, NumpyMountainCarEnv, QLearningAgent, reached_goal
+from mountain_car.recording import FrameRecorder, parse_size
 
 
-def evaluate(model_path="models/q_table_trained.pkl", n_episodes=5):
-    """Run the trained agent with visualization"""
+def evaluate(model_path="models/q_table_trained.npy", n_episodes=5, record=None, frame_skip=1, size=None):
+    """Run the trained agent with visualization
 
-    # Create environment with rendering
-    env = MountainCarEnv(render_mode="human")
+    With record="demo.gif" (or .mp4) frames are rendered off-screen and
+    encoded on a background thread instead of shown in a window; there are
+    no sleeps, so the recording takes a fraction of the real time.
+    """
+
+    # Create environment with rendering (off-screen when recording)
+    env = MountainCarEnv(render_mode="rgb_array" if record else "human")
+    recorder = FrameRecorder(record, frame_skip=frame_skip, size=size) if record else None
 
     # Create and load agent
     agent = QLearningAgent()
@@ -33,6 +45,8 @@ def evaluate(model_path="models/q_table_trained.pkl", n_episodes=5):
 
         print(f"\nEpisode {episode + 1}/{n_episodes}")
         print(f"Initial position: {state[0]:.3f}, velocity: {state[1]:.3f}")
+        if recorder:
+            recorder.add(env.render)
 
         while not done:
             # Use trained policy (no exploration)
@@ -53,13 +67,16 @@ def evaluate(model_path="models/q_table_trained.pkl", n_episodes=5):
                 position, velocity = state
                 print(f"  Step {steps}: pos={position:.3f}, vel={velocity:.3f}")
 
-            # Slow down for visualization
-            time.sleep(0.02)
+            if recorder:
+                recorder.add(env.render)
+            else:
+                # Slow down for visualization
+                time.sleep(0.02)
 
         total_steps.append(steps)
 
-        # Check if goal reached
-        if max_position >= 0.5:
+        # Check if goal reached (before the time limit)
+        if reached_goal(steps):
             successes += 1
             print(f"✓ SUCCESS! Reached goal in {steps} steps")
         else:
@@ -68,6 +85,9 @@ def evaluate(model_path="models/q_table_trained.pkl", n_episodes=5):
         print(f"Total reward: {total_reward:.1f}")
 
     env.close()
+    if recorder:
+        recorder.close()
+        print(f"\nRecording saved to {record} ({recorder.n_written} frames)")
 
     print("\n" + "=" * 60)
     print("Evaluation Summary")
@@ -75,9 +95,149 @@ def evaluate(model_path="models/q_table_trained.pkl", n_episodes=5):
     print(f"Success rate: {successes}/{n_episodes} ({successes/n_episodes*100:.1f}%)")
     print(f"Average steps: {sum(total_steps)/len(total_steps):.1f}")
     if successes > 0:
-        successful_steps = [s for i, s in enumerate(total_steps) if total_steps[i] < 200]
+        successful_steps = [s for s in total_steps if reached_goal(s)]
         print(f"Average steps (successful): {sum(successful_steps)/len(successful_steps):.1f}")
 
 
+def run_greedy_episodes(agent, n_episodes=500, seed=0):
+    """Run seeded greedy episodes for all cars at once (no rendering)
+
+    Returns the number of steps of each episode and whether it was solved
+    (see reached_goal).
+    """
+    env = NumpyMountainCarEnv(n_envs=n_episodes, seed=seed, autoreset=False)
+    states, _ = env.reset()
+    steps = np.full(n_episodes, env.max_episode_steps)
+    finished = np.zeros(n_episodes, dtype=bool)
+
+    for step in range(1, env.max_episode_steps + 1):
+        actions = agent.get_actions(states, training=False)
+        states, _, terminated, _, _ = env.step(actions)
+
+        newly_finished = terminated & ~finished
+        steps[newly_finished] = step
+        finished |= newly_finished
+        if finished.all():
+            break
+
+    return steps, reached_goal(steps, env.max_episode_steps)
+
+
+def summarize_episodes(steps, solved):
+    """Success rate and steps statistics with 95% confidence intervals"""
+    n = len(steps)
+    z = 1.96
+
+    # Wilson score interval for the success rate
+    p = solved.mean()
+    center = (p + z**2 / (2 * n)) / (1 + z**2 / n)
+    half_width = z * np.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / (1 + z**2 / n)
+
+    mean_steps = steps.mean()
+    steps_half_width = z * steps.std(ddof=1) / np.sqrt(n) if n > 1 else 0.0
+
+    return {
+        "episodes": n,
+        "success_rate": p,
+        "success_ci": (center - half_width, center + half_width),
+        "mean_steps": mean_steps,
+        "steps_ci": (mean_steps - steps_half_width, mean_steps + steps_half_width),
+        "steps_percentiles": dict(zip((5, 25, 50, 75, 95), np.percentile(steps, (5, 25, 50, 75, 95)))),
+    }
+
+
+def evaluate_headless(model_path="models/q_table_trained.npy", n_episodes=500, seed=0, verbose=True):
+    """Score a model over many seeded episodes without rendering or sleeps"""
+    agent = QLearningAgent()
+    agent.load(model_path, mmap_mode="r")
+
+    steps, solved = run_greedy_episodes(agent, n_episodes=n_episodes, seed=seed)
+    stats = summarize_episodes(steps, solved)
+
+    if verbose:
+        low, high = stats["success_ci"]
+        steps_low, steps_high = stats["steps_ci"]
+        percentiles = ", ".join(f"p{q}={v:.0f}" for q, v in stats["steps_percentiles"].items())
+
+        print("=" * 60)
+        print(f"Model: {model_path}")
+        print(f"Episodes: {n_episodes} (seed {seed})")
+        print(f"Success rate: {stats['success_rate']:.1%} (95% CI {low:.1%} - {high:.1%})")
+        print(f"Average steps: {stats['mean_steps']:.1f} (95% CI {steps_low:.1f} - {steps_high:.1f})")
+        print(f"Steps percentiles: {percentiles}")
+
+    return stats
+
+
+def evaluate_checkpoints(pattern="models/q_table_ep*.npy", n_episodes=500, seed=0):
+    """Evaluate every checkpoint matching a glob pattern on the same seeded episodes"""
+
+    def episode_number(path):
+        match = re.search(r"ep(\d+)", os.path.basename(path))
+        return int(match.group(1)) if match else -1
+
+    paths = sorted(glob.glob(pattern), key=episode_number)
+    if not paths:
+        print(f"No checkpoints match {pattern}")
+        return []
+
+    results = []
+    for path in paths:
+        stats = evaluate_headless(path, n_episodes=n_episodes, seed=seed, verbose=False)
+        results.append((path, stats))
+
+    print("=" * 60)
+    print(f"Checkpoints: {len(paths)}, episodes each: {n_episodes} (seed {seed})")
+    print("=" * 60)
+    print(f"{'checkpoint':<36} {'success':>8} {'95% CI':>15} {'avg steps':>10} {'p50':>5} {'p95':>5}")
+    for path, stats in results:
+        low, high = stats["success_ci"]
+        print(
+            f"{path:<36} {stats['success_rate']:>8.1%} {low:>7.1%}-{high:<7.1%} "
+            f"{stats['mean_steps']:>10.1f} {stats['steps_percentiles'][50]:>5.0f} "
+            f"{stats['steps_percentiles'][95]:>5.0f}"
+        )
+
+    best_path, best_stats = max(results, key=lambda r: (r[1]["success_rate"], -r[1]["mean_steps"]))
+    print("=" * 60)
+    print(f"Best checkpoint: {best_path} ({best_stats['success_rate']:.1%} success)")
+
+    return results
+
+
 if __name__ == "__main__":
-    evaluate()
+    parser = argparse.ArgumentParser(description="Evaluate trained Q-learning agent on MountainCar")
+    parser.add_argument("--model", default="models/q_table_trained.npy", help="Model to evaluate")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Statistical evaluation over many episodes, no rendering",
+    )
+    parser.add_argument(
+        "--checkpoints",
+        metavar="PATTERN",
+        help='Headless evaluation of all checkpoints matching a glob, e.g. "models/q_table_ep*.npy"',
+    )
+    parser.add_argument("--episodes", type=int, default=None, help="Number of episodes")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for headless evaluation")
+    parser.add_argument(
+        "--record",
+        metavar="PATH",
+        help="Render off-screen and save the episodes to a .gif or .mp4 instead of showing them",
+    )
+    parser.add_argument("--frame-skip", type=int, default=1, help="Keep every n-th frame when recording")
+    parser.add_argument("--size", type=parse_size, default=None, help="Recording resolution, e.g. 300x200")
+    args = parser.parse_args()
+
+    if args.checkpoints:
+        evaluate_checkpoints(args.checkpoints, n_episodes=args.episodes or 500, seed=args.seed)
+    elif args.headless:
+        evaluate_headless(args.model, n_episodes=args.episodes or 500, seed=args.seed)
+    else:
+        evaluate(
+            args.model,
+            n_episodes=args.episodes or 5,
+            record=args.record,
+            frame_skip=args.frame_skip,
+            size=args.size,
+        )
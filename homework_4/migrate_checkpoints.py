@@ -0,0 +1,14 @@
+"""
+Convert legacy pickle checkpoints (q_table_*.pkl) to the .npy + JSON format
+Only run this on pickle files you trust: loading a pickle can execute code.
+"""
+import sys
+from mountain_car.checkpoint import migrate_pickle_checkpoint
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python migrate_checkpoints.py OLD.pkl [OLD.pkl ...]")
+        sys.exit(1)
+
+    for pkl_path in sys.argv[1:]:
+        print(f"{pkl_path} -> {migrate_pickle_checkpoint(pkl_path)}")
@@ -2,7 +2,46 @@
 MountainCar Reinforcement Learning Module
 """
 
-from .environment import MountainCarEnv
-from .agent import QLearningAgent
+from .environment import MountainCarEnv, VectorMountainCarEnv, make_vector_env
+from .numpy_env import MAX_EPISODE_STEPS, NumpyMountainCarEnv, reached_goal
+from .agent import (
+    AGENTS,
+    DoubleQLearningAgent,
+    ExpectedSARSAAgent,
+    QLearningAgent,
+    SARSAAgent,
+    make_agent,
+)
+from .metrics import MetricsRecorder, load_metrics
+from .replay import REPLAY_BUFFERS, PrioritizedReplayBuffer, ReplayBuffer, make_replay_buffer
+from .discretizer import (
+    UniformDiscretizer,
+    BinEdgeDiscretizer,
+    TileCodingDiscretizer,
+    discretizer_from_config,
+)
 
-__all__ = ["MountainCarEnv", "QLearningAgent"]
\ No newline at end of file
+__all__ = [
+    "MountainCarEnv",
+    "VectorMountainCarEnv",
+    "NumpyMountainCarEnv",
+    "MAX_EPISODE_STEPS",
+    "reached_goal",
+    "make_vector_env",
+    "QLearningAgent",
+    "SARSAAgent",
+    "ExpectedSARSAAgent",
+    "DoubleQLearningAgent",
+    "AGENTS",
+    "make_agent",
+    "MetricsRecorder",
+    "load_metrics",
+    "ReplayBuffer",
+    "PrioritizedReplayBuffer",
+    "REPLAY_BUFFERS",
+    "make_replay_buffer",
+    "UniformDiscretizer",
+    "BinEdgeDiscretizer",
+    "TileCodingDiscretizer",
+    "discretizer_from_config",
+]
\ No newline at end of file
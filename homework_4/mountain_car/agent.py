@@ -1,12 +1,35 @@
 """
-Q-learning agent for MountainCar
+Tabular learners for MountainCar: Q-learning, SARSA, Expected SARSA, Double Q
 """
 import numpy as np
-import pickle
+
+from . import kernels
+from .checkpoint import load_checkpoint, save_checkpoint
+from .discretizer import UniformDiscretizer, discretizer_from_config
+
+# State space bounds for MountainCar
+MOUNTAIN_CAR_BOUNDS = (
+    (-1.2, 0.6),  # position
+    (-0.07, 0.07),  # velocity
+)
 
 
 class QLearningAgent:
-    """Q-learning agent with discrete state space"""
+    """Q-learning agent with discrete state space
+
+    States are mapped to flat Q-table rows by a discretizer (uniform bins by
+    default). Tile-coding discretizers return several active rows per state;
+    their Q-values are summed and updates are split between them.
+
+    Batched updates run through a TD kernel: Numba-compiled when numba is
+    installed, NumPy otherwise (kernel="numba"/"numpy" forces one). The
+    other tabular learners below only change how V(s') is bootstrapped.
+    """
+
+    algorithm = "q_learning"
+    method = kernels.Q_LEARNING
+    # On-policy learners bootstrap from the next action actually taken
+    on_policy = False
 
     def __init__(
         self,
@@ -17,46 +40,55 @@ class QLearningAgent:
         epsilon_decay=0.995,
         epsilon_min=0.01,
         n_bins=(20, 20),  # Bins for [position, velocity]
+        state_bounds=MOUNTAIN_CAR_BOUNDS,
+        discretizer=None,
+        kernel=None,
     ):
+        if kernel not in (None, "numba", "numpy"):
+            raise ValueError(f"Unknown kernel: {kernel}")
+        if kernel == "numba" and not kernels.HAS_NUMBA:
+            raise ValueError("kernel='numba' requires numba to be installed")
+
+        self.kernel = kernel or kernels.default_kernel()
         self.n_actions = n_actions
         self.lr = learning_rate
         self.gamma = discount_factor
         self.epsilon = epsilon
         self.epsilon_decay = epsilon_decay
         self.epsilon_min = epsilon_min
-        self.n_bins = n_bins
 
-        # Q-table: shape (position_bins, velocity_bins, n_actions)
-        self.q_table = np.zeros((*n_bins, n_actions))
+        if discretizer is None:
+            discretizer = UniformDiscretizer(state_bounds, n_bins)
+        self.set_discretizer(discretizer)
+
+        # Q-table: shape (n_states, n_actions), rows indexed by the discretizer
+        self.q_table = np.zeros((discretizer.n_states, n_actions))
 
-        # State space bounds for MountainCar
-        self.state_bounds = [
-            (-1.2, 0.6),  # position
-            (-0.07, 0.07),  # velocity
-        ]
+    def set_discretizer(self, discretizer):
+        """Use a different state discretizer (the Q-table must match it)"""
+        self.discretizer = discretizer
+        self.n_bins = discretizer.n_bins
+        self.state_bounds = getattr(discretizer, "bounds", None)
+        self._tiled = discretizer.n_tilings > 1
 
     def discretize_state(self, state):
-        """Convert continuous state to discrete bin indices"""
-        position, velocity = state
-        bounds = self.state_bounds
-
-        # Discretize each dimension
-        position_bin = int(
-            np.clip(
-                (position - bounds[0][0]) / (bounds[0][1] - bounds[0][0]) * self.n_bins[0],
-                0,
-                self.n_bins[0] - 1,
-            )
-        )
-        velocity_bin = int(
-            np.clip(
-                (velocity - bounds[1][0]) / (bounds[1][1] - bounds[1][0]) * self.n_bins[1],
-                0,
-                self.n_bins[1] - 1,
-            )
-        )
+        """Convert continuous state to its Q-table row (or rows, for tile coding)"""
+        return self.discretizer(state)
 
-        return (position_bin, velocity_bin)
+    def discretize_states(self, states):
+        """Convert a batch of continuous states to Q-table rows"""
+        return self.discretizer(states)
+
+    def _rows(self, table, discrete_states):
+        """Action values of discretized state(s) in one table"""
+        q = table[discrete_states]
+        if self._tiled:
+            q = q.sum(axis=-2)
+        return q
+
+    def q_values(self, discrete_states):
+        """Action values for discretized state(s), shape (..., n_actions)"""
+        return self._rows(self.q_table, discrete_states)
 
     def get_action(self, state, training=True):
         """Select action using epsilon-greedy policy"""
@@ -65,47 +97,238 @@ class QLearningAgent:
 
         # Exploit: choose best action
         discrete_state = self.discretize_state(state)
-        return np.argmax(self.q_table[discrete_state])
+        return np.argmax(self.q_values(discrete_state))
+
+    def get_actions(self, states, training=True):
+        """Select one epsilon-greedy action per state in a batch"""
+        discrete_states = self.discretize_states(states)
+        actions = np.argmax(self.q_values(discrete_states), axis=-1)
 
-    def update(self, state, action, reward, next_state, done):
-        """Update Q-table using Q-learning update rule"""
+        if training:
+            explore = np.random.random(len(actions)) < self.epsilon
+            random_actions = np.random.randint(self.n_actions, size=len(actions))
+            actions = np.where(explore, random_actions, actions)
+
+        return actions
+
+    def update(self, state, action, reward, next_state, done, next_action=None):
+        """Update Q-table for one transition (next_action is used by SARSA)"""
+        self._update_one(self.q_table, self.q_table, state, action, reward, next_state, done, next_action)
+
+    def _update_one(self, q, q_eval, state, action, reward, next_state, done, next_action):
+        if self.method == kernels.SARSA and next_action is None:
+            raise ValueError("SARSA needs the next action (a') of the transition")
         discrete_state = self.discretize_state(state)
         discrete_next_state = self.discretize_state(next_state)
 
         # Current Q-value
-        current_q = self.q_table[discrete_state][action]
+        current_q = self._rows(q, discrete_state)[action]
 
         # Target Q-value
         if done:
             target_q = reward
         else:
-            target_q = reward + self.gamma * np.max(self.q_table[discrete_next_state])
+            q_eval_next = self._rows(q_eval, discrete_next_state) if self.method == kernels.DOUBLE_Q else None
+            next_value = kernels.next_values(
+                self.method, self._rows(q, discrete_next_state), next_action, self.epsilon, q_eval_next
+            )
+            target_q = reward + self.gamma * next_value
 
-        # Q-learning update
-        self.q_table[discrete_state][action] += self.lr * (target_q - current_q)
+        # TD update (split evenly between active tiles)
+        q[discrete_state, action] += self.lr / self.discretizer.n_tilings * (target_q - current_q)
 
-    def decay_epsilon(self):
-        """Decay exploration rate"""
-        self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay)
+    def update_batch(self, states, actions, rewards, next_states, dones, next_actions=None, weights=None):
+        """Apply the update to a batch of transitions (s, a, r, s', done) at once
 
-    def save(self, filepath):
-        """Save Q-table and parameters"""
-        data = {
-            "q_table": self.q_table,
-            "epsilon": self.epsilon,
-            "n_bins": self.n_bins,
-            "state_bounds": self.state_bounds,
+        weights optionally scale each transition's step. Returns the TD errors.
+        """
+        return self._update_batch(
+            self.q_table, self.q_table, states, actions, rewards, next_states, dones, next_actions, weights
+        )
+
+    def _update_batch(self, q, q_eval, states, actions, rewards, next_states, dones, next_actions, weights):
+        discrete_states = self.discretize_states(states)
+        discrete_next_states = self.discretize_states(next_states)
+
+        if not self._tiled:
+            return kernels.td_update(
+                self.kernel,
+                q,
+                q_eval,
+                discrete_states,
+                actions,
+                rewards,
+                discrete_next_states,
+                next_actions,
+                dones,
+                self.lr,
+                self.gamma,
+                self.epsilon,
+                self.method,
+                weights,
+            )
+
+        # Tile coding: several active rows per state, always on the NumPy path
+        actions = np.asarray(actions)
+        current_q = self._rows(q, discrete_states)[np.arange(len(actions)), actions]
+        q_eval_next = self._rows(q_eval, discrete_next_states) if self.method == kernels.DOUBLE_Q else None
+        next_value = kernels.next_values(
+            self.method, self._rows(q, discrete_next_states), next_actions, self.epsilon, q_eval_next
+        )
+        target_q = rewards + self.gamma * next_value * (1 - np.asarray(dones, dtype=float))
+        td_errors = target_q - current_q
+        steps = td_errors if weights is None else td_errors * weights
+        lr = self.lr / self.discretizer.n_tilings
+        kernels.add_td_at(q, discrete_states, actions[:, None], steps[:, None], lr)
+        return td_errors
+
+    def learn_from_buffer(self, buffer, batch_size=64):
+        """One minibatch update from a replay buffer (see mountain_car.replay)
+
+        Prioritized buffers get the new TD errors back as priorities.
+        """
+        (states, actions, rewards, next_states, dones), indices, weights = buffer.sample(batch_size)
+        td_errors = self.update_batch(states, actions, rewards, next_states, dones, weights=weights)
+        buffer.update_priorities(indices, td_errors)
+        return td_errors
+
+    def decay_epsilon(self, n_episodes=1):
+        """Decay exploration rate (once per finished episode)"""
+        self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay**n_episodes)
+
+    def get_state(self):
+        """Learned values and exploration rate (for resuming training)"""
+        return {
+            "algorithm": self.algorithm,
+            "q_table": np.array(self.q_table),
+            "epsilon": float(self.epsilon),
+            "discretizer": self.discretizer.get_config(),
         }
-        with open(filepath, "wb") as f:
-            pickle.dump(data, f)
+
+    def set_state(self, state):
+        """Restore a snapshot taken with get_state()"""
+        if state["algorithm"] != self.algorithm:
+            raise ValueError(f"State is for {state['algorithm']}, not {self.algorithm}")
+        self.set_discretizer(discretizer_from_config(state["discretizer"]))
+        self.q_table = np.array(state["q_table"])
+        self.epsilon = state["epsilon"]
+
+    def save(self, filepath):
+        """Save Q-table (.npy) and parameters (JSON sidecar)"""
+        save_checkpoint(
+            filepath,
+            self.q_table,
+            {
+                "algorithm": self.algorithm,
+                "epsilon": float(self.epsilon),
+                "n_actions": self.n_actions,
+                "discretizer": self.discretizer.get_config(),
+            },
+        )
         print(f"Agent saved to {filepath}")
 
-    def load(self, filepath):
-        """Load Q-table and parameters"""
-        with open(filepath, "rb") as f:
-            data = pickle.load(f)
-        self.q_table = data["q_table"]
-        self.epsilon = data["epsilon"]
-        self.n_bins = data["n_bins"]
-        self.state_bounds = data["state_bounds"]
-        print(f"Agent loaded from {filepath}")
\ No newline at end of file
+    def load(self, filepath, mmap_mode=None):
+        """Load Q-table and parameters
+
+        mmap_mode="r" maps the Q-table read-only instead of copying it, so
+        many evaluation processes can share one file.
+        """
+        q_table, metadata = load_checkpoint(filepath, mmap_mode=mmap_mode)
+        self.set_discretizer(discretizer_from_config(metadata["discretizer"]))
+        self.n_actions = metadata["n_actions"]
+        self.q_table = q_table
+        self.epsilon = metadata["epsilon"]
+        print(f"Agent loaded from {filepath}")
+
+
+class SARSAAgent(QLearningAgent):
+    """SARSA: bootstraps from Q(s', a') for the next action actually taken"""
+
+    algorithm = "sarsa"
+    method = kernels.SARSA
+    on_policy = True
+
+
+class ExpectedSARSAAgent(QLearningAgent):
+    """Expected SARSA: bootstraps from the expected Q(s', .) under epsilon-greedy"""
+
+    algorithm = "expected_sarsa"
+    method = kernels.EXPECTED_SARSA
+
+
+class DoubleQLearningAgent(QLearningAgent):
+    """Double Q-learning: two tables, each evaluates the other's greedy action
+
+    Each transition updates one randomly chosen table. Actions are greedy
+    with respect to the average of both, which is also what q_table returns
+    and what save() writes.
+    """
+
+    algorithm = "double_q"
+    method = kernels.DOUBLE_Q
+
+    @property
+    def q_table(self):
+        return (self.q_table_a + self.q_table_b) / 2
+
+    @q_table.setter
+    def q_table(self, value):
+        self.q_table_a = np.array(value, dtype=float)
+        self.q_table_b = self.q_table_a.copy()
+
+    def q_values(self, discrete_states):
+        return (self._rows(self.q_table_a, discrete_states) + self._rows(self.q_table_b, discrete_states)) / 2
+
+    def update(self, state, action, reward, next_state, done, next_action=None):
+        q, q_eval = (self.q_table_a, self.q_table_b)
+        if np.random.random() < 0.5:
+            q, q_eval = q_eval, q
+        self._update_one(q, q_eval, state, action, reward, next_state, done, next_action)
+
+    def update_batch(self, states, actions, rewards, next_states, dones, next_actions=None, weights=None):
+        states, actions, rewards, next_states, dones = (
+            np.asarray(x) for x in (states, actions, rewards, next_states, dones)
+        )
+        weights = np.ones(len(actions)) if weights is None else np.asarray(weights)
+        td_errors = np.zeros(len(actions))
+        update_a = np.random.random(len(actions)) < 0.5
+        for mask, q, q_eval in (
+            (update_a, self.q_table_a, self.q_table_b),
+            (~update_a, self.q_table_b, self.q_table_a),
+        ):
+            if mask.any():
+                td_errors[mask] = self._update_batch(
+                    q,
+                    q_eval,
+                    states[mask],
+                    actions[mask],
+                    rewards[mask],
+                    next_states[mask],
+                    dones[mask],
+                    None,
+                    weights[mask],
+                )
+        return td_errors
+
+    def get_state(self):
+        state = super().get_state()
+        state["q_table"] = self.q_table_a.copy()
+        state["q_table_b"] = self.q_table_b.copy()
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        self.q_table_b = np.array(state["q_table_b"])
+
+
+AGENTS = {
+    agent.algorithm: agent
+    for agent in (QLearningAgent, SARSAAgent, ExpectedSARSAAgent, DoubleQLearningAgent)
+}
+
+
+def make_agent(algorithm="q_learning", **params):
+    """Create a tabular learner by name (see AGENTS)"""
+    if algorithm not in AGENTS:
+        raise ValueError(f"Unknown algorithm: {algorithm} (choose from {', '.join(AGENTS)})")
+    return AGENTS[algorithm](**params)
@@ -0,0 +1,144 @@
+"""
+Q-table checkpoints: .npy array + JSON metadata sidecar (no pickle)
+
+A checkpoint "models/q_table.npy" is stored as two files:
+- models/q_table.npy  - the Q-table, shape (n_states, n_actions)
+- models/q_table.json - epsilon, discretizer config, format version
+
+Loading never unpickles anything, and the Q-table can be memory-mapped
+(mmap_mode="r") so several evaluation processes share one copy.
+
+Full training state for resuming (agent, metrics windows, RNG and
+environment state) goes to a single .npz with a JSON "__meta__" entry.
+All files are written atomically (temp file + rename), so a run killed
+while saving leaves the previous checkpoint intact.
+"""
+import json
+import os
+import pickle
+import tempfile
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+def metadata_path(path):
+    """JSON sidecar path for a checkpoint"""
+    return os.path.splitext(path)[0] + ".json"
+
+
+def atomic_write(path, write, mode="wb"):
+    """Call write(f) on a temp file next to path, then rename it over path"""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def save_checkpoint(path, q_table, metadata):
+    """Write the Q-table and its metadata sidecar"""
+    if not path.endswith(".npy"):
+        raise ValueError(f"Checkpoint path must end with .npy: {path}")
+
+    atomic_write(path, lambda f: np.save(f, np.asarray(q_table), allow_pickle=False))
+    atomic_write(
+        metadata_path(path),
+        lambda f: json.dump({"format_version": FORMAT_VERSION, **metadata}, f, indent=2),
+        mode="w",
+    )
+
+
+def load_checkpoint(path, mmap_mode=None):
+    """Read a checkpoint, returns (q_table, metadata)"""
+    if path.endswith(".pkl"):
+        raise ValueError(
+            f"{path} is a legacy pickle checkpoint, which is unsafe to load. "
+            f"Convert it once with: python migrate_checkpoints.py {path}"
+        )
+
+    with open(metadata_path(path)) as f:
+        metadata = json.load(f)
+    if metadata.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported checkpoint format: {metadata.get('format_version')}")
+
+    q_table = np.load(path, mmap_mode=mmap_mode, allow_pickle=False)
+    return q_table, metadata
+
+
+def migrate_pickle_checkpoint(pkl_path, npy_path=None):
+    """Convert a legacy pickle checkpoint (trusted files only) to the .npy format"""
+    npy_path = npy_path or os.path.splitext(pkl_path)[0] + ".npy"
+
+    with open(pkl_path, "rb") as f:
+        data = pickle.load(f)
+
+    q_table = np.asarray(data["q_table"])
+    n_actions = q_table.shape[-1]
+    discretizer = data.get("discretizer") or {
+        "type": "uniform",
+        "bounds": [list(b) for b in data["state_bounds"]],
+        "n_bins": list(data["n_bins"]),
+    }
+
+    save_checkpoint(
+        npy_path,
+        q_table.reshape(-1, n_actions),
+        {"epsilon": float(data["epsilon"]), "n_actions": n_actions, "discretizer": discretizer},
+    )
+    return npy_path
+
+
+def save_training_state(path, state):
+    """Write a nested dict of arrays and JSON values to one .npz (atomically)"""
+    arrays = {}
+    meta = _split_arrays(state, arrays, prefix="")
+    meta_json = json.dumps({"format_version": FORMAT_VERSION, **meta}, default=_json_default)
+    atomic_write(path, lambda f: np.savez(f, __meta__=np.array(meta_json), **arrays))
+
+
+def load_training_state(path):
+    """Read a dict written by save_training_state"""
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data["__meta__"]))
+        arrays = {key: data[key] for key in data.files if key != "__meta__"}
+
+    if meta.pop("format_version", None) != FORMAT_VERSION:
+        raise ValueError(f"Unsupported training state format: {path}")
+    return _join_arrays(meta, arrays)
+
+
+def _split_arrays(tree, arrays, prefix):
+    """Move ndarrays out of a nested dict, leaving {"__array__": key} markers"""
+    meta = {}
+    for key, value in tree.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            meta[key] = _split_arrays(value, arrays, prefix=path + "/")
+        elif isinstance(value, np.ndarray):
+            arrays[path] = value
+            meta[key] = {"__array__": path}
+        else:
+            meta[key] = value
+    return meta
+
+
+def _join_arrays(meta, arrays):
+    if isinstance(meta, dict):
+        if set(meta) == {"__array__"}:
+            return arrays[meta["__array__"]]
+        return {key: _join_arrays(value, arrays) for key, value in meta.items()}
+    return meta
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
@@ -0,0 +1,139 @@
+"""
+State discretizers mapping continuous states to flat Q-table indices
+"""
+import numpy as np
+
+
+class UniformDiscretizer:
+    """Equal-width bins per dimension, any number of dimensions
+
+    Scale and offset are precomputed, so discretizing is one multiply-add,
+    one clip and one dot product for a single state or a whole batch.
+    """
+
+    n_tilings = 1
+
+    def __init__(self, bounds, n_bins):
+        self.bounds = [tuple(b) for b in bounds]
+        self.n_bins = tuple(int(n) for n in n_bins)
+        if len(self.bounds) != len(self.n_bins):
+            raise ValueError("bounds and n_bins must have the same length")
+
+        low = np.array([b[0] for b in self.bounds], dtype=float)
+        high = np.array([b[1] for b in self.bounds], dtype=float)
+        n = np.array(self.n_bins)
+
+        self.scale = n / (high - low)
+        self.offset = -low * self.scale
+        self.max_bin = n - 1
+        self.strides = _strides(self.n_bins)
+        self.n_states = int(np.prod(self.n_bins))
+
+    def __call__(self, states):
+        """Flat index for a state (scalar) or a batch of states (1-D array)"""
+        bins = np.clip(np.asarray(states) * self.scale + self.offset, 0, self.max_bin)
+        return bins.astype(np.intp) @ self.strides
+
+    def get_config(self):
+        return {"type": "uniform", "bounds": _bounds_config(self.bounds), "n_bins": list(self.n_bins)}
+
+
+class BinEdgeDiscretizer:
+    """Non-uniform bins given by the interior edges of each dimension
+
+    Values below the first edge fall in bin 0, values at or above the last
+    edge in the last bin, so each dimension has len(edges) + 1 bins.
+    """
+
+    n_tilings = 1
+
+    def __init__(self, edges):
+        self.edges = [np.asarray(e, dtype=float) for e in edges]
+        self.n_bins = tuple(len(e) + 1 for e in self.edges)
+        self.strides = _strides(self.n_bins)
+        self.n_states = int(np.prod(self.n_bins))
+
+    def __call__(self, states):
+        """Flat index for a state (scalar) or a batch of states (1-D array)"""
+        states = np.asarray(states)
+        index = 0
+        for dim, (edges, stride) in enumerate(zip(self.edges, self.strides)):
+            index = index + np.searchsorted(edges, states[..., dim], side="right") * stride
+        return index
+
+    def get_config(self):
+        return {"type": "bin_edges", "edges": [e.tolist() for e in self.edges]}
+
+
+class TileCodingDiscretizer:
+    """Several overlapping uniform grids (tilings), each shifted by a fraction of a bin
+
+    Returns one active tile per tiling; the agent sums the Q-values of the
+    active tiles. Each tiling has n_bins + 1 tiles per dimension so the
+    shifted grids still cover the whole state space.
+    """
+
+    def __init__(self, bounds, n_bins, n_tilings=8):
+        self.bounds = [tuple(b) for b in bounds]
+        self.n_bins = tuple(int(n) for n in n_bins)
+        self.n_tilings = int(n_tilings)
+        if len(self.bounds) != len(self.n_bins):
+            raise ValueError("bounds and n_bins must have the same length")
+
+        low = np.array([b[0] for b in self.bounds], dtype=float)
+        high = np.array([b[1] for b in self.bounds], dtype=float)
+        n = np.array(self.n_bins)
+        tiles = tuple(b + 1 for b in self.n_bins)
+
+        self.scale = n / (high - low)
+        self.offset = -low * self.scale
+        self.max_tile = n
+
+        # Asymmetric displacement (1, 3, 5, ...) per dimension, in units of a bin
+        dims = 2 * np.arange(len(self.n_bins)) + 1
+        self.tiling_offsets = (np.arange(self.n_tilings)[:, None] * dims / self.n_tilings) % 1.0
+
+        self.strides = _strides(tiles)
+        self.tiles_per_tiling = int(np.prod(tiles))
+        self.tiling_base = np.arange(self.n_tilings) * self.tiles_per_tiling
+        self.n_states = self.n_tilings * self.tiles_per_tiling
+
+    def __call__(self, states):
+        """Active tile indices, shape (n_tilings,) or (batch, n_tilings)"""
+        scaled = np.asarray(states) * self.scale + self.offset
+        coords = np.clip(scaled[..., None, :] + self.tiling_offsets, 0, self.max_tile)
+        return coords.astype(np.intp) @ self.strides + self.tiling_base
+
+    def get_config(self):
+        return {
+            "type": "tile_coding",
+            "bounds": _bounds_config(self.bounds),
+            "n_bins": list(self.n_bins),
+            "n_tilings": self.n_tilings,
+        }
+
+
+def discretizer_from_config(config):
+    """Rebuild a discretizer from the dict returned by get_config()"""
+    config = dict(config)
+    kind = config.pop("type")
+    if kind == "uniform":
+        return UniformDiscretizer(**config)
+    if kind == "bin_edges":
+        return BinEdgeDiscretizer(**config)
+    if kind == "tile_coding":
+        return TileCodingDiscretizer(**config)
+    raise ValueError(f"Unknown discretizer type: {kind}")
+
+
+def _bounds_config(bounds):
+    """JSON-friendly copy of per-dimension (low, high) bounds"""
+    return [[float(low), float(high)] for low, high in bounds]
+
+
+def _strides(shape):
+    """Row-major strides for flattening multi-dimensional bin indices"""
+    strides = np.ones(len(shape), dtype=np.intp)
+    for i in range(len(shape) - 2, -1, -1):
+        strides[i] = strides[i + 1] * shape[i + 1]
+    return strides
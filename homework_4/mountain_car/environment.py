@@ -1,26 +1,78 @@
 """
 MountainCar environment wrapper
 """
-import gymnasium as gym
+import numpy as np
+
+from .numpy_env import NumpyMountainCarEnv
+
+# gymnasium is imported lazily so the batched NumPy backend doesn't pay for it
 
 
 class MountainCarEnv:
-    """Wrapper for the MountainCar-v0 environment"""
+    """Wrapper for the MountainCar-v0 environment
 
-    def __init__(self, render_mode="human"):
-        self.env = gym.make("MountainCar-v0", render_mode=render_mode)
-        self.action_space = self.env.action_space
-        self.observation_space = self.env.observation_space
+    backend="gymnasium" wraps gym.make("MountainCar-v0"); backend="numpy"
+    runs the same dynamics on NumpyMountainCarEnv (no rendering).
+    """
 
-    def reset(self):
-        """Reset the environment"""
-        observation, info = self.env.reset()
-        return observation, info
+    def __init__(self, render_mode="human", backend="gymnasium"):
+        self.backend = backend
+
+        if backend == "gymnasium":
+            import gymnasium as gym
+
+            self.env = gym.make("MountainCar-v0", render_mode=render_mode)
+            self.action_space = self.env.action_space
+            self.observation_space = self.env.observation_space
+        elif backend == "numpy":
+            if render_mode is not None:
+                raise ValueError("The numpy backend does not support rendering")
+            from gymnasium import spaces
+
+            self.env = NumpyMountainCarEnv(n_envs=1, autoreset=False)
+            # Same spaces as MountainCar-v0
+            self.action_space = spaces.Discrete(3)
+            self.observation_space = spaces.Box(
+                low=np.array([self.env.min_position, -self.env.max_speed], dtype=np.float32),
+                high=np.array([self.env.max_position, self.env.max_speed], dtype=np.float32),
+                dtype=np.float32,
+            )
+        else:
+            raise ValueError(f"Unknown backend: {backend}")
+
+    def reset(self, seed=None):
+        """Reset the environment (seed re-seeds its random number generator)"""
+        if self.backend == "numpy":
+            if seed is not None:
+                self.env.rng = np.random.default_rng(seed)
+            observation, info = self.env.reset()
+            return observation[0], info
+        return self.env.reset(seed=seed)
 
     def step(self, action):
         """Take a step in the environment"""
+        if self.backend == "numpy":
+            observation, reward, terminated, truncated, info = self.env.step([action])
+            return observation[0], reward[0], bool(terminated[0]), bool(truncated[0]), info
         return self.env.step(action)
 
+    def render(self):
+        """Current frame as an RGB array (render_mode="rgb_array" only)"""
+        return self.env.render()
+
+    def get_state(self):
+        """Snapshot of simulator state and RNG (for resuming)"""
+        if self.backend == "numpy":
+            return self.env.get_state()
+        return _get_gym_env_state(self.env)
+
+    def set_state(self, state):
+        """Restore a snapshot taken with get_state()"""
+        if self.backend == "numpy":
+            self.env.set_state(state)
+        else:
+            _set_gym_env_state(self.env, state)
+
     def close(self):
         """Close the environment"""
         self.env.close()
@@ -32,4 +84,88 @@ class MountainCarEnv:
             "position": position,
             "velocity": velocity,
             "distance_to_goal": 0.5 - position,  # Goal is at position 0.5
-        }
\ No newline at end of file
+        }
+
+
+class VectorMountainCarEnv:
+    """N MountainCar-v0 copies stepped in lockstep (batched API)"""
+
+    def __init__(self, n_envs=8, seed=None):
+        import gymnasium as gym
+
+        self.n_envs = n_envs
+        self.seed = seed
+        self.env = gym.make_vec(
+            "MountainCar-v0",
+            num_envs=n_envs,
+            vectorization_mode="sync",
+            vector_kwargs={"autoreset_mode": gym.vector.AutoresetMode.SAME_STEP},
+        )
+        self.action_space = self.env.single_action_space
+        self.observation_space = self.env.single_observation_space
+
+    def reset(self):
+        """Reset all environments"""
+        observations, info = self.env.reset(seed=self.seed)
+        return observations, info
+
+    def step(self, actions):
+        """Take one step in every environment
+
+        Finished environments are reset within the same step, so the returned
+        observations already belong to the next episode. The observations the
+        finished episodes ended in are available as ``info["final_obs"]``
+        (equal to the returned observations for environments still running).
+        """
+        observations, rewards, terminated, truncated, info = self.env.step(actions)
+
+        final_obs = observations.copy()
+        if "_final_obs" in info:
+            mask = info["_final_obs"]
+            final_obs[mask] = np.stack(info["final_obs"][mask])
+        info["final_obs"] = final_obs
+
+        return observations, rewards, terminated, truncated, info
+
+    def get_state(self):
+        """Snapshot of every environment's simulator state and RNG"""
+        return {str(i): _get_gym_env_state(env) for i, env in enumerate(self.env.envs)}
+
+    def set_state(self, state):
+        """Restore a snapshot taken with get_state()"""
+        self.env.reset()
+        for i, env in enumerate(self.env.envs):
+            _set_gym_env_state(env, state[str(i)], reset=False)
+
+    def close(self):
+        """Close all environments"""
+        self.env.close()
+
+
+def _get_gym_env_state(env):
+    """State of a gym.make("MountainCar-v0") env: car, TimeLimit counter, RNG"""
+    unwrapped = env.unwrapped
+    return {
+        "state": [float(x) for x in unwrapped.state],
+        "elapsed_steps": env.get_wrapper_attr("_elapsed_steps") or 0,
+        "rng": unwrapped.np_random.bit_generator.state,
+    }
+
+
+def _set_gym_env_state(env, state, reset=True):
+    if reset:
+        # Wrappers refuse step() before the first reset()
+        env.reset()
+    unwrapped = env.unwrapped
+    unwrapped.state = np.array(state["state"])
+    env.set_wrapper_attr("_elapsed_steps", state["elapsed_steps"])
+    unwrapped.np_random.bit_generator.state = state["rng"]
+
+
+def make_vector_env(n_envs=8, seed=None, backend="gymnasium"):
+    """Create a batched MountainCar environment for the given backend"""
+    if backend == "gymnasium":
+        return VectorMountainCarEnv(n_envs=n_envs, seed=seed)
+    if backend == "numpy":
+        return NumpyMountainCarEnv(n_envs=n_envs, seed=seed)
+    raise ValueError(f"Unknown backend: {backend}")
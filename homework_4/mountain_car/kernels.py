@@ -0,0 +1,152 @@
+"""
+Batched temporal-difference update kernels for tabular learners
+
+The same update rule is available as a Numba-compiled loop (exact online
+updates, one transition after another) and as a NumPy fallback (targets
+from the Q-table before the batch, updates accumulated with np.add.at).
+Numba is optional: without it every learner uses the NumPy kernel.
+"""
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Bootstrap rules, passed to the kernels as integer codes
+Q_LEARNING = 0  # max_a' Q(s', a')
+SARSA = 1  # Q(s', a') for the action actually taken next
+EXPECTED_SARSA = 2  # E[Q(s', a')] under the epsilon-greedy policy
+DOUBLE_Q = 3  # Q_eval(s', argmax_a' Q(s', a'))
+
+HAS_NUMBA = numba is not None
+
+
+def default_kernel():
+    """Return "numba" when it is installed, "numpy" otherwise"""
+    return "numba" if HAS_NUMBA else "numpy"
+
+
+def next_values(method, q_next, next_actions=None, epsilon=0.0, q_eval_next=None):
+    """Bootstrap value V(s') from the action values of the next state(s)
+
+    q_next has shape (..., n_actions); works for one state or a batch.
+    """
+    if method == Q_LEARNING:
+        return q_next.max(axis=-1)
+    if method == SARSA:
+        if next_actions is None:
+            raise ValueError("SARSA needs the next actions (a') of the transitions")
+        next_actions = np.asarray(next_actions)
+        return np.take_along_axis(q_next, next_actions[..., None], axis=-1)[..., 0]
+    if method == EXPECTED_SARSA:
+        return epsilon * q_next.mean(axis=-1) + (1 - epsilon) * q_next.max(axis=-1)
+    if method == DOUBLE_Q:
+        best = q_next.argmax(axis=-1)
+        return np.take_along_axis(q_eval_next, best[..., None], axis=-1)[..., 0]
+    raise ValueError(f"Unknown method: {method}")
+
+
+def td_update_numpy(
+    q, q_eval, states, actions, rewards, next_states, next_actions, dones, weights, lr, gamma, epsilon, method
+):
+    """Vectorized TD update of q for a batch of transitions (flat state indices)"""
+    q_eval_next = q_eval[next_states] if method == DOUBLE_Q else None
+    values = next_values(method, q[next_states], next_actions, epsilon, q_eval_next)
+    targets = rewards + gamma * values * (1 - dones.astype(float))
+
+    td_errors = targets - q[states, actions]
+    add_td_at(q, states, actions, weights * td_errors, lr)
+    return td_errors
+
+
+def add_td_at(q, rows, actions, td_errors, lr):
+    """Apply lr-scaled TD errors to q[rows, actions] for a whole batch
+
+    All errors in a batch are computed from the same table, so k updates of
+    one (state, action) pair add up to a k * lr step, which overshoots and
+    diverges when many environments visit the same state. Each update's step
+    is therefore capped at 1 / k: the entry moves at most to the mean target.
+    """
+    rows, actions, td_errors = np.broadcast_arrays(rows, actions, td_errors)
+    flat = (rows * q.shape[1] + actions).ravel()
+    counts = np.bincount(flat, minlength=q.size)[flat]
+    np.add.at(q.reshape(-1), flat, td_errors.ravel() * np.minimum(lr, 1.0 / counts))
+
+
+if HAS_NUMBA:
+
+    @numba.njit(cache=True)
+    def _td_update_numba(
+        q, q_eval, states, actions, rewards, next_states, next_actions, dones, weights, lr, gamma, epsilon, method
+    ):
+        n_actions = q.shape[1]
+        td_errors = np.empty(len(actions))
+        for i in range(len(actions)):
+            s = states[i]
+            a = actions[i]
+            target = rewards[i]
+
+            if not dones[i]:
+                s2 = next_states[i]
+                best = 0
+                for b in range(1, n_actions):
+                    if q[s2, b] > q[s2, best]:
+                        best = b
+
+                if method == Q_LEARNING:
+                    value = q[s2, best]
+                elif method == SARSA:
+                    value = q[s2, next_actions[i]]
+                elif method == EXPECTED_SARSA:
+                    value = (1 - epsilon) * q[s2, best] + epsilon * q[s2].mean()
+                else:
+                    value = q_eval[s2, best]
+                target += gamma * value
+
+            td_errors[i] = target - q[s, a]
+            q[s, a] += lr * weights[i] * td_errors[i]
+        return td_errors
+
+
+def td_update(
+    kernel,
+    q,
+    q_eval,
+    states,
+    actions,
+    rewards,
+    next_states,
+    next_actions,
+    dones,
+    lr,
+    gamma,
+    epsilon,
+    method,
+    weights=None,
+):
+    """Update q in place for a batch of transitions using the chosen kernel
+
+    states/next_states are flat Q-table rows (one per transition); q_eval is
+    the table that evaluates the greedy next action for Double Q (pass q
+    otherwise). next_actions are only read by SARSA, which requires them.
+    weights scale each transition's step (importance sampling for
+    prioritized replay).
+
+    Returns the TD error of every transition (before its update).
+    """
+    actions = np.asarray(actions, dtype=np.intp)
+    rewards = np.asarray(rewards, dtype=float)
+    dones = np.asarray(dones, dtype=bool)
+    if next_actions is None:
+        if method == SARSA:
+            raise ValueError("SARSA needs the next actions (a') of the transitions")
+        # Not read, the kernels just need an array
+        next_actions = actions
+    next_actions = np.asarray(next_actions, dtype=np.intp)
+    weights = np.ones(len(actions)) if weights is None else np.asarray(weights, dtype=float)
+
+    update = _td_update_numba if kernel == "numba" else td_update_numpy
+    return update(
+        q, q_eval, states, actions, rewards, next_states, next_actions, dones, weights, lr, gamma, epsilon, method
+    )
@@ -0,0 +1,154 @@
+"""
+Streaming training metrics with fixed-size rolling windows
+"""
+import os
+
+import numpy as np
+
+from .checkpoint import atomic_write
+
+COLUMNS = ("episode", "reward", "steps", "max_position", "success", "epsilon")
+
+
+class MetricsRecorder:
+    """Rolling per-episode metrics plus an append-only CSV log
+
+    The last `window` episodes are kept in ring buffers with running sums, so
+    averages and success rate are O(1) and memory stays constant however long
+    training runs. Every episode is appended as a CSV row to `path` (flushed
+    every `flush_every` episodes), so progress can be tailed while training
+    and a crashed run still has its history.
+    """
+
+    def __init__(self, path=None, window=100, flush_every=100, resume=False):
+        self.path = path
+        self.window = window
+        self.flush_every = flush_every
+
+        self.episode = 0
+        self.rewards = np.zeros(window)
+        self.steps = np.zeros(window)
+        self.max_positions = np.zeros(window)
+        self.successes = np.zeros(window)
+        self._sums = np.zeros(3)  # reward, steps, max_position
+        self._success_count = 0
+
+        self._file = None
+        if path is not None:
+            if resume and os.path.exists(path):
+                self._replay(path)
+                self._file = open(path, "a")
+            else:
+                self._file = open(path, "w")
+                self._file.write(",".join(COLUMNS) + "\n")
+
+    def _replay(self, path):
+        """Restore the episode counter and windows from an existing log"""
+        data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+        rows = data[-self.window:]
+        self.episode = int(data[-1, 0]) - len(rows) if len(data) else 0
+        for row in rows:
+            self._push(*row[1:5])
+
+    def _push(self, reward, steps, max_position, success):
+        i = self.episode % self.window
+        if self.episode >= self.window:
+            self._sums -= (self.rewards[i], self.steps[i], self.max_positions[i])
+            self._success_count -= self.successes[i]
+
+        self.rewards[i] = reward
+        self.steps[i] = steps
+        self.max_positions[i] = max_position
+        self.successes[i] = success
+        self._sums += (reward, steps, max_position)
+        self._success_count += success
+        self.episode += 1
+
+    def record(self, reward, steps, max_position, success, epsilon=float("nan")):
+        """Add one finished episode"""
+        self._push(reward, steps, max_position, bool(success))
+
+        if self._file is not None:
+            self._file.write(
+                f"{self.episode},{reward:g},{steps:d},{max_position:.6f},{int(success)},{epsilon:.6f}\n"
+            )
+            if self.episode % self.flush_every == 0:
+                self._file.flush()
+
+    def flush(self):
+        """Write buffered log rows to disk"""
+        if self._file is not None:
+            self._file.flush()
+
+    def get_state(self):
+        """Snapshot of the episode counter and rolling windows (for resuming)"""
+        return {
+            "episode": self.episode,
+            "rewards": self.rewards.copy(),
+            "steps": self.steps.copy(),
+            "max_positions": self.max_positions.copy(),
+            "successes": self.successes.copy(),
+        }
+
+    def set_state(self, state):
+        """Restore a snapshot taken with get_state()
+
+        Log rows recorded after the snapshot (by a run that was killed
+        later) are dropped, so the log matches the restored episode counter.
+        """
+        self.episode = int(state["episode"])
+        self.rewards[:] = state["rewards"]
+        self.steps[:] = state["steps"]
+        self.max_positions[:] = state["max_positions"]
+        self.successes[:] = state["successes"]
+
+        n = self.count
+        self._sums = np.array(
+            [self.rewards[:n].sum(), self.steps[:n].sum(), self.max_positions[:n].sum()]
+        )
+        self._success_count = self.successes[:n].sum()
+
+        if self._file is not None:
+            self._file.close()
+            with open(self.path) as f:
+                lines = f.readlines()
+            kept = [lines[0]] + [line for line in lines[1:] if int(line.split(",", 1)[0]) <= self.episode]
+            atomic_write(self.path, lambda f: f.writelines(kept), mode="w")
+            self._file = open(self.path, "a")
+
+    @property
+    def count(self):
+        """Episodes currently in the window"""
+        return min(self.episode, self.window)
+
+    @property
+    def avg_reward(self):
+        return self._sums[0] / max(self.count, 1)
+
+    @property
+    def avg_steps(self):
+        return self._sums[1] / max(self.count, 1)
+
+    @property
+    def avg_max_position(self):
+        return self._sums[2] / max(self.count, 1)
+
+    @property
+    def best_position(self):
+        return self.max_positions[: self.count].max() if self.count else np.nan
+
+    @property
+    def success_rate(self):
+        return self._success_count / max(self.count, 1)
+
+    def close(self):
+        """Flush and close the log file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def load_metrics(path):
+    """Read a metrics log into a dict of column arrays"""
+    data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    return {name: data[:, i] for i, name in enumerate(COLUMNS)}
@@ -0,0 +1,116 @@
+"""
+Pure-NumPy MountainCar simulator for batches of cars
+"""
+import numpy as np
+
+# MountainCar-v0's time limit
+MAX_EPISODE_STEPS = 200
+
+
+def reached_goal(steps, max_episode_steps=MAX_EPISODE_STEPS):
+    """Whether episodes that lasted `steps` steps were solved (scalar or array)
+
+    Solved means the goal was reached before the time limit: an episode that
+    ends on the last step counts as a failure, even if the car terminated.
+    """
+    return np.asarray(steps) < max_episode_steps
+
+
+class NumpyMountainCarEnv:
+    """MountainCar-v0 dynamics computed on NumPy arrays for many cars at once
+
+    Reproduces gymnasium's MountainCar-v0: same physics, same reset
+    distribution (position uniform in [-0.6, -0.4], velocity 0) and the same
+    200-step truncation. No rendering.
+
+    With ``autoreset=True`` finished cars are reset within the same step, like
+    VectorMountainCarEnv, and the observations they ended in are returned as
+    ``info["final_obs"]``.
+    """
+
+    min_position = -1.2
+    max_position = 0.6
+    max_speed = 0.07
+    goal_position = 0.5
+    goal_velocity = 0.0
+    force = 0.001
+    gravity = 0.0025
+
+    def __init__(self, n_envs=1, seed=None, max_episode_steps=MAX_EPISODE_STEPS, autoreset=True):
+        self.n_envs = n_envs
+        self.max_episode_steps = max_episode_steps
+        self.autoreset = autoreset
+        self.n_actions = 3
+        self.rng = np.random.default_rng(seed)
+
+        # Kept in float64 like gymnasium, observations are returned as float32
+        self.state = np.zeros((n_envs, 2))
+        self.elapsed_steps = np.zeros(n_envs, dtype=int)
+
+    def _reset_cars(self, mask):
+        """Draw new start states for the selected cars"""
+        n = int(np.count_nonzero(mask))
+        self.state[mask, 0] = self.rng.uniform(low=-0.6, high=-0.4, size=n)
+        self.state[mask, 1] = 0.0
+        self.elapsed_steps[mask] = 0
+
+    def reset(self):
+        """Reset all cars"""
+        self._reset_cars(np.ones(self.n_envs, dtype=bool))
+        return self.state.astype(np.float32), {}
+
+    def step(self, actions):
+        """Advance every car by one step"""
+        position = self.state[:, 0]
+        velocity = self.state[:, 1]
+
+        velocity += (np.asarray(actions) - 1) * self.force + np.cos(3 * position) * (-self.gravity)
+        np.clip(velocity, -self.max_speed, self.max_speed, out=velocity)
+        position += velocity
+        np.clip(position, self.min_position, self.max_position, out=position)
+        velocity[(position == self.min_position) & (velocity < 0)] = 0.0
+
+        self.elapsed_steps += 1
+        terminated = (position >= self.goal_position) & (velocity >= self.goal_velocity)
+        # Like gymnasium's TimeLimit: the last step truncates even if the car also terminated
+        truncated = self.elapsed_steps >= self.max_episode_steps
+        rewards = np.full(self.n_envs, -1.0)
+
+        observations = self.state.astype(np.float32)
+        info = {}
+
+        if self.autoreset:
+            info["final_obs"] = observations.copy()
+            dones = terminated | truncated
+            if dones.any():
+                self._reset_cars(dones)
+                observations[dones] = self.state[dones]
+
+        return observations, rewards, terminated, truncated, info
+
+    def get_state(self):
+        """Snapshot of car states, step counters and RNG (for resuming)"""
+        return {
+            "state": self.state.copy(),
+            "elapsed_steps": self.elapsed_steps.copy(),
+            "rng": self.rng.bit_generator.state,
+        }
+
+    def set_state(self, state):
+        """Restore a snapshot taken with get_state()"""
+        self.state[:] = state["state"]
+        self.elapsed_steps[:] = state["elapsed_steps"]
+        self.rng.bit_generator.state = state["rng"]
+
+    def close(self):
+        """Nothing to release"""
+
+    def get_state_info(self, observation):
+        """Get human-readable state information (single or batched)"""
+        position = observation[..., 0]
+        velocity = observation[..., 1]
+        return {
+            "position": position,
+            "velocity": velocity,
+            "distance_to_goal": self.goal_position - position,
+        }
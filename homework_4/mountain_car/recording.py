@@ -0,0 +1,152 @@
+"""
+Record rgb_array frames to a GIF or video on a background thread
+"""
+import os
+import queue
+import threading
+
+import numpy as np
+
+# MountainCar-v0 renders at 30 frames per second
+RENDER_FPS = 30
+
+
+class FrameRecorder:
+    """Buffer rendered frames and encode them without blocking the episode loop
+
+    Every frame_skip-th frame is kept, optionally resized to size=(width,
+    height) (nearest neighbour), and handed to a writer thread through a
+    bounded queue. The playback rate defaults to RENDER_FPS / frame_skip, so
+    the recording plays in real time.
+
+    ".gif" files are written with Pillow; other extensions (".mp4", ...)
+    with imageio (mp4 also needs imageio-ffmpeg). Both are optional
+    dependencies, only imported when recording.
+    """
+
+    def __init__(self, path, frame_skip=1, size=None, fps=None, max_queue=256):
+        if frame_skip < 1:
+            raise ValueError(f"frame_skip must be >= 1, got {frame_skip}")
+
+        self.path = path
+        self.frame_skip = frame_skip
+        self.size = size
+        self.fps = fps or RENDER_FPS / frame_skip
+        self.n_frames = 0  # frames offered
+        self.n_written = 0  # frames handed to the writer
+
+        self._writer = _make_writer(path, self.fps)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="frame-writer", daemon=True)
+        self._thread.start()
+
+    def add(self, frame):
+        """Offer one frame (skipped frames are dropped right away)
+
+        frame is an rgb array or a function returning one, e.g. env.render;
+        a function is only called for frames that are kept, so skipped
+        frames are never rendered.
+        """
+        if self._error is not None:
+            raise RuntimeError(f"Writing {self.path} failed") from self._error
+
+        keep = self.n_frames % self.frame_skip == 0
+        self.n_frames += 1
+        if keep:
+            if callable(frame):
+                frame = frame()
+            self._queue.put(resize_frame(np.asarray(frame), self.size))
+            self.n_written += 1
+
+    def _run(self):
+        finished = False  # the close() sentinel was taken off the queue
+        try:
+            while (frame := self._queue.get()) is not None:
+                self._writer.append(frame)
+            finished = True
+            self._writer.close()
+        except Exception as e:  # surfaced by add()/close()
+            self._error = e
+            # Keep draining so producers never block on a dead writer
+            while not finished:
+                finished = self._queue.get() is None
+
+    def close(self):
+        """Finish encoding and wait for the file to be written"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        if self._error is not None:
+            raise RuntimeError(f"Writing {self.path} failed") from self._error
+
+
+def resize_frame(frame, size):
+    """Nearest-neighbour resize of an (H, W, 3) frame to size=(width, height)"""
+    if size is None:
+        return frame
+    width, height = size
+    rows = np.arange(height) * frame.shape[0] // height
+    cols = np.arange(width) * frame.shape[1] // width
+    return frame[rows[:, None], cols]
+
+
+def parse_size(text):
+    """Parse a "WIDTHxHEIGHT" command line argument"""
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+class _GifWriter:
+    """Pillow GIF writer: frames are palettized as they arrive, saved at close"""
+
+    def __init__(self, path, fps):
+        from PIL import Image
+
+        self._image = Image
+        self.path = path
+        self.duration = round(1000 / fps)
+        self.frames = []
+
+    def append(self, frame):
+        self.frames.append(self._image.fromarray(frame).convert("P", palette=self._image.Palette.ADAPTIVE))
+
+    def close(self):
+        if not self.frames:
+            return
+        self.frames[0].save(
+            self.path, save_all=True, append_images=self.frames[1:], duration=self.duration, loop=0
+        )
+
+
+class _ImageioWriter:
+    """imageio writer (video formats), streams frames to the encoder"""
+
+    def __init__(self, path, fps):
+        import imageio
+
+        self._writer = imageio.get_writer(path, fps=fps)
+
+    def append(self, frame):
+        self._writer.append_data(frame)
+
+    def close(self):
+        self._writer.close()
+
+
+def _make_writer(path, fps):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    try:
+        if path.lower().endswith(".gif"):
+            return _GifWriter(path, fps)
+        return _ImageioWriter(path, fps)
+    except ImportError as e:
+        raise ImportError(
+            f"Recording {path} needs an optional dependency: "
+            "pillow for .gif, imageio (+ imageio-ffmpeg for .mp4) for video"
+        ) from e
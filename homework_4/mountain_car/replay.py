@@ -0,0 +1,202 @@
+"""
+Experience replay buffers backed by preallocated NumPy ring arrays
+"""
+import numpy as np
+
+
+class ReplayBuffer:
+    """Fixed-capacity FIFO buffer of transitions (s, a, r, s', done)
+
+    Transitions live in preallocated arrays indexed as a ring, so memory is
+    constant and adding a batch from a vector env is a single fancy-indexed
+    write. Minibatches are sampled uniformly.
+    """
+
+    kind = "uniform"
+
+    def __init__(self, capacity=50_000, state_dim=2, seed=None):
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+
+        self.states = np.zeros((capacity, state_dim), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.intp)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_dim), dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=bool)
+
+        self.pos = 0  # next slot to write
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, states, actions, rewards, next_states, dones):
+        """Store a batch of transitions, overwriting the oldest when full
+
+        Returns the slots that were written.
+        """
+        n = len(actions)
+        indices = (self.pos + np.arange(n)) % self.capacity
+        self.states[indices] = states
+        self.actions[indices] = actions
+        self.rewards[indices] = rewards
+        self.next_states[indices] = next_states
+        self.dones[indices] = dones
+
+        self.pos = (self.pos + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+        return indices
+
+    def _batch(self, indices):
+        return (
+            self.states[indices],
+            self.actions[indices],
+            self.rewards[indices],
+            self.next_states[indices],
+            self.dones[indices],
+        )
+
+    def sample(self, batch_size):
+        """Draw a minibatch, returns (transitions, indices, weights)"""
+        indices = self.rng.integers(self.size, size=batch_size)
+        return self._batch(indices), indices, np.ones(batch_size)
+
+    def update_priorities(self, indices, td_errors):
+        """Uniform sampling ignores TD errors"""
+
+    def get_state(self):
+        """Snapshot of the stored transitions and sampling RNG (for resuming)"""
+        return {
+            "kind": self.kind,
+            "pos": self.pos,
+            "size": self.size,
+            "rng": self.rng.bit_generator.state,
+            "states": self.states.copy(),
+            "actions": self.actions.copy(),
+            "rewards": self.rewards.copy(),
+            "next_states": self.next_states.copy(),
+            "dones": self.dones.copy(),
+        }
+
+    def set_state(self, state):
+        """Restore a snapshot taken with get_state()"""
+        if state["kind"] != self.kind or len(state["actions"]) != self.capacity:
+            raise ValueError(
+                f"Replay state is a {state['kind']} buffer of {len(state['actions'])}, "
+                f"not {self.kind} of {self.capacity}"
+            )
+        self.pos = int(state["pos"])
+        self.size = int(state["size"])
+        self.rng.bit_generator.state = state["rng"]
+        for name in ("states", "actions", "rewards", "next_states", "dones"):
+            getattr(self, name)[:] = state[name]
+
+
+class SumTree:
+    """Binary tree of priorities where each node holds the sum of its children
+
+    Leaves are stored at tree[size:2 * size] (size padded to a power of two).
+    Updating priorities and finding the leaf for a prefix sum are O(log n)
+    and both are vectorized over whole batches.
+    """
+
+    def __init__(self, capacity):
+        self.depth = max(int(np.ceil(np.log2(capacity))), 1)
+        self.size = 2**self.depth
+        self.tree = np.zeros(2 * self.size)
+
+    @property
+    def total(self):
+        return self.tree[1]
+
+    def update(self, indices, priorities):
+        """Set leaf priorities and recompute the sums above them"""
+        nodes = np.asarray(indices) + self.size
+        self.tree[nodes] = priorities
+        # Duplicate parents just write the same sum twice, no need to dedupe
+        for _ in range(self.depth):
+            nodes = nodes // 2
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values):
+        """Leaf index i such that sum(p[:i]) <= value < sum(p[:i + 1]), per value"""
+        values = np.array(values, dtype=float)
+        nodes = np.ones(len(values), dtype=np.intp)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            go_right = values >= self.tree[left]
+            values -= np.where(go_right, self.tree[left], 0.0)
+            nodes = left + go_right
+        return nodes - self.size
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """Proportional prioritized replay (Schaul et al., 2016)
+
+    Transitions are sampled with probability p_i^alpha / sum_k p_k^alpha,
+    where p_i = |TD error| + eps, using a SumTree. New transitions get the
+    highest priority seen so far, so each is replayed at least once soon.
+    The bias is corrected with importance-sampling weights
+    (N * P(i))^-beta / max_j w_j; anneal beta towards 1 over training.
+    """
+
+    kind = "prioritized"
+
+    def __init__(self, capacity=50_000, state_dim=2, seed=None, alpha=0.6, beta=0.4, eps=1e-3):
+        super().__init__(capacity, state_dim, seed)
+        self.alpha = alpha
+        self.beta_start = beta
+        self.beta = beta
+        self.eps = eps
+        self.max_priority = 1.0
+        self.tree = SumTree(capacity)
+
+    def add(self, states, actions, rewards, next_states, dones):
+        indices = super().add(states, actions, rewards, next_states, dones)
+        self.tree.update(indices, self.max_priority)
+        return indices
+
+    def sample(self, batch_size):
+        # One uniform draw per equal slice of the total priority (stratified)
+        total = self.tree.total
+        bounds = np.linspace(0.0, total, batch_size + 1)
+        values = self.rng.uniform(bounds[:-1], bounds[1:])
+        # Rounding can push a value onto an empty padding leaf
+        indices = np.minimum(self.tree.find(np.minimum(values, total * (1 - 1e-12))), self.size - 1)
+
+        probs = self.tree.tree[indices + self.tree.size] / total
+        weights = (self.size * probs) ** -self.beta
+        return self._batch(indices), indices, weights / weights.max()
+
+    def update_priorities(self, indices, td_errors):
+        """Re-prioritize sampled transitions by their latest TD errors"""
+        priorities = (np.abs(td_errors) + self.eps) ** self.alpha
+        self.tree.update(indices, priorities)
+        self.max_priority = max(self.max_priority, priorities.max())
+
+    def anneal_beta(self, fraction):
+        """Move beta linearly from its initial value (fraction=0) to 1 (fraction=1)"""
+        self.beta = self.beta_start + (1.0 - self.beta_start) * min(fraction, 1.0)
+
+    def get_state(self):
+        state = super().get_state()
+        state["tree"] = self.tree.tree.copy()
+        state["max_priority"] = float(self.max_priority)
+        state["beta"] = float(self.beta)
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        self.tree.tree[:] = state["tree"]
+        self.max_priority = state["max_priority"]
+        self.beta = state["beta"]
+
+
+REPLAY_BUFFERS = {buffer.kind: buffer for buffer in (ReplayBuffer, PrioritizedReplayBuffer)}
+
+
+def make_replay_buffer(kind="uniform", **params):
+    """Create a replay buffer by name (see REPLAY_BUFFERS)"""
+    if kind not in REPLAY_BUFFERS:
+        raise ValueError(f"Unknown replay buffer: {kind} (choose from {', '.join(REPLAY_BUFFERS)})")
+    return REPLAY_BUFFERS[kind](**params)
@@ -1,14 +1,17 @@
 """
 Random agent demo - shows how a random agent performs (poorly!)
 """
+import argparse
 import time
 from mountain_car import MountainCarEnv
+from mountain_car.recording import FrameRecorder, parse_size
 
 
-def random_agent(n_episodes=3):
-    """Run random agent for comparison"""
+def random_agent(n_episodes=3, record=None, frame_skip=1, size=None):
+    """Run random agent for comparison (record="random.gif" saves it instead of showing it)"""
 
-    env = MountainCarEnv(render_mode="human")
+    env = MountainCarEnv(render_mode="rgb_array" if record else "human")
+    recorder = FrameRecorder(record, frame_skip=frame_skip, size=size) if record else None
 
     print("Random Agent Demo")
     print("=" * 60)
@@ -24,6 +27,8 @@ def random_agent(n_episodes=3):
 
         print(f"\nEpisode {episode + 1}/{n_episodes} started")
         print(f"Initial position: {observation[0]:.3f}, velocity: {observation[1]:.3f}")
+        if recorder:
+            recorder.add(env.render)
 
         done = False
         while not done:
@@ -36,7 +41,10 @@ def random_agent(n_episodes=3):
             max_position = max(max_position, observation[0])
 
             done = terminated or truncated
-            time.sleep(0.01)
+            if recorder:
+                recorder.add(env.render)
+            else:
+                time.sleep(0.01)
 
         if max_position >= 0.5:
             print(f"✓ SUCCESS! (Lucky!) Reached goal in {steps} steps")
@@ -45,7 +53,21 @@ def random_agent(n_episodes=3):
         print(f"Total reward: {total_reward:.1f}")
 
     env.close()
+    if recorder:
+        recorder.close()
+        print(f"\nRecording saved to {record} ({recorder.n_written} frames)")
 
 
 if __name__ == "__main__":
-    random_agent()
+    parser = argparse.ArgumentParser(description="Random agent baseline on MountainCar")
+    parser.add_argument("--episodes", type=int, default=3, help="Number of episodes")
+    parser.add_argument(
+        "--record",
+        metavar="PATH",
+        help="Render off-screen and save the episodes to a .gif or .mp4 instead of showing them",
+    )
+    parser.add_argument("--frame-skip", type=int, default=1, help="Keep every n-th frame when recording")
+    parser.add_argument("--size", type=parse_size, default=None, help="Recording resolution, e.g. 300x200")
+    args = parser.parse_args()
+
+    random_agent(args.episodes, record=args.record, frame_skip=args.frame_skip, size=args.size)
@@ -0,0 +1,186 @@
+"""
+Parallel hyperparameter sweep for the MountainCar Q-learning agent
+"""
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from evaluate import run_greedy_episodes
+from mountain_car import QLearningAgent
+from train import train_vectorized
+
+# Default grid: 4 x 2 x 2 x 4 = 64 configurations
+PARAM_GRID = {
+    "learning_rate": [0.05, 0.1, 0.2, 0.5],
+    "epsilon_decay": [0.99, 0.995],
+    "discount_factor": [0.95, 0.99],
+    "n_bins": [(10, 10), (20, 20), (30, 30), (40, 40)],
+}
+
+
+def grid_configs(grid=PARAM_GRID):
+    """All combinations of the grid values"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+
+
+def random_configs(n_configs, seed=0):
+    """Random search: log-uniform learning rate, uniform decay/discount, square bins"""
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(n_configs):
+        bins = int(rng.integers(10, 51))
+        configs.append(
+            {
+                "learning_rate": float(10 ** rng.uniform(-2, 0)),
+                "epsilon_decay": float(rng.uniform(0.98, 0.999)),
+                "discount_factor": float(rng.uniform(0.9, 0.999)),
+                "n_bins": (bins, bins),
+            }
+        )
+    return configs
+
+
+def run_config(config, seed, n_episodes, n_envs, eval_episodes):
+    """Train and score one configuration (runs in a worker process)"""
+    start = time.perf_counter()
+    agent, metrics = train_vectorized(
+        n_episodes=n_episodes,
+        n_envs=n_envs,
+        seed=seed,
+        backend="numpy",
+        agent_params=config,
+        verbose=False,
+        save=False,
+    )
+    _, solved = run_greedy_episodes(agent, n_episodes=eval_episodes, seed=seed + 1)
+
+    return {
+        **config,
+        "seed": seed,
+        "final_reward": float(metrics.avg_reward),
+        "success_rate": float(solved.mean()),
+        "wall_time": time.perf_counter() - start,
+        "q_table": agent.q_table,
+        "epsilon": agent.epsilon,
+    }
+
+
+def sweep(
+    configs,
+    n_episodes=2000,
+    n_envs=32,
+    eval_episodes=100,
+    seed=0,
+    max_workers=None,
+    results_path="sweep_results.csv",
+    best_model_path="models/q_table_sweep_best.npy",
+):
+    """Train every configuration in a process pool (one worker per core)
+
+    Configuration i is seeded with seed + i, so results don't depend on
+    scheduling. Writes a results table and keeps the Q-table of the best
+    configuration (highest greedy success rate, then final reward).
+    """
+    max_workers = max_workers or os.cpu_count()
+
+    print("Hyperparameter sweep")
+    print("=" * 60)
+    print(f"Configurations: {len(configs)}")
+    print(f"Workers: {max_workers}")
+    print(f"Episodes per configuration: {n_episodes}")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    results = []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(run_config, config, seed + i, n_episodes, n_envs, eval_episodes)
+            for i, config in enumerate(configs)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(
+                f"[{len(results)}/{len(configs)}] "
+                f"success={result['success_rate']:.1%} "
+                f"reward={result['final_reward']:.1f} "
+                f"time={result['wall_time']:.1f}s"
+            )
+
+    wall_time = time.perf_counter() - start
+    results.sort(key=lambda r: (r["success_rate"], r["final_reward"]), reverse=True)
+
+    # Results table
+    columns = [
+        "learning_rate",
+        "epsilon_decay",
+        "discount_factor",
+        "n_bins",
+        "seed",
+        "final_reward",
+        "success_rate",
+        "wall_time",
+    ]
+    with open(results_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+
+    print()
+    print(f"{'lr':>8} {'decay':>7} {'gamma':>7} {'bins':>9} {'reward':>8} {'success':>8} {'time':>7}")
+    for r in results[:10]:
+        print(
+            f"{r['learning_rate']:>8.3f} {r['epsilon_decay']:>7.4f} {r['discount_factor']:>7.3f} "
+            f"{str(tuple(r['n_bins'])):>9} {r['final_reward']:>8.1f} {r['success_rate']:>8.1%} "
+            f"{r['wall_time']:>6.1f}s"
+        )
+
+    # Keep the best Q-table
+    best = results[0]
+    agent = QLearningAgent(
+        learning_rate=best["learning_rate"],
+        discount_factor=best["discount_factor"],
+        epsilon_decay=best["epsilon_decay"],
+        n_bins=best["n_bins"],
+    )
+    agent.q_table = best["q_table"]
+    agent.epsilon = best["epsilon"]
+    os.makedirs(os.path.dirname(best_model_path) or ".", exist_ok=True)
+    agent.save(best_model_path)
+
+    serial_time = sum(r["wall_time"] for r in results)
+    print("=" * 60)
+    print(f"Sweep complete in {wall_time:.1f}s (serial compute: {serial_time:.1f}s)")
+    print(f"Results: {results_path}")
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hyperparameter sweep for the Q-learning agent")
+    parser.add_argument("--search", choices=["grid", "random"], default="grid")
+    parser.add_argument("--n-configs", type=int, default=64, help="Configurations for random search")
+    parser.add_argument("--episodes", type=int, default=2000, help="Training episodes per configuration")
+    parser.add_argument("--n-envs", type=int, default=32, help="Batched environments per worker")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.search == "grid":
+        configs = grid_configs()
+    else:
+        configs = random_configs(args.n_configs, seed=args.seed)
+
+    sweep(
+        configs,
+        n_episodes=args.episodes,
+        n_envs=args.n_envs,
+        seed=args.seed,
+        max_workers=args.workers,
+    )
@@ -0,0 +1,30 @@
+import pytest
+
+from benchmark_training import find_regressions, run_benchmarks
+
+
+def test_stage_benchmarks_report_rates():
+    results = run_benchmarks(n_steps=2048, repeats=1, stages=["discretize", "update"])
+
+    assert {r["stage"] for r in results} == {"discretize", "update"}
+    for r in results:
+        assert r["steps_per_sec"] > 0
+        assert r["seconds_per_million_steps"] * r["steps_per_sec"] == pytest.approx(1e6)
+
+
+def test_find_regressions_uses_tolerance():
+    baseline = {
+        "results": [
+            {"stage": "update", "variant": "single", "steps_per_sec": 1000.0},
+            {"stage": "update", "variant": "batch", "steps_per_sec": 1000.0},
+        ]
+    }
+    results = [
+        {"stage": "update", "variant": "single", "steps_per_sec": 850.0},
+        {"stage": "update", "variant": "batch", "steps_per_sec": 700.0},
+        {"stage": "metrics", "variant": "serial", "steps_per_sec": 1.0},
+    ]
+
+    regressions = find_regressions(results, baseline, tolerance=0.2)
+
+    assert [(r["variant"], r["baseline_steps_per_sec"]) for r in regressions] == [("batch", 1000.0)]
@@ -0,0 +1,64 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from mountain_car import QLearningAgent, TileCodingDiscretizer
+from mountain_car.checkpoint import metadata_path, migrate_pickle_checkpoint
+
+
+def test_save_load_round_trip(tmp_path):
+    agent = QLearningAgent(
+        discretizer=TileCodingDiscretizer([(-1.2, 0.6), (-0.07, 0.07)], (8, 8), n_tilings=4)
+    )
+    agent.q_table[:] = np.random.default_rng(0).normal(size=agent.q_table.shape)
+    agent.epsilon = 0.25
+    path = str(tmp_path / "q_table.npy")
+    agent.save(path)
+
+    loaded = QLearningAgent()
+    loaded.load(path)
+
+    np.testing.assert_array_equal(loaded.q_table, agent.q_table)
+    assert loaded.epsilon == 0.25
+    assert loaded.discretizer.get_config() == agent.discretizer.get_config()
+
+
+def test_load_memory_mapped_is_read_only(tmp_path):
+    path = str(tmp_path / "q_table.npy")
+    QLearningAgent().save(path)
+
+    agent = QLearningAgent()
+    agent.load(path, mmap_mode="r")
+
+    assert isinstance(agent.q_table, np.memmap)
+    assert agent.get_action(np.array([-0.5, 0.0]), training=False) in (0, 1, 2)
+    with pytest.raises(ValueError):
+        agent.q_table[0, 0] = 1.0
+
+
+def test_pickle_checkpoints_are_rejected_and_migrated(tmp_path):
+    q_table = np.random.default_rng(0).normal(size=(20, 20, 3))
+    pkl_path = str(tmp_path / "old.pkl")
+    with open(pkl_path, "wb") as f:
+        pickle.dump(
+            {
+                "q_table": q_table,
+                "epsilon": 0.01,
+                "n_bins": (20, 20),
+                "state_bounds": [(-1.2, 0.6), (-0.07, 0.07)],
+            },
+            f,
+        )
+
+    agent = QLearningAgent()
+    with pytest.raises(ValueError, match="legacy pickle"):
+        agent.load(pkl_path)
+
+    npy_path = migrate_pickle_checkpoint(pkl_path)
+    assert npy_path.endswith("old.npy")
+    assert metadata_path(npy_path).endswith("old.json")
+
+    agent.load(npy_path)
+    np.testing.assert_array_equal(agent.q_table, q_table.reshape(400, 3))
+    assert agent.epsilon == 0.01
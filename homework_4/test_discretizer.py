@@ -0,0 +1,84 @@
+import numpy as np
+
+from mountain_car import (
+    BinEdgeDiscretizer,
+    QLearningAgent,
+    TileCodingDiscretizer,
+    UniformDiscretizer,
+    discretizer_from_config,
+)
+
+BOUNDS = [(-1.2, 0.6), (-0.07, 0.07)]
+
+
+def reference_bins(state, bounds=BOUNDS, n_bins=(20, 20)):
+    """Original per-dimension discretization from QLearningAgent.discretize_state."""
+    return tuple(
+        int(np.clip((x - lo) / (hi - lo) * n, 0, n - 1))
+        for x, (lo, hi), n in zip(state, bounds, n_bins)
+    )
+
+
+def random_states(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # Slightly outside the bounds to exercise clipping
+    return np.column_stack([rng.uniform(-1.3, 0.7, n), rng.uniform(-0.08, 0.08, n)])
+
+
+def test_uniform_matches_original_discretization():
+    discretizer = UniformDiscretizer(BOUNDS, (20, 20))
+    states = random_states(2000)
+
+    flat = discretizer(states)
+    expected = [np.ravel_multi_index(reference_bins(s), (20, 20)) for s in states]
+
+    np.testing.assert_array_equal(flat, expected)
+    assert discretizer(states[0]) == expected[0]
+
+
+def test_uniform_supports_arbitrary_dimensionality():
+    discretizer = UniformDiscretizer([(0, 1)] * 3, (2, 3, 4))
+    assert discretizer.n_states == 24
+    assert discretizer([0.99, 0.99, 0.99]) == 23
+    assert discretizer([0.0, 0.5, 0.0]) == 4
+
+
+def test_bin_edges_non_uniform():
+    discretizer = BinEdgeDiscretizer([[-0.5, 0.0, 0.4], [0.0]])
+    assert discretizer.n_bins == (4, 2)
+    np.testing.assert_array_equal(
+        discretizer(np.array([[-1.0, -0.01], [0.0, 0.0], [0.45, 0.01]])),
+        [0, 5, 7],
+    )
+
+
+def test_tile_coding_one_active_tile_per_tiling():
+    discretizer = TileCodingDiscretizer(BOUNDS, (8, 8), n_tilings=4)
+    tiles = discretizer(random_states(100))
+
+    assert tiles.shape == (100, 4)
+    per_tiling = discretizer.tiles_per_tiling
+    for t in range(4):
+        assert np.all(tiles[:, t] // per_tiling == t)
+
+
+def test_agent_batch_and_single_paths_agree():
+    for discretizer in (None, TileCodingDiscretizer(BOUNDS, (8, 8), n_tilings=4)):
+        agent = QLearningAgent(discretizer=discretizer)
+        agent.q_table[:] = np.random.default_rng(1).normal(size=agent.q_table.shape)
+        states = random_states(50)
+
+        batch = agent.get_actions(states, training=False)
+        single = [agent.get_action(s, training=False) for s in states]
+        np.testing.assert_array_equal(batch, single)
+
+
+def test_config_round_trip():
+    for discretizer in (
+        UniformDiscretizer(BOUNDS, (10, 12)),
+        BinEdgeDiscretizer([[-0.5, 0.0], [0.0]]),
+        TileCodingDiscretizer(BOUNDS, (8, 8), n_tilings=4),
+    ):
+        rebuilt = discretizer_from_config(discretizer.get_config())
+        states = random_states(100)
+        np.testing.assert_array_equal(rebuilt(states), discretizer(states))
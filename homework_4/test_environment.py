@@ -0,0 +1,119 @@
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from mountain_car import MountainCarEnv, NumpyMountainCarEnv
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3])
+def test_numpy_backend_matches_gymnasium_trajectory(seed):
+    """Same start state and actions give the same trajectory in both backends."""
+    gym_env = gym.make("MountainCar-v0")
+    gym_obs, _ = gym_env.reset(seed=seed)
+
+    np_env = NumpyMountainCarEnv(n_envs=1, autoreset=False)
+    np_env.reset()
+    np_env.state[0] = gym_env.unwrapped.state
+
+    rng = np.random.default_rng(seed)
+    done = False
+    steps = 0
+    while not done:
+        action = int(rng.integers(3))
+        gym_obs, gym_reward, gym_terminated, gym_truncated, _ = gym_env.step(action)
+        np_obs, np_reward, np_terminated, np_truncated, _ = np_env.step([action])
+
+        np.testing.assert_allclose(np_obs[0], gym_obs, atol=1e-6)
+        assert np_reward[0] == gym_reward
+        assert np_terminated[0] == gym_terminated
+        assert np_truncated[0] == gym_truncated
+
+        done = gym_terminated or gym_truncated
+        steps += 1
+
+    assert steps <= 200
+    gym_env.close()
+
+
+def test_numpy_backend_reaches_goal_like_gymnasium():
+    """A bang-bang policy that solves the task terminates at the same step."""
+    gym_env = gym.make("MountainCar-v0")
+    gym_obs, _ = gym_env.reset(seed=7)
+
+    np_env = NumpyMountainCarEnv(n_envs=1, autoreset=False)
+    np_env.reset()
+    np_env.state[0] = gym_env.unwrapped.state
+
+    for _ in range(200):
+        action = 2 if gym_obs[1] >= 0 else 0
+        gym_obs, _, gym_terminated, gym_truncated, _ = gym_env.step(action)
+        _, _, np_terminated, _, _ = np_env.step([action])
+        assert np_terminated[0] == gym_terminated
+        if gym_terminated or gym_truncated:
+            break
+
+    assert gym_terminated
+    gym_env.close()
+
+
+def test_numpy_backend_goal_on_last_step_is_terminated_and_truncated():
+    """gymnasium's TimeLimit also truncates a car that reaches the goal at step 200."""
+    gym_env = gym.make("MountainCar-v0")
+    gym_env.reset(seed=0)
+    gym_env.unwrapped.state = np.array([0.49, 0.02])
+    gym_env.set_wrapper_attr("_elapsed_steps", 199)
+
+    np_env = NumpyMountainCarEnv(n_envs=1, autoreset=False)
+    np_env.reset()
+    np_env.state[0] = [0.49, 0.02]
+    np_env.elapsed_steps[0] = 199
+
+    _, _, gym_terminated, gym_truncated, _ = gym_env.step(2)
+    _, _, np_terminated, np_truncated, _ = np_env.step([2])
+
+    assert gym_terminated and gym_truncated
+    assert np_terminated[0] == gym_terminated
+    assert np_truncated[0] == gym_truncated
+    gym_env.close()
+
+
+def test_numpy_backend_reset_distribution_and_truncation():
+    env = NumpyMountainCarEnv(n_envs=1000, seed=0)
+    obs, _ = env.reset()
+
+    assert obs.shape == (1000, 2)
+    assert obs.dtype == np.float32
+    assert np.all((obs[:, 0] >= -0.6) & (obs[:, 0] <= -0.4))
+    assert np.all(obs[:, 1] == 0)
+
+    # Doing nothing never reaches the goal: every car is truncated at step 200
+    for step in range(200):
+        obs, rewards, terminated, truncated, info = env.step(np.ones(1000, dtype=int))
+        assert not terminated.any()
+        assert truncated.all() == (step == 199)
+
+    # Truncated cars were reset within the same step
+    assert np.all(obs[:, 1] == 0)
+    assert not np.array_equal(info["final_obs"], obs)
+    assert np.all(env.elapsed_steps == 0)
+
+
+def test_single_env_numpy_backend_keeps_api():
+    env = MountainCarEnv(render_mode=None, backend="numpy")
+    observation, _ = env.reset()
+    assert observation.shape == (2,)
+
+    observation, reward, terminated, truncated, _ = env.step(2)
+    assert observation.shape == (2,)
+    assert reward == -1.0
+    assert terminated is False and truncated is False
+
+    info = env.get_state_info(observation)
+    assert info["distance_to_goal"] == pytest.approx(0.5 - observation[0])
+
+    gym_env = gym.make("MountainCar-v0")
+    assert env.action_space == gym_env.action_space
+    assert env.observation_space == gym_env.observation_space
+    assert env.observation_space.contains(observation)
+    assert env.action_space.contains(env.action_space.sample())
+    gym_env.close()
@@ -0,0 +1,79 @@
+import functools
+
+import numpy as np
+import pytest
+
+import evaluate
+from evaluate import evaluate_checkpoints, run_greedy_episodes, summarize_episodes
+from mountain_car import NumpyMountainCarEnv, QLearningAgent, reached_goal
+
+
+def bang_bang_agent():
+    """Push in the direction of the velocity (solves MountainCar)"""
+    agent = QLearningAgent(n_bins=(20, 20))
+    velocity_bins = np.arange(agent.q_table.shape[0]) % 20
+    agent.q_table[:] = 0
+    agent.q_table[velocity_bins >= 10, 2] = 1
+    agent.q_table[velocity_bins < 10, 0] = 1
+    return agent
+
+
+def test_wilson_interval_at_the_extremes():
+    steps = np.full(50, 200)
+
+    none = summarize_episodes(steps, np.zeros(50, dtype=bool))
+    assert none["success_rate"] == 0
+    low, high = none["success_ci"]
+    assert low == pytest.approx(0, abs=1e-12) and 0 < high < 0.1
+
+    every = summarize_episodes(steps, np.ones(50, dtype=bool))
+    low, high = every["success_ci"]
+    assert 0.9 < low < 1 and high == pytest.approx(1)
+
+
+def test_summary_statistics():
+    steps = np.arange(100, 200)
+    stats = summarize_episodes(steps, steps < 150)
+
+    assert stats["episodes"] == 100
+    assert stats["success_rate"] == 0.5
+    assert list(stats["steps_percentiles"]) == [5, 25, 50, 75, 95]
+    assert stats["steps_percentiles"][50] == np.percentile(steps, 50)
+    low, high = stats["steps_ci"]
+    assert low < stats["mean_steps"] == 149.5 < high
+
+
+def test_greedy_episodes_are_seeded():
+    agent = bang_bang_agent()
+    steps, solved = run_greedy_episodes(agent, n_episodes=20, seed=3)
+
+    assert solved.all()
+    assert np.all(steps < 200)
+    np.testing.assert_array_equal(run_greedy_episodes(agent, n_episodes=20, seed=3)[0], steps)
+
+
+def test_goal_on_the_last_step_is_not_solved(monkeypatch):
+    steps, _ = run_greedy_episodes(bang_bang_agent(), n_episodes=20, seed=3)
+    limit = int(steps.max())
+
+    # Same episodes with a time limit that ends when the slowest car reaches the goal
+    monkeypatch.setattr(evaluate, "NumpyMountainCarEnv", functools.partial(NumpyMountainCarEnv, max_episode_steps=limit))
+    limited_steps, solved = run_greedy_episodes(bang_bang_agent(), n_episodes=20, seed=3)
+
+    np.testing.assert_array_equal(limited_steps, steps)
+    np.testing.assert_array_equal(solved, steps < limit)
+    assert not solved.all()
+    assert list(reached_goal([199, 200])) == [True, False]
+
+
+def test_evaluate_checkpoints_orders_by_episode_and_picks_best(tmp_path, capsys):
+    QLearningAgent(n_bins=(20, 20)).save(str(tmp_path / "q_table_ep100.npy"))
+    bang_bang_agent().save(str(tmp_path / "q_table_ep20.npy"))
+
+    results = evaluate_checkpoints(str(tmp_path / "q_table_ep*.npy"), n_episodes=20)
+
+    paths = [path for path, _ in results]
+    assert paths == [str(tmp_path / "q_table_ep20.npy"), str(tmp_path / "q_table_ep100.npy")]
+    assert results[0][1]["success_rate"] == 1.0
+    assert results[1][1]["success_rate"] == 0.0
+    assert f"Best checkpoint: {tmp_path / 'q_table_ep20.npy'}" in capsys.readouterr().out
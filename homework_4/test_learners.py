@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from benchmark_learners import random_transitions
+from mountain_car import AGENTS, TileCodingDiscretizer, make_agent
+from mountain_car.kernels import HAS_NUMBA
+
+
+def distinct_transitions(agent, n=200, seed=0):
+    """Transitions whose (state, action) pairs are all different"""
+    states, actions, rewards, next_states, dones, next_actions = random_transitions(20 * n, seed)
+    rows = agent.discretize_states(states)
+    _, first = np.unique(rows * agent.n_actions + actions, return_index=True)
+    keep = np.sort(first)[:n]
+    return tuple(x[keep] for x in (states, actions, rewards, next_states, dones, next_actions))
+
+
+@pytest.mark.parametrize("algorithm", ["q_learning", "sarsa", "expected_sarsa"])
+def test_numpy_kernel_matches_reference_updates(algorithm):
+    agent = make_agent(algorithm, kernel="numpy", epsilon=0.3)
+    agent.q_table = np.random.default_rng(1).normal(size=agent.q_table.shape)
+    transitions = distinct_transitions(agent)
+
+    # Targets are bootstrapped from the table as it was before the batch
+    before = agent.q_table.copy()
+    expected = before.copy()
+    for state, action, reward, next_state, done, next_action in zip(*transitions):
+        q_next = before[agent.discretize_state(next_state)]
+        if algorithm == "q_learning":
+            value = q_next.max()
+        elif algorithm == "sarsa":
+            value = q_next[next_action]
+        else:
+            value = 0.3 * q_next.mean() + 0.7 * q_next.max()
+        target = reward + (0.0 if done else agent.gamma * value)
+        row = agent.discretize_state(state)
+        expected[row, action] += agent.lr * (target - before[row, action])
+
+    agent.update_batch(*transitions)
+
+    np.testing.assert_allclose(agent.q_table, expected)
+
+
+@pytest.mark.skipif(not HAS_NUMBA, reason="numba not installed")
+@pytest.mark.parametrize("algorithm", ["q_learning", "sarsa", "expected_sarsa"])
+def test_numba_kernel_matches_update_loop(algorithm):
+    batched = make_agent(algorithm, kernel="numba", epsilon=0.3)
+    looped = make_agent(algorithm, kernel="numba", epsilon=0.3)
+    transitions = random_transitions(2000)
+
+    for _ in range(3):
+        batched.update_batch(*transitions)
+        for transition in zip(*transitions):
+            looped.update(*transition)
+
+    np.testing.assert_allclose(batched.q_table, looped.q_table)
+
+
+def test_numpy_kernel_caps_repeated_updates():
+    agent = make_agent("q_learning", kernel="numpy", learning_rate=0.5)
+    state = np.array([[-0.5, 0.0]])
+    n = 64
+    agent.update_batch(
+        np.repeat(state, n, axis=0), np.zeros(n, dtype=int), -np.ones(n), np.repeat(state, n, axis=0), np.ones(n)
+    )
+
+    row = agent.discretize_state(state[0])
+    # Summing 64 updates of lr=0.5 would give -32
+    assert agent.q_table[row, 0] == pytest.approx(-1.0)
+
+
+@pytest.mark.parametrize("algorithm", list(AGENTS))
+def test_agents_round_trip(tmp_path, algorithm):
+    agent = make_agent(algorithm, kernel="numpy")
+    agent.update_batch(*random_transitions(500))
+    path = str(tmp_path / "q_table.npy")
+    agent.save(path)
+
+    loaded = make_agent(algorithm)
+    loaded.load(path)
+
+    np.testing.assert_allclose(loaded.q_table, agent.q_table)
+
+
+@pytest.mark.parametrize("kernel", ["numpy", "numba"] if HAS_NUMBA else ["numpy"])
+@pytest.mark.parametrize("n_tilings", [1, 4])
+def test_sarsa_requires_next_actions(kernel, n_tilings):
+    discretizer = TileCodingDiscretizer([(-1.2, 0.6), (-0.07, 0.07)], (8, 8), n_tilings=n_tilings)
+    agent = make_agent("sarsa", kernel=kernel, discretizer=discretizer)
+    states, actions, rewards, next_states, dones, _ = random_transitions(10)
+
+    with pytest.raises(ValueError, match="SARSA needs"):
+        agent.update_batch(states, actions, rewards, next_states, dones)
+    with pytest.raises(ValueError, match="SARSA needs"):
+        agent.update(states[0], actions[0], rewards[0], next_states[0], False)
+    assert not agent.q_table.any()
@@ -0,0 +1,49 @@
+import numpy as np
+
+from mountain_car import MetricsRecorder, load_metrics
+
+
+def fake_episodes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    steps = rng.integers(90, 201, n)
+    return [(-float(s), int(s), float(rng.uniform(-0.6, 0.55)), s < 200) for s in steps]
+
+
+def test_rolling_window_matches_slices():
+    episodes = fake_episodes(350)
+    metrics = MetricsRecorder(window=100)
+
+    for i, episode in enumerate(episodes, 1):
+        metrics.record(*episode)
+        recent = episodes[max(0, i - 100) : i]
+        assert metrics.avg_reward == np.mean([e[0] for e in recent])
+        assert metrics.avg_steps == np.mean([e[1] for e in recent])
+        assert np.isclose(metrics.avg_max_position, np.mean([e[2] for e in recent]))
+        assert metrics.best_position == max(e[2] for e in recent)
+        assert metrics.success_rate == np.mean([e[3] for e in recent])
+
+
+def test_log_is_streamed_and_resumable(tmp_path):
+    path = str(tmp_path / "metrics.csv")
+    episodes = fake_episodes(250)
+
+    metrics = MetricsRecorder(path, window=100, flush_every=50)
+    for episode in episodes[:150]:
+        metrics.record(*episode, epsilon=0.5)
+
+    # Flushed rows are readable while training is still running
+    assert len(load_metrics(path)["episode"]) == 150
+    metrics.close()
+
+    resumed = MetricsRecorder(path, window=100, resume=True)
+    assert resumed.episode == 150
+    assert resumed.avg_steps == np.mean([e[1] for e in episodes[50:150]])
+
+    for episode in episodes[150:]:
+        resumed.record(*episode, epsilon=0.5)
+    resumed.close()
+
+    data = load_metrics(path)
+    np.testing.assert_array_equal(data["episode"], np.arange(1, 251))
+    np.testing.assert_array_equal(data["steps"], [e[1] for e in episodes])
+    assert resumed.avg_steps == np.mean([e[1] for e in episodes[150:]])
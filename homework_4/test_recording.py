@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from mountain_car.recording import FrameRecorder, parse_size, resize_frame
+
+
+def frames(n, height=40, width=60):
+    """Frames that differ from each other (so GIF encoding keeps them all)"""
+    for i in range(n):
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        frame[:, i % width] = 255
+        yield frame
+
+
+def test_resize_frame_nearest_neighbour():
+    frame = np.arange(4 * 6).reshape(4, 6, 1).repeat(3, axis=2)
+
+    resized = resize_frame(frame, (3, 2))
+
+    assert resized.shape == (2, 3, 3)
+    np.testing.assert_array_equal(resized[..., 0], [[0, 2, 4], [12, 14, 16]])
+    assert resize_frame(frame, None) is frame
+    assert parse_size("300x200") == (300, 200)
+
+
+def test_gif_recording_applies_frame_skip_and_size(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    path = str(tmp_path / "out" / "episode.gif")
+
+    recorder = FrameRecorder(path, frame_skip=3, size=(30, 20))
+    for frame in frames(30):
+        recorder.add(frame)
+    recorder.close()
+
+    assert recorder.n_frames == 30
+    assert recorder.n_written == 10
+    with Image.open(path) as gif:
+        assert gif.size == (30, 20)
+        assert gif.n_frames == 10
+        assert gif.info["duration"] == 100  # 30 fps / 3
+
+
+def test_writer_errors_are_raised(tmp_path):
+    pytest.importorskip("PIL")
+    recorder = FrameRecorder(str(tmp_path / "episode.gif"))
+    recorder.add(np.zeros((4, 4)))  # not an RGB frame: fails when palettized
+
+    with pytest.raises(RuntimeError, match="episode.gif"):
+        recorder.close()
+
+
+def test_random_agent_recording(tmp_path):
+    pytest.importorskip("pygame")
+    pytest.importorskip("PIL")
+    from random_agent import random_agent
+
+    path = str(tmp_path / "random.gif")
+    random_agent(n_episodes=1, record=path, frame_skip=10, size=(150, 100))
+
+    assert (tmp_path / "random.gif").stat().st_size > 0
+
+
+class _NullWriter:
+    def append(self, frame):
+        pass
+
+    def close(self):
+        pass
+
+
+class _FailingCloseWriter(_NullWriter):
+    def close(self):
+        raise OSError("disk full")
+
+
+def test_writer_errors_on_close_are_raised(tmp_path, monkeypatch):
+    monkeypatch.setattr("mountain_car.recording._make_writer", lambda path, fps: _FailingCloseWriter())
+    recorder = FrameRecorder(str(tmp_path / "episode.gif"))
+    recorder.add(np.zeros((4, 4, 3), dtype=np.uint8))
+
+    with pytest.raises(RuntimeError, match="episode.gif"):
+        recorder.close()
+
+
+def test_skipped_frames_are_not_rendered(tmp_path, monkeypatch):
+    monkeypatch.setattr("mountain_car.recording._make_writer", lambda path, fps: _NullWriter())
+    recorder = FrameRecorder(str(tmp_path / "episode.gif"), frame_skip=4)
+    renders = []
+
+    def render():
+        renders.append(1)
+        return np.zeros((4, 4, 3), dtype=np.uint8)
+
+    for _ in range(12):
+        recorder.add(render)
+    recorder.close()
+
+    assert len(renders) == recorder.n_written == 3
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from mountain_car import PrioritizedReplayBuffer, ReplayBuffer, make_agent, make_replay_buffer
+from mountain_car.replay import SumTree
+from train import train_vectorized
+
+
+def add_transitions(buffer, start, n):
+    """Add n transitions whose reward encodes their insertion order"""
+    ids = np.arange(start, start + n)
+    buffer.add(np.zeros((n, 2)), ids % 3, ids, np.zeros((n, 2)), np.zeros(n, dtype=bool))
+
+
+def test_ring_buffer_overwrites_oldest():
+    buffer = ReplayBuffer(capacity=10, seed=0)
+    add_transitions(buffer, 0, 7)
+    add_transitions(buffer, 7, 7)
+
+    assert len(buffer) == 10
+    assert buffer.pos == 4
+    assert sorted(buffer.rewards) == list(range(4, 14))
+
+    (_, actions, rewards, _, _), indices, weights = buffer.sample(32)
+    assert rewards.min() >= 4
+    np.testing.assert_array_equal(actions, rewards.astype(int) % 3)
+    np.testing.assert_array_equal(weights, 1.0)
+
+
+def test_sum_tree_prefix_search():
+    tree = SumTree(5)
+    tree.update(np.arange(5), [1.0, 0.0, 2.0, 3.0, 4.0])
+
+    assert tree.total == pytest.approx(10.0)
+    np.testing.assert_array_equal(tree.find([0.0, 0.99, 1.0, 2.99, 3.0, 5.99, 6.0, 9.99]), [0, 0, 2, 2, 3, 3, 4, 4])
+
+
+def test_prioritized_sampling_follows_priorities():
+    buffer = PrioritizedReplayBuffer(capacity=4, seed=0, alpha=1.0, eps=0.0)
+    add_transitions(buffer, 0, 4)
+    buffer.update_priorities(np.arange(4), np.array([1.0, 0.0, -3.0, 6.0]))
+
+    counts = np.zeros(4)
+    for _ in range(200):
+        _, indices, weights = buffer.sample(50)
+        counts += np.bincount(indices, minlength=4)
+
+    np.testing.assert_allclose(counts / counts.sum(), [0.1, 0.0, 0.3, 0.6], atol=0.01)
+    # Rarest sampled transition gets the largest correction
+    assert weights.max() == 1.0
+
+
+def test_new_transitions_get_max_priority():
+    buffer = PrioritizedReplayBuffer(capacity=8, seed=0, alpha=1.0, eps=0.0)
+    add_transitions(buffer, 0, 4)
+    buffer.update_priorities(np.arange(4), np.array([5.0, 0.1, 0.1, 0.1]))
+    add_transitions(buffer, 4, 1)
+
+    assert buffer.tree.tree[buffer.tree.size + 4] == pytest.approx(5.0)
+
+
+def test_buffer_state_round_trip():
+    buffer = make_replay_buffer("prioritized", capacity=16, seed=0)
+    add_transitions(buffer, 0, 20)
+    buffer.update_priorities(np.arange(4), np.ones(4))
+
+    restored = make_replay_buffer("prioritized", capacity=16, seed=1)
+    restored.set_state(buffer.get_state())
+
+    batch, indices, weights = buffer.sample(8)
+    restored_batch, restored_indices, restored_weights = restored.sample(8)
+    np.testing.assert_array_equal(indices, restored_indices)
+    np.testing.assert_array_equal(weights, restored_weights)
+    for x, y in zip(batch, restored_batch):
+        np.testing.assert_array_equal(x, y)
+
+
+def test_learn_from_buffer_reduces_td_error():
+    agent = make_agent("q_learning", kernel="numpy", learning_rate=0.5)
+    buffer = make_replay_buffer("prioritized", capacity=64, seed=0)
+    states = np.tile([[-0.5, 0.0], [0.0, 0.01]], (8, 1))
+    buffer.add(states, np.zeros(16, dtype=int), -np.ones(16), states, np.ones(16, dtype=bool))
+
+    first = np.abs(agent.learn_from_buffer(buffer, 16)).max()
+    for _ in range(10):
+        last = np.abs(agent.learn_from_buffer(buffer, 16)).max()
+
+    assert last < first
+
+
+def test_replay_rejects_on_policy_learners():
+    with pytest.raises(ValueError, match="on-policy"):
+        train_vectorized(
+            n_episodes=1, n_envs=2, backend="numpy", verbose=False, save=False, algorithm="sarsa", replay="uniform"
+        )
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from mountain_car import load_metrics
+from mountain_car.checkpoint import load_checkpoint
+from train import METRICS_LOG, train, train_vectorized
+
+
+def run_outputs():
+    q_table, _ = load_checkpoint("models/q_table_trained.npy")
+    return np.array(q_table), load_metrics(METRICS_LOG)
+
+
+def assert_same_run(a, b):
+    np.testing.assert_array_equal(a[0], b[0])
+    for column in a[1]:
+        np.testing.assert_array_equal(a[1][column], b[1][column])
+
+
+@pytest.mark.parametrize("backend", ["gymnasium", "numpy"])
+def test_serial_resume_continues_exactly(tmp_path, monkeypatch, backend):
+    monkeypatch.chdir(tmp_path)
+
+    train(n_episodes=30, save_freq=10, backend=backend, seed=0)
+    uninterrupted = run_outputs()
+
+    # Killed at episode 25: the last saved state is from episode 20
+    train(n_episodes=25, save_freq=10, backend=backend, seed=0)
+    train(n_episodes=30, save_freq=10, backend=backend, resume=True)
+
+    assert_same_run(run_outputs(), uninterrupted)
+
+
+@pytest.mark.parametrize("backend", ["gymnasium", "numpy"])
+def test_vectorized_resume_continues_exactly(tmp_path, monkeypatch, backend):
+    monkeypatch.chdir(tmp_path)
+    kwargs = {"save_freq": 40, "n_envs": 8, "backend": backend, "verbose": False}
+
+    train_vectorized(n_episodes=120, seed=0, **kwargs)
+    uninterrupted = run_outputs()
+
+    train_vectorized(n_episodes=100, seed=0, **kwargs)
+    train_vectorized(n_episodes=120, resume=True, **kwargs)
+
+    assert_same_run(run_outputs(), uninterrupted)
+
+
+def test_replay_resume_continues_exactly(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    kwargs = {"save_freq": 40, "n_envs": 8, "backend": "numpy", "verbose": False, "replay": "prioritized"}
+
+    train_vectorized(n_episodes=120, seed=0, **kwargs)
+    uninterrupted = run_outputs()
+
+    train_vectorized(n_episodes=100, seed=0, **kwargs)
+    train_vectorized(n_episodes=120, resume=True, **kwargs)
+
+    assert_same_run(run_outputs(), uninterrupted)
+
+
+def test_resume_rejects_mismatched_setup(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    train_vectorized(n_episodes=20, save_freq=10, n_envs=4, backend="numpy", seed=0, verbose=False)
+
+    with pytest.raises(ValueError):
+        train_vectorized(n_episodes=30, n_envs=8, backend="numpy", resume=True, verbose=False)
+    with pytest.raises(ValueError):
+        train(n_episodes=30, backend="numpy", resume=True)
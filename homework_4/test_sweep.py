@@ -0,0 +1,62 @@
+import csv
+
+from mountain_car import QLearningAgent
+from sweep import PARAM_GRID, grid_configs, random_configs, sweep
+
+
+def test_grid_configs_cover_every_combination():
+    configs = grid_configs()
+    assert len(configs) == 4 * 2 * 2 * 4
+    assert configs[0] == {key: values[0] for key, values in PARAM_GRID.items()}
+
+    small = grid_configs({"learning_rate": [0.1, 0.2], "n_bins": [(10, 10)]})
+    assert small == [{"learning_rate": 0.1, "n_bins": (10, 10)}, {"learning_rate": 0.2, "n_bins": (10, 10)}]
+
+
+def test_random_configs_are_seeded():
+    configs = random_configs(5, seed=3)
+
+    assert len(configs) == 5
+    assert random_configs(5, seed=3) == configs
+    assert random_configs(5, seed=4) != configs
+    for config in configs:
+        assert 0.01 <= config["learning_rate"] <= 1
+        assert config["n_bins"][0] == config["n_bins"][1]
+
+
+def test_sweep_writes_results_and_best_checkpoint(tmp_path):
+    configs = grid_configs(
+        {"learning_rate": [0.1, 0.5], "epsilon_decay": [0.99], "discount_factor": [0.99], "n_bins": [(10, 10)]}
+    )
+    results_path = tmp_path / "results.csv"
+    best_path = tmp_path / "models" / "best.npy"
+
+    results = sweep(
+        configs,
+        n_episodes=8,
+        n_envs=4,
+        eval_episodes=2,
+        max_workers=2,
+        results_path=str(results_path),
+        best_model_path=str(best_path),
+    )
+
+    with open(results_path) as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == len(results) == 2
+    assert list(rows[0]) == [
+        "learning_rate",
+        "epsilon_decay",
+        "discount_factor",
+        "n_bins",
+        "seed",
+        "final_reward",
+        "success_rate",
+        "wall_time",
+    ]
+    assert {row["seed"] for row in rows} == {"0", "1"}
+
+    best = QLearningAgent()
+    best.load(str(best_path))
+    assert best.q_table.shape == results[0]["q_table"].shape
+    assert (best.q_table == results[0]["q_table"]).all()
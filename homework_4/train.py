@@ -1,49 +1,146 @@
 """
 Train Q-learning agent on MountainCar
 """
+import argparse
+import time
 import numpy as np
-from mountain_car import MountainCarEnv, QLearningAgent
+from mountain_car import (
+    AGENTS,
+    REPLAY_BUFFERS,
+    MetricsRecorder,
+    MountainCarEnv,
+    load_metrics,
+    make_agent,
+    make_replay_buffer,
+    make_vector_env,
+    reached_goal,
+)
+from mountain_car.checkpoint import load_training_state, save_training_state
 
+METRICS_LOG = "training_metrics.csv"
+TRAIN_STATE = "models/train_state.npz"
+# Prioritized replay: importance-sampling beta reaches 1 after this many episodes
+BETA_ANNEAL_EPISODES = 2000
 
-def train(n_episodes=5000, save_freq=1000):
-    """Train the Q-learning agent"""
+AGENT_PARAMS = {
+    "n_actions": 3,
+    "learning_rate": 0.1,
+    "discount_factor": 0.99,
+    "epsilon": 1.0,
+    "epsilon_decay": 0.995,
+    "epsilon_min": 0.01,
+    "n_bins": (20, 20),
+}
+
+
+def print_progress(episode, n_episodes, metrics, epsilon, episodes_per_sec):
+    """Print the rolling metrics of the last 100 episodes"""
+    print(f"Episode {episode}/{n_episodes}")
+    print(f"  Avg Reward: {metrics.avg_reward:.1f}")
+    print(f"  Avg Steps: {metrics.avg_steps:.1f}")
+    print(f"  Avg Max Position: {metrics.avg_max_position:.3f} (goal: 0.5)")
+    print(f"  Best Position: {metrics.best_position:.3f}")
+    print(f"  Success Rate: {metrics.success_rate:.1%}")
+    print(f"  Epsilon: {epsilon:.3f}")
+    print(f"  Episodes/sec: {episodes_per_sec:.1f}")
+    print()
+
+
+def save_metrics_npz(log_path=METRICS_LOG, npz_path="training_metrics.npz"):
+    """Convert the streamed metrics log to the training_metrics.npz arrays"""
+    data = load_metrics(log_path)
+    np.savez(
+        npz_path,
+        rewards=data["reward"],
+        lengths=data["steps"],
+        max_positions=data["max_position"],
+    )
+
+
+def save_train_state(path, mode, agent, metrics, env, trainer=None):
+    """Atomically write everything needed to continue training exactly"""
+    import os
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    metrics.flush()
+    save_training_state(
+        path,
+        {
+            "mode": mode,
+            "agent": agent.get_state(),
+            "metrics": metrics.get_state(),
+            "env": env.get_state(),
+            "np_random": np.random.get_state(legacy=False),
+            "trainer": trainer or {},
+        },
+    )
+    print(f"Training state saved to {path}")
+
+
+def load_train_state(path, mode, agent, metrics, env):
+    """Restore a state written by save_train_state, returns its trainer dict"""
+    state = load_training_state(path)
+    if state["mode"] != mode:
+        raise ValueError(f"{path} was written by {state['mode']} training, not {mode}")
+
+    agent.set_state(state["agent"])
+    metrics.set_state(state["metrics"])
+    env.set_state(state["env"])
+    np.random.set_state(state["np_random"])
+    print(f"Resuming from episode {metrics.episode} ({path})")
+    return state["trainer"]
+
+
+def train(
+    n_episodes=5000,
+    save_freq=1000,
+    backend="gymnasium",
+    seed=None,
+    resume=False,
+    state_path=TRAIN_STATE,
+    algorithm="q_learning",
+    kernel=None,
+):
+    """Train a tabular agent (Q-learning by default, see AGENTS)
+
+    Every save_freq episodes the full training state (Q-table, epsilon,
+    metrics windows, NumPy and environment RNG state) is written to
+    state_path; resume=True continues from it exactly where it stopped.
+    """
+
+    if seed is not None:
+        np.random.seed(seed)
 
     # Create environment (no rendering during training for speed)
-    env = MountainCarEnv(render_mode=None)
+    env = MountainCarEnv(render_mode=None, backend=backend)
 
     # Create agent
-    agent = QLearningAgent(
-        n_actions=3,
-        learning_rate=0.1,
-        discount_factor=0.99,
-        epsilon=1.0,
-        epsilon_decay=0.995,
-        epsilon_min=0.01,
-        n_bins=(20, 20),
-    )
+    agent = make_agent(algorithm, kernel=kernel, **AGENT_PARAMS)
 
-    # Training metrics
-    episode_rewards = []
-    episode_lengths = []
-    max_positions = []
-    success_count = 0
+    # Training metrics (rolling window of 100 episodes, streamed to a CSV log)
+    metrics = MetricsRecorder(METRICS_LOG, window=100, resume=resume)
 
-    print("Starting Q-learning training...")
+    print(f"Starting {algorithm} training...")
     print(f"Episodes: {n_episodes}")
     print(f"State bins: {agent.n_bins}")
     print(f"Goal position: 0.5 (flag at the top)")
     print("=" * 60)
 
-    for episode in range(n_episodes):
-        state, _ = env.reset()
+    if resume:
+        load_train_state(state_path, "serial", agent, metrics, env)
+
+    block_start = time.perf_counter()
+
+    for episode in range(metrics.episode, n_episodes):
+        state, _ = env.reset(seed=seed if episode == 0 else None)
         total_reward = 0
         steps = 0
         done = False
         max_position = state[0]  # Track furthest position reached
+        next_action = None
 
         while not done:
-            # Select action
-            action = agent.get_action(state, training=True)
+            # Select action (on-policy learners already picked it last step)
+            action = agent.get_action(state, training=True) if next_action is None else next_action
 
             # Take step
             next_state, reward, terminated, truncated, _ = env.step(action)
@@ -53,70 +150,297 @@ def train(n_episodes=5000, save_freq=1000):
             max_position = max(max_position, next_state[0])
 
             # Update agent
-            agent.update(state, action, reward, next_state, done)
+            if agent.on_policy and not done:
+                next_action = agent.get_action(next_state, training=True)
+            agent.update(state, action, reward, next_state, done, next_action)
 
             state = next_state
             total_reward += reward
             steps += 1
 
-        # Track metrics
-        episode_rewards.append(total_reward)
-        episode_lengths.append(steps)
-        max_positions.append(max_position)
-
-        # Check if solved (reached goal)
-        if steps < 200:  # Goal reached before max steps
-            success_count += 1
-
         # Decay exploration
         agent.decay_epsilon()
 
+        # Track metrics (goal reached before max steps = success)
+        metrics.record(total_reward, steps, max_position, reached_goal(steps), agent.epsilon)
+
         # Print progress
         if (episode + 1) % 100 == 0:
-            avg_reward = np.mean(episode_rewards[-100:])
-            avg_length = np.mean(episode_lengths[-100:])
-            avg_max_pos = np.mean(max_positions[-100:])
-            best_pos_recent = max(max_positions[-100:])
-            success_rate = success_count / 100
-
-            print(f"Episode {episode + 1}/{n_episodes}")
-            print(f"  Avg Reward: {avg_reward:.1f}")
-            print(f"  Avg Steps: {avg_length:.1f}")
-            print(f"  Avg Max Position: {avg_max_pos:.3f} (goal: 0.5)")
-            print(f"  Best Position: {best_pos_recent:.3f}")
-            print(f"  Success Rate: {success_rate:.1%}")
-            print(f"  Epsilon: {agent.epsilon:.3f}")
-            print()
-
-            success_count = 0
+            episodes_per_sec = 100 / (time.perf_counter() - block_start)
+            print_progress(episode + 1, n_episodes, metrics, agent.epsilon, episodes_per_sec)
+            block_start = time.perf_counter()
 
         # Save checkpoint
         if (episode + 1) % save_freq == 0:
             import os
             os.makedirs("models", exist_ok=True)
-            agent.save(f"models/q_table_ep{episode + 1}.pkl")
+            agent.save(f"models/q_table_ep{episode + 1}.npy")
+            save_train_state(state_path, "serial", agent, metrics, env)
 
     env.close()
+    metrics.close()
 
     # Save final model
     import os
     os.makedirs("models", exist_ok=True)
-    agent.save("models/q_table_trained.pkl")
+    agent.save("models/q_table_trained.npy")
 
     # Save training metrics
-    np.savez(
-        "training_metrics.npz",
-        rewards=episode_rewards,
-        lengths=episode_lengths,
-        max_positions=max_positions,
-    )
+    save_metrics_npz()
 
     print("=" * 60)
     print("Training complete!")
     print(f"Final epsilon: {agent.epsilon:.3f}")
-    print(f"Final 100 episodes avg reward: {np.mean(episode_rewards[-100:]):.1f}")
-    print(f"Final 100 episodes avg steps: {np.mean(episode_lengths[-100:]):.1f}")
+    print(f"Final 100 episodes avg reward: {metrics.avg_reward:.1f}")
+    print(f"Final 100 episodes avg steps: {metrics.avg_steps:.1f}")
+
+
+def train_vectorized(
+    n_episodes=5000,
+    save_freq=1000,
+    n_envs=16,
+    seed=None,
+    backend="gymnasium",
+    agent_params=None,
+    verbose=True,
+    save=True,
+    resume=False,
+    state_path=TRAIN_STATE,
+    algorithm="q_learning",
+    kernel=None,
+    replay=None,
+    buffer_size=50_000,
+    batch_size=64,
+    replay_updates=4,
+):
+    """Train a tabular agent on N environments stepped in lockstep
+
+    Actions are selected and Q-updates applied for the whole batch at once
+    (through the Numba kernel when available). Epsilon decays once per
+    finished episode, as in train().
+    backend="numpy" steps all cars with NumpyMountainCarEnv instead of
+    gymnasium's vector env. agent_params overrides AGENT_PARAMS;
+    verbose=False and save=False make it usable as a library call (sweeps).
+    Training state is saved and resumed as in train(); the snapshot is taken
+    at the end of the batched step in which the save_freq episode finished.
+
+    replay="uniform"/"prioritized" stores transitions in a replay buffer of
+    buffer_size and, after every step, applies replay_updates minibatch
+    updates of batch_size sampled from it instead of the online update
+    (off-policy learners only).
+
+    Returns the trained agent and its MetricsRecorder (rolling averages of
+    the last 100 episodes).
+    """
+
+    if seed is not None:
+        np.random.seed(seed)
+
+    env = make_vector_env(n_envs=n_envs, seed=seed, backend=backend)
+
+    agent = make_agent(algorithm, kernel=kernel, **{**AGENT_PARAMS, **(agent_params or {})})
+
+    buffer = None
+    if replay is not None:
+        if agent.on_policy:
+            raise ValueError(f"{algorithm} is on-policy and can't learn from a replay buffer")
+        buffer = make_replay_buffer(replay, capacity=buffer_size, seed=seed)
+
+    # Training metrics (rolling window of 100 episodes, streamed to a CSV log)
+    metrics = MetricsRecorder(METRICS_LOG if save else None, window=100, resume=resume)
+
+    # Running totals of the episode in progress in each environment
+    total_rewards = np.zeros(n_envs)
+    steps = np.zeros(n_envs, dtype=int)
+
+    if verbose:
+        print(f"Starting vectorized {algorithm} training...")
+        print(f"Episodes: {n_episodes}")
+        print(f"Parallel environments: {n_envs} ({backend})")
+        print(f"State bins: {agent.n_bins}")
+        if buffer is not None:
+            print(f"Replay: {replay}, {buffer_size} transitions, {replay_updates}x{batch_size} per step")
+        print(f"Goal position: 0.5 (flag at the top)")
+        print("=" * 60)
+
+    if resume:
+        trainer = load_train_state(state_path, "vectorized", agent, metrics, env)
+        if len(trainer["states"]) != n_envs or trainer["backend"] != backend:
+            raise ValueError(
+                f"{state_path} was written with {len(trainer['states'])} {trainer['backend']} environments"
+            )
+        if buffer is not None:
+            if "replay" not in trainer:
+                raise ValueError(f"{state_path} was written without a replay buffer")
+            buffer.set_state(trainer["replay"])
+        states = trainer["states"]
+        total_rewards = trainer["total_rewards"]
+        steps = trainer["steps"]
+        max_position = trainer["max_position"]
+        next_actions = trainer["next_actions"]
+    else:
+        states, _ = env.reset()
+        max_position = states[:, 0].copy()
+        next_actions = None
+
+    block_start = time.perf_counter()
+    save_state = False
+
+    while metrics.episode < n_episodes:
+        # On-policy learners already picked these actions last step
+        actions = agent.get_actions(states, training=True) if next_actions is None else next_actions
+
+        observations, rewards, terminated, truncated, info = env.step(actions)
+        dones = terminated | truncated
+        next_states = info["final_obs"]
+
+        # Observations equal next_states for running envs; finished envs
+        # don't bootstrap, so their actions are just the first of the next episode
+        if agent.on_policy:
+            next_actions = agent.get_actions(observations, training=True)
+
+        if buffer is None:
+            agent.update_batch(states, actions, rewards, next_states, dones, next_actions)
+        else:
+            buffer.add(states, actions, rewards, next_states, dones)
+            if len(buffer) >= batch_size:
+                for _ in range(replay_updates):
+                    agent.learn_from_buffer(buffer, batch_size)
+
+        total_rewards += rewards
+        steps += 1
+        max_position = np.maximum(max_position, next_states[:, 0])
+
+        for i in np.flatnonzero(dones):
+            if metrics.episode >= n_episodes:
+                break
+
+            agent.decay_epsilon()
+            metrics.record(total_rewards[i], steps[i], max_position[i], reached_goal(steps[i]), agent.epsilon)
+
+            episode = metrics.episode
+            if replay == "prioritized":
+                buffer.anneal_beta(episode / BETA_ANNEAL_EPISODES)
+            if episode % 100 == 0:
+                if verbose:
+                    episodes_per_sec = 100 / (time.perf_counter() - block_start)
+                    print_progress(episode, n_episodes, metrics, agent.epsilon, episodes_per_sec)
+                block_start = time.perf_counter()
+
+            if save and episode % save_freq == 0:
+                import os
+                os.makedirs("models", exist_ok=True)
+                agent.save(f"models/q_table_ep{episode}.npy")
+                save_state = True
+
+        # Finished environments were reset in the same step
+        total_rewards[dones] = 0
+        steps[dones] = 0
+        max_position[dones] = observations[dones, 0]
+        states = observations
+
+        if save_state:
+            trainer = {
+                "backend": backend,
+                "states": states,
+                "total_rewards": total_rewards,
+                "steps": steps,
+                "max_position": max_position,
+                "next_actions": next_actions,
+            }
+            if buffer is not None:
+                trainer["replay"] = buffer.get_state()
+            save_train_state(state_path, "vectorized", agent, metrics, env, trainer)
+            save_state = False
+
+    env.close()
+    metrics.close()
+
+    if save:
+        import os
+        os.makedirs("models", exist_ok=True)
+        agent.save("models/q_table_trained.npy")
+        save_metrics_npz()
+
+    if verbose:
+        print("=" * 60)
+        print("Training complete!")
+        print(f"Final epsilon: {agent.epsilon:.3f}")
+        print(f"Final 100 episodes avg reward: {metrics.avg_reward:.1f}")
+        print(f"Final 100 episodes avg steps: {metrics.avg_steps:.1f}")
+
+    return agent, metrics
 
 
 if __name__ == "__main__":
-    train()
+    parser = argparse.ArgumentParser(description="Train Q-learning agent on MountainCar")
+    parser.add_argument("--episodes", type=int, default=5000, help="Number of training episodes")
+    parser.add_argument(
+        "--n-envs",
+        type=int,
+        default=1,
+        help="Environments stepped in lockstep (>1 enables batched training)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["gymnasium", "numpy"],
+        default="gymnasium",
+        help="Simulator backend",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible runs")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=f"Continue from the last saved training state ({TRAIN_STATE})",
+    )
+    parser.add_argument(
+        "--algorithm",
+        choices=list(AGENTS),
+        default="q_learning",
+        help="Tabular learner",
+    )
+    parser.add_argument(
+        "--kernel",
+        choices=["numba", "numpy"],
+        default=None,
+        help="Batched update kernel (default: numba if installed, else numpy)",
+    )
+    parser.add_argument(
+        "--replay",
+        choices=list(REPLAY_BUFFERS),
+        default=None,
+        help="Learn from minibatches of an experience replay buffer",
+    )
+    parser.add_argument("--buffer-size", type=int, default=50_000, help="Replay buffer capacity")
+    parser.add_argument("--batch-size", type=int, default=64, help="Replay minibatch size")
+    parser.add_argument(
+        "--replay-updates",
+        type=int,
+        default=4,
+        help="Minibatch updates per environment step",
+    )
+    args = parser.parse_args()
+
+    if args.n_envs > 1 or args.replay:
+        train_vectorized(
+            n_episodes=args.episodes,
+            n_envs=args.n_envs,
+            seed=args.seed,
+            backend=args.backend,
+            resume=args.resume,
+            algorithm=args.algorithm,
+            kernel=args.kernel,
+            replay=args.replay,
+            buffer_size=args.buffer_size,
+            batch_size=args.batch_size,
+            replay_updates=args.replay_updates,
+        )
+    else:
+        train(
+            n_episodes=args.episodes,
+            backend=args.backend,
+            seed=args.seed,
+            resume=args.resume,
+            algorithm=args.algorithm,
+            kernel=args.kernel,
+        )